@@ -0,0 +1,103 @@
+"""
+Benchmark analisis streaming vs in-memory (pandas).
+
+Memastikan analyze_stream menghasilkan moving average, slope/intercept dan
+statistik ringkasan yang sama dengan analisis pandas per node (chunk sengaja
+dibuat kecil agar jendela rolling melewati batas chunk), lalu mengukur waktu
+dan puncak alokasi memori (tracemalloc) untuk dua ukuran database.
+
+    python benchmarks/bench_analysis.py --nodes 10 --days 4
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from bench_rollup import build_db  # noqa: E402
+from storage import connect_reader  # noqa: E402
+from stream_analysis import analyze_frame, analyze_stream  # noqa: E402
+
+
+def check_equivalence(db_file, store):
+    conn = connect_reader(db_file)
+    sql, params = store.select_sql(conn)
+    expected, expected_smoothed = analyze_frame(
+        pd.read_sql_query(sql, conn, params=params)
+    )
+
+    smoothed = {}
+
+    def collect(node_id, timestamps, temperature, values):
+        smoothed.setdefault(node_id, []).append(values)
+
+    summaries = analyze_stream(conn, store, chunk_rows=997, on_chunk=collect)
+    conn.close()
+
+    assert summaries.keys() == expected.keys()
+    for node, summary in summaries.items():
+        np.testing.assert_allclose(
+            np.concatenate(smoothed[node]), expected_smoothed[node], rtol=1e-9
+        )
+        ref = expected[node]
+        assert summary[:4] == ref[:4], (summary, ref)
+        np.testing.assert_allclose(summary[4:], ref[4:], rtol=1e-6, atol=1e-12)
+
+
+def run_once(db_file, store, in_memory):
+    conn = connect_reader(db_file)
+    if in_memory:
+        sql, params = store.select_sql(conn)
+        analyze_frame(pd.read_sql_query(sql, conn, params=params))
+    else:
+        analyze_stream(conn, store)
+    conn.close()
+
+
+def measure(db_file, store, in_memory):
+    """(detik, puncak MB); waktu diukur tanpa tracemalloc karena overhead-nya."""
+    start = time.perf_counter()
+    run_once(db_file, store, in_memory)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    run_once(db_file, store, in_memory)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=10)
+    parser.add_argument("--days", type=int, default=4)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench_analysis_")
+    small_file = os.path.join(tmp, "small.db")
+    store, conn = build_db(small_file, 3, 1)
+    conn.close()
+    check_equivalence(small_file, store)
+    print("Hasil streaming sama dengan analisis pandas per node.")
+
+    for scale in (1, 4):
+        db_file = os.path.join(tmp, f"bench_{scale}.db")
+        store, conn = build_db(db_file, args.nodes, args.days * scale)
+        (rows,) = conn.execute("SELECT COUNT(*) FROM climate").fetchone()
+        conn.close()
+        for label, in_memory in (("in-memory", True), ("streaming", False)):
+            elapsed, peak = measure(db_file, store, in_memory)
+            print(
+                f"{rows:10,} baris {label:<9}: {elapsed:6.2f} s, "
+                f"puncak memori {peak:7.1f} MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Benchmark arsip kolumnar (Parquet / Arrow IPC) vs pd.read_sql_query.
+
+Database sintetis disalin dua kali lalu seluruh harinya dipindah ke arsip
+Parquet (zstd) dan Arrow IPC (memory map). Setelah memastikan ketiga sumber
+menghasilkan data yang sama, setiap cara baca diukur di proses baru (spawn):
+waktu load sampai DataFrame pandas dan kenaikan puncak RSS (VmHWM).
+
+Mode analisis besar (streaming, paralel per potongan waktu, laporan) juga
+diperiksa: setelah hari pertama diarsip, hasil dengan columnar_dir harus
+sama dengan analisis database utuh.
+
+    python benchmarks/bench_columnar.py --nodes 10 --rows 2000000
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from bench_parallel_analysis import START_TS, build_db  # noqa: E402
+from columnar_archive import archive_closed_days, load_archive  # noqa: E402
+from parallel_analysis import analyze_parallel  # noqa: E402
+from report import collect_node  # noqa: E402
+from storage import connect_reader, connect_writer  # noqa: E402
+from stream_analysis import analyze_stream  # noqa: E402
+
+COLUMNS = ("node_id", "timestamp", "temperature", "humidity")
+FAR_FUTURE = 4_000_000_000  # Semua hari data sintetis sudah "ditutup"
+
+
+def read_sqlite(db_file, store):
+    conn = connect_reader(db_file)
+    try:
+        sql, params = store.select_sql(
+            conn, columns=COLUMNS, order_by="node_id, timestamp"
+        )
+        return pd.read_sql_query(sql, conn, params=params)
+    finally:
+        conn.close()
+
+
+def read_archive(archive_dir, store):
+    return load_archive(archive_dir, store.table, columns=COLUMNS).to_pandas()
+
+
+def _peak_rss_kb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _reset_peak_rss():
+    # ru_maxrss ikut terbawa dari proses induk; VmHWM bisa di-reset (Linux)
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")
+
+
+def _measure(kind, source, store_spec):
+    from storage import ClimateStore
+
+    store = ClimateStore(*store_spec)
+    _reset_peak_rss()
+    before = _peak_rss_kb()
+    start = time.perf_counter()
+    df = read_sqlite(source, store) if kind == "sqlite" else read_archive(source, store)
+    elapsed = time.perf_counter() - start
+    return elapsed, (_peak_rss_kb() - before) / 1024, len(df)
+
+
+def measure(kind, source, store, repeat):
+    spec = (store.db_file, store.table, store.columns, store.partition)
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    for _ in range(repeat):
+        # Proses baru setiap kali agar puncak RSS tidak terbawa antar varian
+        with ctx.Pool(1) as pool:
+            results.append(pool.apply(_measure, (kind, source, spec)))
+    elapsed = min(r[0] for r in results)
+    rss = min(r[1] for r in results)
+    return elapsed, rss, results[0][2]
+
+
+def archive_copy(db_file, store, archive_dir, fmt):
+    copy = f"{db_file}.{fmt}"
+    shutil.copy(db_file, copy)
+    conn = connect_writer(copy)
+    try:
+        rows = archive_closed_days(conn, store, archive_dir, FAR_FUTURE, fmt)
+        (left,) = conn.execute(f"SELECT COUNT(*) FROM {store.table}").fetchone()
+    finally:
+        conn.close()
+    assert left == 0, left
+    return rows
+
+
+def assert_same_summaries(result, expected):
+    assert result.keys() == expected.keys()
+    for node, summary in result.items():
+        assert summary[:4] == expected[node][:4], (summary, expected[node])
+        np.testing.assert_allclose(summary[4:], expected[node][4:], rtol=1e-9)
+
+
+def check_analysis_modes(db_file, store, tmp):
+    """Streaming, paralel, dan laporan dengan hari pertama sudah diarsip."""
+    conn = connect_reader(db_file)
+    try:
+        expected = analyze_stream(conn, store)
+    finally:
+        conn.close()
+
+    copy = f"{db_file}.partial"
+    shutil.copy(db_file, copy)
+    archive_dir = os.path.join(tmp, "partial")
+    conn = connect_writer(copy)
+    try:
+        # Hanya hari pertama (UTC): data analisis datang dari arsip + SQLite
+        first_day_end = (START_TS // 86400 + 1) * 86400
+        assert archive_closed_days(conn, store, archive_dir, first_day_end) > 0
+        (left,) = conn.execute(f"SELECT COUNT(*) FROM {store.table}").fetchone()
+        assert left > 0
+        assert_same_summaries(
+            analyze_stream(conn, store, chunk_rows=997, columnar_dir=archive_dir),
+            expected,
+        )
+        node_id = next(iter(expected))
+        summary, _ = collect_node(
+            conn, store, node_id, 12, 500, "lttb", columnar_dir=archive_dir
+        )
+        assert_same_summaries({node_id: summary}, {node_id: expected[node_id]})
+    finally:
+        conn.close()
+    for segments in (1, 4):
+        result = analyze_parallel(
+            copy, store, workers=1, segments=segments, columnar_dir=archive_dir
+        )
+        assert_same_summaries(result, expected)
+
+
+def dir_size(path):
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path)
+        for name in names
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, default=10)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, "climate_data.db")
+        store = build_db(db_file, args.nodes, args.rows)
+        sources = {"sqlite": db_file}
+        for fmt in ("parquet", "arrow"):
+            archive_dir = os.path.join(tmp, fmt)
+            rows = archive_copy(db_file, store, archive_dir, fmt)
+            sources[fmt] = archive_dir
+            print(f"{fmt}: {rows} baris diarsip, {dir_size(archive_dir) / 1e6:.1f} MB")
+        print(f"sqlite: {os.path.getsize(db_file) / 1e6:.1f} MB (termasuk index)")
+
+        expected = read_sqlite(db_file, store)
+        for fmt in ("parquet", "arrow"):
+            loaded = read_archive(sources[fmt], store)
+            loaded["node_id"] = loaded["node_id"].astype(expected["node_id"].dtype)
+            pd.testing.assert_frame_equal(loaded, expected)
+        print("Ketiga sumber menghasilkan DataFrame yang sama.")
+        check_analysis_modes(db_file, store, tmp)
+        print("Streaming, paralel, dan laporan dengan arsip sama dengan SQLite utuh.\n")
+
+        print(f"{'sumber':<8} {'load (s)':>9} {'puncak RSS (MB)':>16}")
+        for kind, source in sources.items():
+            elapsed, rss, rows = measure(kind, source, store, args.repeat)
+            assert rows == len(expected)
+            print(f"{kind:<8} {elapsed:>9.3f} {rss:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Microbenchmark decode payload MQTT (pesan/detik).
+
+Membandingkan jalur decode on_message lama (decode dua kali + json.loads +
+beberapa payload.get) dengan src/ingest.py untuk payload JSON dan biner.
+String debug tetap dibentuk di kedua jalur, tetapi tidak ditulis ke stdout,
+supaya yang diukur hanya biaya decode. Sebelumnya dipastikan nilai NaN/inf
+ditolak dengan PayloadError di kedua format.
+
+    python benchmarks/bench_decode.py --messages 200000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from ingest import (  # noqa: E402
+    JSON_BACKEND,
+    PayloadError,
+    Reading,
+    decode_payload,
+    encode_binary,
+)
+
+
+def legacy_decode(payload, node_id_from_topic):
+    """Jalur decode on_message sebelum src/ingest.py (tanpa I/O print)."""
+    debug = f"--> Pesan mentah diterima: {payload.decode()}"
+    data = json.loads(payload.decode("utf-8"))
+    node_id = data.get("node_id", node_id_from_topic)
+    temp = data.get("temperature")
+    hum = data.get("humidity")
+    pos_x = data.get("pos_x")
+    pos_y = data.get("pos_y")
+    ts_val = data.get("timestamp")
+    if ts_val is None:
+        ts_val = data.get("ts")
+    ts = float(ts_val) if ts_val is not None else datetime.now().timestamp()
+    return debug, node_id, temp, hum, pos_x, pos_y, ts
+
+
+def new_decode(payload, node_id_from_topic):
+    reading = decode_payload(payload, node_id_from_topic)
+    debug = f"--> Pesan diterima: {reading}"
+    return debug, reading
+
+
+def sample_payloads(count):
+    payloads = []
+    for i in range(count):
+        data = {
+            "node_id": f"node_{i % 200:03d}",
+            "temperature": 20.0 + (i % 100) / 10.0,
+            "humidity": 50.0 + (i % 30),
+            "pos_x": float(i % 100),
+            "pos_y": float((i * 7) % 100),
+            "timestamp": 1_700_000_000 + i,
+        }
+        payloads.append(json.dumps(data).encode("utf-8"))
+    return payloads
+
+
+def check_non_finite():
+    """NaN/inf pada suhu, kelembapan, atau timestamp ditolak; pos NaN = None."""
+    nan, inf = float("nan"), float("inf")
+    good = Reading("node_001", 25.0, 50.0, 1.0, 2.0, 1_700_000_000.0)
+    bad = [
+        encode_binary(good._replace(**{field: value}))
+        for field in ("temperature", "humidity", "timestamp")
+        for value in (nan, inf, -inf)
+    ]
+    bad += [
+        b'{"temperature": 25, "timestamp": "nan"}',
+        b'{"temperature": 25, "timestamp": "1e400"}',
+        b'{"temperature": 25, "timestamp": 1' + b"0" * 400 + b"}",
+        b'{"temperature": 1e400}',
+    ]
+    for payload in bad:
+        try:
+            reading = decode_payload(payload, "node_001")
+        except PayloadError:
+            continue
+        raise AssertionError(f"{payload!r} lolos sebagai {reading}")
+    reading = decode_payload(encode_binary(good._replace(pos_x=None, pos_y=None)))
+    assert reading.pos_x is None and reading.pos_y is None
+    print(f"{len(bad)} payload NaN/inf ditolak")
+
+
+def rate(fn, payloads):
+    start = time.perf_counter()
+    for payload in payloads:
+        fn(payload, "node_000")
+    return len(payloads) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=100_000)
+    args = parser.parse_args()
+
+    check_non_finite()
+    json_payloads = sample_payloads(args.messages)
+    binary_payloads = [
+        encode_binary(decode_payload(payload)) for payload in json_payloads
+    ]
+
+    # Pastikan kedua jalur membaca nilai yang sama
+    for payload in json_payloads[:100]:
+        _, *old = legacy_decode(payload, "node_000")
+        _, reading = new_decode(payload, "node_000")
+        assert tuple(old) == tuple(reading), (old, reading)
+
+    legacy = rate(legacy_decode, json_payloads)
+    new_json = rate(new_decode, json_payloads)
+    new_binary = rate(new_decode, binary_payloads)
+
+    print(f"Backend JSON     : {JSON_BACKEND}")
+    print(f"Handler lama     : {legacy:12,.0f} pesan/detik")
+    print(
+        f"ingest (JSON)    : {new_json:12,.0f} pesan/detik ({new_json / legacy:.2f}x)"
+    )
+    print(
+        f"ingest (biner)   : {new_binary:12,.0f} pesan/detik "
+        f"({new_binary / legacy:.2f}x, {len(binary_payloads[0])} vs "
+        f"{len(json_payloads[0])} byte)"
+    )
+
+
+if __name__ == "__main__":
+    main()
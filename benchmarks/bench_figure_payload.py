@@ -0,0 +1,146 @@
+"""
+Ukuran payload dan waktu serialisasi figure: list JSON vs typed array (bdata).
+
+Dua figure yang mewakili dashboard: heatmap grid N x N (dengan sel NaN di
+luar radius node) dan series waktu dengan banyak titik. Tiga cara kirim:
+
+- list    : array diubah ke list Python (float JSON per elemen, waktu ISO)
+- numpy   : array numpy diserahkan ke Plotly apa adanya (datetime64 tetap
+            menjadi string ISO)
+- typed   : figure_cache.typed_array, seperti build_dashboard/build_figures
+            (heatmap z float32, waktu sebagai milidetik float64)
+
+"bangun" adalah go.Figure + to_dict (sekali per versi data, di FigureCache);
+"encode" adalah encode JSON response Dash (setiap callback, setiap tab).
+Sebelum angka dicetak, typed array di-decode dan dibandingkan dengan data asal.
+
+    python benchmarks/bench_figure_payload.py
+    python benchmarks/bench_figure_payload.py --grid 500 --points 50000
+"""
+
+import argparse
+import base64
+import os
+import sys
+import time
+
+import numpy as np
+import plotly.graph_objects as go
+from plotly.io.json import to_json_plotly
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from figure_cache import serialize_figure, typed_array  # noqa: E402
+
+
+def decode(spec):
+    values = np.frombuffer(base64.b64decode(spec["bdata"]), dtype=spec["dtype"])
+    if "shape" in spec:
+        values = values.reshape([int(n) for n in spec["shape"].split(",")])
+    return values
+
+
+def heatmap_data(rng, n):
+    """Grid suhu n x n; sekitar sepertiga sel NaN (tidak terjangkau node)."""
+    axis = np.arange(n, dtype=float)
+    grid = rng.normal(27.0, 4.0, (n, n))
+    grid[rng.random((n, n)) < 0.35] = np.nan
+    return axis, axis.copy(), grid
+
+
+def series_data(rng, n):
+    start = np.datetime64("2025-01-01T00:00:00", "ms")
+    timestamps = start + np.arange(n) * np.timedelta64(1000, "ms")
+    return timestamps, rng.normal(27.0, 4.0, n).round(2)
+
+
+def heatmap_figure(mode, x, y, z):
+    if mode == "list":
+        z = [[None if np.isnan(v) else v for v in row] for row in z.tolist()]
+        x, y = x.tolist(), y.tolist()
+    elif mode == "typed":
+        x, y, z = typed_array(x), typed_array(y), typed_array(z, "f4")
+    return serialize_figure(go.Figure(go.Heatmap(x=x, y=y, z=z)))
+
+
+def series_figure(mode, timestamps, values):
+    layout = {}
+    if mode == "list":
+        x, y = timestamps.tolist(), values.tolist()
+    elif mode == "numpy":
+        x, y = timestamps, values
+    else:
+        ms = timestamps.astype(np.int64).astype(float)
+        x, y = typed_array(ms), typed_array(values)
+        layout = {"xaxis_type": "date"}
+    fig = go.Figure(go.Scattergl(x=x, y=y, mode="lines"))
+    fig.update_layout(**layout)
+    return serialize_figure(fig)
+
+
+def check_typed(heatmap, series):
+    x, y, z = heatmap
+    trace = heatmap_figure("typed", x, y, z)["data"][0]
+    decoded = decode(trace["z"])
+    assert decoded.shape == z.shape
+    assert np.array_equal(np.isnan(decoded), np.isnan(z))
+    np.testing.assert_allclose(decoded, z, rtol=1e-6, equal_nan=True)
+    assert np.array_equal(decode(trace["x"]), x)
+
+    timestamps, values = series
+    trace = series_figure("typed", timestamps, values)["data"][0]
+    assert np.array_equal(decode(trace["y"]), values)
+    ms = decode(trace["x"]).astype(np.int64).astype("datetime64[ms]")
+    assert np.array_equal(ms, timestamps)
+    print("Typed array OK (NaN, float32, dan waktu identik setelah decode)")
+
+
+def timed(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(name, build, repeat):
+    print(f"{name}")
+    print(f"  {'mode':<6} {'bytes':>10} {'bangun ms':>10} {'encode ms':>10}")
+    for mode in ("list", "numpy", "typed"):
+        fig = build(mode)
+        payload = to_json_plotly(fig)
+        build_s = timed(lambda: build(mode), repeat)
+        encode_s = timed(lambda: to_json_plotly(fig), repeat)
+        print(
+            f"  {mode:<6} {len(payload):>10} {build_s * 1000:>10.1f} "
+            f"{encode_s * 1000:>10.2f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--grid", type=int, default=200, help="Sisi grid heatmap")
+    parser.add_argument("--points", type=int, default=10_000, help="Titik series")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    heatmap = heatmap_data(rng, args.grid)
+    series = series_data(rng, args.points)
+    check_typed(heatmap, series)
+
+    report(
+        f"Heatmap {args.grid}x{args.grid}",
+        lambda mode: heatmap_figure(mode, *heatmap),
+        args.repeat,
+    )
+    report(
+        f"Series {args.points} titik",
+        lambda mode: series_figure(mode, *series),
+        args.repeat,
+    )
+
+
+if __name__ == "__main__":
+    main()
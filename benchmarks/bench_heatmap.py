@@ -0,0 +1,219 @@
+"""
+Benchmark dan uji kesetaraan interpolasi heatmap.
+
+Membandingkan loop Python versi lama (per sel, per node) dengan engine
+NumPy di src/heatmap_engine.py, baik versi broadcast penuh maupun versi
+tile + spatial index. Hasil semuanya harus identik (toleransi pembulatan
+float) sebelum angka waktu dicetak.
+
+    python benchmarks/bench_heatmap.py
+    python benchmarks/bench_heatmap.py --field 500 --resolution 1 --nodes 200
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from heatmap_engine import (  # noqa: E402
+    FieldGeometry,
+    IncrementalHeatmap,
+    build_grid,
+    interpolate_idw,
+    interpolate_idw_indexed,
+)
+from spatial_index import UniformGridIndex  # noqa: E402
+
+
+def legacy_heatmap(x_grid, y_grid, node_x, node_y, node_temp, radius):
+    """Salinan loop generate_heatmap_data() sebelum vektorisasi."""
+    X, Y = np.meshgrid(x_grid, y_grid)
+    temp_grid = np.full(X.shape, np.nan)
+    for i in range(len(y_grid)):
+        for j in range(len(x_grid)):
+            grid_x, grid_y = X[i, j], Y[i, j]
+            weights = []
+            temps = []
+            for nx, ny, t in zip(node_x, node_y, node_temp):
+                distance = np.sqrt((grid_x - nx) ** 2 + (grid_y - ny) ** 2)
+                if distance <= radius:
+                    weights.append(1.0 / (distance + 0.1))
+                    temps.append(t)
+            if weights:
+                temp_grid[i, j] = np.average(temps, weights=weights)
+    return temp_grid
+
+
+def random_nodes(rng, n, field):
+    node_x = rng.uniform(0, field, n)
+    node_y = rng.uniform(0, field, n)
+    node_temp = rng.uniform(15, 40, n)
+    return node_x, node_y, node_temp
+
+
+def check_equivalence(rng):
+    """Bandingkan hasil engine dengan loop lama pada beberapa konfigurasi acak."""
+    cases = [
+        (100, 5, 2, 15),
+        (100, 5, 10, 15),
+        (60, 1, 7, 8),
+        (100, 3, 25, 30),
+        (50, 5, 0, 15),
+    ]
+    for field, resolution, n, radius in cases:
+        x_grid, y_grid = build_grid(field, field, resolution)
+        node_x, node_y, node_temp = random_nodes(rng, n, field)
+        # Node tepat di titik grid menguji kasus jarak nol dan batas radius
+        if n:
+            node_x[0], node_y[0] = x_grid[1], y_grid[1]
+        expected = legacy_heatmap(x_grid, y_grid, node_x, node_y, node_temp, radius)
+        actual = interpolate_idw(x_grid, y_grid, node_x, node_y, node_temp, radius)
+        np.testing.assert_array_equal(np.isnan(expected), np.isnan(actual))
+        np.testing.assert_allclose(actual, expected, rtol=1e-12, equal_nan=True)
+
+        index = UniformGridIndex(node_x, node_y, radius)
+        indexed = interpolate_idw_indexed(
+            x_grid, y_grid, node_x, node_y, node_temp, radius, index, tile_cells=4
+        )
+        np.testing.assert_array_equal(np.isnan(expected), np.isnan(indexed))
+        np.testing.assert_allclose(indexed, expected, rtol=1e-12, equal_nan=True)
+
+        geometry = FieldGeometry(x_grid, y_grid)
+        sparse = geometry.interpolate(
+            list(zip(node_x, node_y, node_temp, [radius] * n))
+        )
+        np.testing.assert_array_equal(np.isnan(expected), np.isnan(sparse))
+        np.testing.assert_allclose(sparse, expected, rtol=1e-12, equal_nan=True)
+    print(f"Kesetaraan OK ({len(cases)} konfigurasi)")
+
+
+def check_incremental(rng, field=100, resolution=2, n=20, radius=15, steps=200):
+    """Pembaruan inkremental acak harus sama dengan hitung ulang penuh."""
+    x_grid, y_grid = build_grid(field, field, resolution)
+    node_x, node_y, node_temp = random_nodes(rng, n, field)
+    heatmap = IncrementalHeatmap(x_grid, y_grid, radius)
+    # Bangun ulang penuh (penjumlahan sparse) ikut teruji di tengah jalan
+    heatmap.REBUILD_EVERY = steps // 3
+    readings = {i: (node_x[i], node_y[i], node_temp[i]) for i in range(n)}
+    heatmap.update(dict(readings), version=0)
+
+    for step in range(1, steps + 1):
+        node = int(rng.integers(n))
+        action = rng.random()
+        if action < 0.7:
+            x, y, _ = readings.get(node, (node_x[node], node_y[node], 0))
+            readings[node] = (x, y, rng.uniform(15, 40))
+        elif action < 0.9:
+            readings[node] = (rng.uniform(0, field), rng.uniform(0, field), 25.0)
+        else:
+            readings.pop(node, None)
+        actual = heatmap.update(dict(readings), version=step)
+
+        xs = np.array([r[0] for r in readings.values()])
+        ys = np.array([r[1] for r in readings.values()])
+        ts = np.array([r[2] for r in readings.values()])
+        expected = interpolate_idw(x_grid, y_grid, xs, ys, ts, radius)
+        np.testing.assert_array_equal(np.isnan(expected), np.isnan(actual))
+        np.testing.assert_allclose(actual, expected, rtol=1e-9, equal_nan=True)
+
+    # Versi yang sama harus mengembalikan objek grid yang sama (cache)
+    assert heatmap.update({}, version=steps) is actual
+    assert heatmap.full_rebuilds > 0
+    print(f"Inkremental OK ({steps} pembaruan acak)")
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--field", type=float, default=500)
+    parser.add_argument("--resolution", type=float, default=1)
+    parser.add_argument("--nodes", type=int, default=200)
+    parser.add_argument("--radius", type=float, default=15)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--legacy-field",
+        type=float,
+        default=100,
+        help="Ukuran field untuk mengukur loop lama (loop lama sangat lambat)",
+    )
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    check_equivalence(rng)
+    check_incremental(rng)
+
+    x_grid, y_grid = build_grid(args.field, args.field, args.resolution)
+    node_x, node_y, node_temp = random_nodes(rng, args.nodes, args.field)
+    cells = len(x_grid) * len(y_grid)
+
+    engine_s = timed(
+        lambda: interpolate_idw(x_grid, y_grid, node_x, node_y, node_temp, args.radius),
+        args.repeat,
+    )
+    print(
+        f"Engine  : {args.field:g}x{args.field:g} m, res {args.resolution:g} m, "
+        f"{args.nodes} node, {cells} sel -> {engine_s * 1000:.1f} ms"
+    )
+
+    index = UniformGridIndex(node_x, node_y, args.radius)
+    indexed_s = timed(
+        lambda: interpolate_idw_indexed(
+            x_grid, y_grid, node_x, node_y, node_temp, args.radius, index
+        ),
+        args.repeat,
+    )
+    print(f"Indexed : tile + spatial index -> {indexed_s * 1000:.1f} ms")
+
+    geometry = FieldGeometry(x_grid, y_grid)
+    sparse_readings = list(zip(node_x, node_y, node_temp, [args.radius] * args.nodes))
+    cold_s = timed(
+        lambda: FieldGeometry(x_grid, y_grid).interpolate(sparse_readings), 1
+    )
+    geometry.interpolate(sparse_readings)  # Isi cache stencil
+    warm_s = timed(lambda: geometry.interpolate(sparse_readings), args.repeat)
+    print(
+        f"Sparse  : stencil baru {cold_s * 1000:.1f} ms, "
+        f"stencil dari cache (posisi tetap) {warm_s * 1000:.1f} ms"
+    )
+
+    heatmap = IncrementalHeatmap(x_grid, y_grid, args.radius, geometry=geometry)
+    readings = {i: (node_x[i], node_y[i], node_temp[i]) for i in range(args.nodes)}
+    full_s = timed(lambda: heatmap._rebuild(readings), 1)
+
+    def one_node_changed():
+        x, y, t = readings[0]
+        readings[0] = (x, y, t + 0.1)
+        heatmap.update(readings)
+
+    partial_s = timed(one_node_changed, args.repeat)
+    print(
+        f"Inkremental: bangun penuh {full_s * 1000:.1f} ms, "
+        f"1 node berubah {partial_s * 1000:.2f} ms"
+    )
+
+    lx, ly = build_grid(args.legacy_field, args.legacy_field, args.resolution)
+    lcells = len(lx) * len(ly)
+    legacy_s = timed(
+        lambda: legacy_heatmap(lx, ly, node_x, node_y, node_temp, args.radius), 1
+    )
+    print(
+        f"Loop lama: {args.legacy_field:g}x{args.legacy_field:g} m, {lcells} sel -> "
+        f"{legacy_s * 1000:.1f} ms (perkiraan {legacy_s * cells / lcells:.1f} s "
+        f"untuk {cells} sel)"
+    )
+
+
+if __name__ == "__main__":
+    main()
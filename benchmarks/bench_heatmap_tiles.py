@@ -0,0 +1,185 @@
+"""
+Benchmark dan uji kesetaraan heatmap pyramid berbasis tile.
+
+Membandingkan figure yang mengirim grid penuh di resolusi terhalus dengan
+overview kasar + tile halus untuk area zoom (src/heatmap_tiles.py): ukuran
+JSON figure, waktu membangun grid, dan waktu zoom dengan tile dari cache.
+Sebelum angka dicetak, tile yang digabung harus identik dengan grid penuh
+di resolusi yang sama, termasuk setelah beberapa node berubah (tile yang
+terkena radius node harus dibuang dari cache).
+
+    python benchmarks/bench_heatmap_tiles.py
+    python benchmarks/bench_heatmap_tiles.py --field 2000 --resolution 1 --nodes 500
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import plotly.graph_objects as go
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from heatmap_engine import build_grid, interpolate_idw  # noqa: E402
+from heatmap_tiles import TiledHeatmap, pyramid_resolutions  # noqa: E402
+
+
+def random_readings(rng, n, field, radius):
+    return {
+        f"node_{i:04d}": (
+            float(rng.uniform(0, field)),
+            float(rng.uniform(0, field)),
+            float(rng.uniform(15, 40)),
+            float(radius * rng.uniform(0.5, 1.5)),
+        )
+        for i in range(n)
+    }
+
+
+def full_grid(field, resolution, readings):
+    x_grid, y_grid = build_grid(field, field, resolution)
+    x, y, t, r = np.asarray(list(readings.values()), dtype=float).T
+    return x_grid, y_grid, interpolate_idw(x_grid, y_grid, x, y, t, r)
+
+
+def check_tiles(tiles, field, readings, view_key):
+    level, tx0, tx1, ty0, ty1 = view_key
+    t = tiles.tile_cells
+    x_grid, y_grid, expected = full_grid(field, tiles.resolutions[level], readings)
+    vx, vy, grid = tiles.view(view_key)
+    rows = slice(ty0 * t, (ty1 + 1) * t)
+    cols = slice(tx0 * t, (tx1 + 1) * t)
+    assert np.array_equal(vx, x_grid[cols]) and np.array_equal(vy, y_grid[rows])
+    np.testing.assert_allclose(grid, expected[rows, cols], rtol=1e-12, equal_nan=True)
+
+
+def check_equivalence(rng):
+    """Tile gabungan == grid penuh, sebelum dan sesudah node berubah."""
+    field, radius = 400, 20
+    tiles = TiledHeatmap(
+        field, field, pyramid_resolutions(field, field, 1, 100), view_cells=100
+    )
+    readings = random_readings(rng, 60, field, radius)
+    tiles.update(readings, 1)
+    view_key = tiles.view_key(((120, 210), (40, 130)))
+    assert view_key is not None and view_key[0] == len(tiles.resolutions) - 1
+    check_tiles(tiles, field, readings, view_key)
+
+    for version in range(2, 6):
+        node_ids = rng.choice(sorted(readings), 3, replace=False)
+        for node_id in node_ids:
+            x, y, temp, r = readings[node_id]
+            readings[node_id] = (x + rng.uniform(-5, 5), y, temp + 1.0, r)
+        readings.pop(sorted(readings)[0])
+        tiles.update(dict(readings), version)
+        check_tiles(tiles, field, readings, view_key)
+    assert tiles.cache.evictions > 0
+    print(f"Kesetaraan tile OK ({len(tiles.resolutions)} level, 4 pembaruan)")
+
+
+def figure_bytes(*traces):
+    fig = go.Figure()
+    for x, y, z in traces:
+        fig.add_trace(go.Heatmap(x=x, y=y, z=z))
+    return len(fig.to_json())
+
+
+def timed(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--field", type=float, default=1000, help="Sisi field (m)")
+    parser.add_argument("--resolution", type=float, default=1, help="Resolusi terhalus")
+    parser.add_argument("--nodes", type=int, default=300)
+    parser.add_argument("--radius", type=float, default=30)
+    parser.add_argument("--view-cells", type=int, default=200)
+    parser.add_argument(
+        "--zoom", type=float, default=150, help="Sisi area zoom (m) dari tengah field"
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    check_equivalence(rng)
+
+    readings = random_readings(rng, args.nodes, args.field, args.radius)
+    resolutions = pyramid_resolutions(
+        args.field, args.field, args.resolution, args.view_cells
+    )
+    print(
+        f"Field {args.field:g}x{args.field:g} m, {args.nodes} node, level (m/sel): "
+        + ", ".join(f"{r:g}" for r in resolutions)
+    )
+
+    full = full_grid(args.field, args.resolution, readings)
+    full_s = timed(
+        lambda: full_grid(args.field, args.resolution, readings), args.repeat
+    )
+    full_bytes = figure_bytes(full)
+    print(
+        f"Grid penuh   : {full[2].size} sel, {full_bytes / 1e6:.2f} MB JSON, "
+        f"{full_s * 1000:.0f} ms"
+    )
+
+    overview = full_grid(args.field, resolutions[0], readings)
+    overview_s = timed(
+        lambda: full_grid(args.field, resolutions[0], readings), args.repeat
+    )
+    overview_bytes = figure_bytes(overview)
+    print(
+        f"Overview     : {overview[2].size} sel, {overview_bytes / 1e6:.2f} MB JSON, "
+        f"{overview_s * 1000:.0f} ms"
+    )
+
+    center = args.field / 2
+    half = args.zoom / 2
+    viewport = ((center - half, center + half), (center - half, center + half))
+    tiles = TiledHeatmap(
+        args.field, args.field, resolutions, view_cells=args.view_cells
+    )
+    tiles.update(readings, 1)
+    view_key = tiles.view_key(viewport)
+    if view_key is None:
+        print("Area zoom cukup ditampilkan dengan overview (tidak ada tile)")
+        return
+    start = time.perf_counter()
+    detail = tiles.view(view_key)
+    cold_s = time.perf_counter() - start
+    warm_s = timed(lambda: tiles.view(view_key), args.repeat)
+    zoom_bytes = figure_bytes(overview, detail)
+    print(
+        f"Zoom {args.zoom:g} m  : level {view_key[0]} ({resolutions[view_key[0]]:g} "
+        f"m/sel), {detail[2].size} sel tile, overview + tile "
+        f"{zoom_bytes / 1e6:.2f} MB JSON, tile baru {cold_s * 1000:.0f} ms, "
+        f"dari cache {warm_s * 1000:.1f} ms"
+    )
+
+    # Satu node di area zoom berubah: hanya tile di sekitarnya yang dihitung ulang
+    node_id = min(
+        readings,
+        key=lambda n: abs(readings[n][0] - center) + abs(readings[n][1] - center),
+    )
+    x, y, temp, r = readings[node_id]
+    readings[node_id] = (x, y, temp + 0.5, r)
+    cached, evictions = len(tiles.cache), tiles.cache.evictions
+    start = time.perf_counter()
+    tiles.update(dict(readings), 2)
+    tiles.view(view_key)
+    changed_s = time.perf_counter() - start
+    print(
+        f"1 node berubah: {tiles.cache.evictions - evictions} tile dibuang dari "
+        f"{cached}, zoom ulang {changed_s * 1000:.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark tampilan riwayat: waktu server dan ukuran payload per rentang.
+
+Membuat database sintetis beberapa node (satu baris per 5 detik), mengisi
+rollup, lalu memanggil history.load_history untuk rentang 1, 7 dan 30 hari
+dengan LTTB dan min/max. Waktu yang dilaporkan mencakup query, downsampling
+dan serialisasi JSON figure Plotly.
+
+    python benchmarks/bench_history.py --nodes 4 --days 30
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import plotly.graph_objects as go
+import plotly.io as pio
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from bench_rollup import START_TS, build_db  # noqa: E402
+from history import load_history  # noqa: E402
+from rollup import RollupStore  # noqa: E402
+from storage import connect_reader  # noqa: E402
+
+
+def figure_json(history, column):
+    fig = go.Figure()
+    for node_id, node in history.items():
+        x, y = node.series[column]
+        fig.add_trace(go.Scattergl(x=x, y=y, mode="lines", name=node_id))
+    return pio.to_json(fig)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=4)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--points", type=int, default=1000)
+    args = parser.parse_args()
+
+    db_file = os.path.join(tempfile.mkdtemp(prefix="bench_history_"), "bench.db")
+    store, conn = build_db(db_file, args.nodes, args.days)
+    rollups = RollupStore(store)
+    rollups.setup(conn)
+    rollups.compact(conn)
+    conn.close()
+
+    reader = connect_reader(db_file)
+    node_ids = [f"node_{n:03d}" for n in range(args.nodes)]
+    end = START_TS + args.days * 86400
+    for days in sorted({1, 7, args.days}):
+        for method in ("lttb", "minmax"):
+            start_time = time.perf_counter()
+            history = load_history(
+                reader,
+                store,
+                rollups,
+                node_ids,
+                end - days * 86400,
+                end,
+                points=args.points,
+                method=method,
+            )
+            payload = sum(
+                len(figure_json(history, col)) for col in ("temperature", "humidity")
+            )
+            elapsed = (time.perf_counter() - start_time) * 1000.0
+            rows = sum(node.rows_read for node in history.values())
+            points = sum(node.points for node in history.values())
+            source = next(iter(history.values())).resolution or "mentah"
+            print(
+                f"{days:3d} hari {method:<6}: {rows:8,} baris ({source:<6}) -> "
+                f"{points:6,} titik, {payload / 1024:7.1f} KB, {elapsed:6.0f} ms"
+            )
+    reader.close()
+
+
+if __name__ == "__main__":
+    main()
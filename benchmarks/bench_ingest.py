@@ -0,0 +1,436 @@
+"""
+Benchmark throughput ingestion kedua dashboard (on_message sampai SQLite).
+
+Armada node sintetis mengirim JSON yang sama dengan sendSensorData() di
+src/esp32_node.cpp.txt (node_id, temperature, humidity, pos_x, pos_y,
+timestamp unix integer) ke topik MQTT_TOPIC_BASE/<node_id>. Setiap dashboard
+dijalankan di proses baru (spawn) dalam folder sementara, dengan semua node
+armada terdaftar di node_info. Dua transport:
+
+- direct: on_message dipanggil langsung dengan MQTTMessage buatan; latensi
+  adalah durasi satu panggilan handler.
+- broker: pesan dipublish lewat benchmarks/mqtt_standin.py (broker MQTT
+  minimal, proses terpisah) dan diterima client paho dashboard; latensi
+  diukur dari publish sampai on_message selesai.
+
+Setelah pesan terakhir, waktu sampai BatchWriter selesai menulis semua baris
+dicatat sebagai drain_ms. CPU per pesan dihitung dari time.process_time()
+proses dashboard (termasuk thread paho, writer, dan compactor).
+
+Hasil ditulis sebagai JSON (--output) dan bisa dibandingkan dengan hasil
+sebelumnya (--compare); exit code 1 jika ada regresi di atas --tolerance.
+
+    python benchmarks/bench_ingest.py --nodes 50 --messages 20000 --output hasil.json
+    python benchmarks/bench_ingest.py --compare hasil.json
+"""
+
+import argparse
+import contextlib
+import importlib
+import json
+import multiprocessing
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import mqtt_standin  # noqa: E402
+from ingest import JSON_BACKEND  # noqa: E402
+
+DASHBOARDS = ("line_dashboard", "heatmap_dashboard")
+TRANSPORTS = ("direct", "broker")
+MQTT_TOPIC_BASE = "Informatika/IoT-E/Kelompok9/multi_node"
+REGISTRY_DB = "multi_node_climate.db"
+SEND_INTERVAL = 5  # Detik antar kirim per node (SEND_INTERVAL di ESP32)
+FIELD_SIZE = 100.0
+TIMEOUT = 120.0
+
+# Metrik yang dibandingkan: (path, arah yang lebih baik)
+COMPARED_METRICS = (
+    (("throughput_msg_s",), "higher"),
+    (("latency_ms", "p50"), "lower"),
+    (("latency_ms", "p99"), "lower"),
+    (("cpu_us_per_msg",), "lower"),
+)
+
+
+# --- ARMADA SINTETIS ---
+
+
+def node_positions(nodes):
+    """Posisi node tersebar merata di field (grid persegi)."""
+    side = int(np.ceil(np.sqrt(nodes)))
+    step = FIELD_SIZE / side
+    return {
+        f"node_{i + 1:03d}": (
+            round(step / 2 + (i % side) * step, 1),
+            round(step / 2 + (i // side) * step, 1),
+        )
+        for i in range(nodes)
+    }
+
+
+def fleet_messages(nodes, messages, seed=0):
+    """
+    [(topic, payload)] bergiliran antar node, seperti armada ESP32 yang
+    mengirim setiap SEND_INTERVAL detik. Pasangan (node_id, timestamp) unik,
+    jadi payload juga unik (dipakai sebagai kunci latensi).
+    """
+    rng = np.random.default_rng(seed)
+    positions = node_positions(nodes)
+    node_ids = list(positions)
+    rounds = -(-messages // nodes)
+    start = int(time.time()) - rounds * SEND_INTERVAL
+    temps = rng.normal(27.0, 4.0, messages)
+    hums = rng.normal(60.0, 10.0, messages)
+    result = []
+    for i in range(messages):
+        node_id = node_ids[i % nodes]
+        pos_x, pos_y = positions[node_id]
+        # Urutan field dan format ringkas sama dengan serializeJson(doc, payload)
+        payload = json.dumps(
+            {
+                "node_id": node_id,
+                "temperature": round(float(temps[i]), 2),
+                "humidity": round(float(hums[i]), 2),
+                "pos_x": pos_x,
+                "pos_y": pos_y,
+                "timestamp": start + (i // nodes) * SEND_INTERVAL,
+            },
+            separators=(",", ":"),
+        ).encode("utf-8")
+        result.append((f"{MQTT_TOPIC_BASE}/{node_id}", payload))
+    return result
+
+
+# --- PROSES DASHBOARD ---
+
+
+def _load_dashboard(dashboard, nodes):
+    """Import dashboard di folder sementara dengan semua node terdaftar."""
+    from node_registry import register_node
+    from storage import connect_writer
+
+    os.chdir(tempfile.mkdtemp(prefix="bench_ingest_"))
+    conn = connect_writer(REGISTRY_DB)
+    try:
+        for node_id, (pos_x, pos_y) in node_positions(nodes).items():
+            register_node(conn, node_id, pos_x, pos_y)
+    finally:
+        conn.close()
+    # Dashboard mencetak banyak pesan setup; stdout benchmark tetap bersih
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        return importlib.import_module(dashboard)
+
+
+def _finish(module, started, cpu_started, received):
+    """Tunggu writer selesai lalu kumpulkan statistik proses dashboard."""
+    ended = time.perf_counter()
+    cpu = time.process_time() - cpu_started
+    drain_start = time.perf_counter()
+    module.db_writer.flush(timeout=TIMEOUT)
+    drain_ms = (time.perf_counter() - drain_start) * 1000
+    from storage import connect_reader
+
+    conn = connect_reader(module.DB_FILE)
+    try:
+        (rows,) = conn.execute(
+            f"SELECT COUNT(*) FROM {module.climate_store.table}"
+        ).fetchone()
+    finally:
+        conn.close()
+    return {
+        "received": received,
+        "duration_s": ended - started,
+        "cpu_s": cpu,
+        "drain_ms": drain_ms,
+        "persisted_rows": rows,
+        "writer": module.db_writer.stats(),
+    }
+
+
+def run_direct(dashboard, nodes, messages, rate):
+    import paho.mqtt.client as mqtt
+
+    module = _load_dashboard(dashboard, nodes)
+    batch = []
+    for topic, payload in fleet_messages(nodes, messages):
+        msg = mqtt.MQTTMessage(topic=topic.encode("utf-8"))
+        msg.payload = payload
+        batch.append(msg)
+
+    on_message = module.on_message
+    latencies = np.empty(len(batch))
+    perf_counter = time.perf_counter
+    cpu_started = time.process_time()
+    started = perf_counter()
+    for i, msg in enumerate(batch):
+        if rate:
+            delay = started + i / rate - perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        t = perf_counter()
+        on_message(None, None, msg)
+        latencies[i] = perf_counter() - t
+    stats = _finish(module, started, cpu_started, len(batch))
+    stats["latencies"] = latencies.tolist()
+    return stats
+
+
+def run_broker_client(dashboard, nodes, messages, port, ready, results):
+    """Dashboard dengan client paho asli; kirim {payload: waktu selesai}."""
+    import threading
+
+    import paho.mqtt.client as mqtt
+
+    module = _load_dashboard(dashboard, nodes)
+    done_at = {}
+    all_received = threading.Event()
+    subscribed = threading.Event()
+    perf_counter = time.perf_counter
+
+    def on_message(client, userdata, msg):
+        module.on_message(client, userdata, msg)
+        done_at[msg.payload] = perf_counter()
+        if len(done_at) == messages:
+            all_received.set()
+
+    def on_subscribe(client, userdata, mid, reason_codes, properties):
+        module.on_subscribe(client, userdata, mid, reason_codes, properties)
+        subscribed.set()
+
+    client = mqtt.Client(
+        mqtt.CallbackAPIVersion.VERSION2, client_id=f"bench_{dashboard}"
+    )
+    client.on_connect = module.on_connect
+    client.on_subscribe = on_subscribe
+    client.on_message = on_message
+    client.connect("127.0.0.1", port)
+    client.loop_start()
+    subscribed.wait(TIMEOUT)
+
+    cpu_started = time.process_time()
+    started = perf_counter()
+    ready.set()
+    all_received.wait(TIMEOUT)
+    stats = _finish(module, started, cpu_started, len(done_at))
+    client.loop_stop()
+    client.disconnect()
+    # Durasi dihitung ulang di induk: dari publish pertama sampai pesan terakhir
+    stats["done_at"] = done_at
+    results.put(stats)
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run_broker(dashboard, nodes, messages, rate):
+    import paho.mqtt.client as mqtt
+
+    ctx = multiprocessing.get_context("spawn")
+    port = _free_port()
+    broker_ready = ctx.Event()
+    broker = ctx.Process(
+        target=mqtt_standin.run, args=("127.0.0.1", port, broker_ready), daemon=True
+    )
+    broker.start()
+    broker_ready.wait(TIMEOUT)
+
+    ready, results = ctx.Event(), ctx.Queue()
+    worker = ctx.Process(
+        target=run_broker_client,
+        args=(dashboard, nodes, messages, port, ready, results),
+    )
+    worker.start()
+    batch = fleet_messages(nodes, messages)
+    publisher = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id="bench_fleet")
+    publisher.connect("127.0.0.1", port)
+    publisher.loop_start()
+    try:
+        if not ready.wait(TIMEOUT):
+            raise RuntimeError(f"{dashboard} tidak siap menerima pesan")
+        sent_at = {}
+        perf_counter = time.perf_counter
+        started = perf_counter()
+        for i, (topic, payload) in enumerate(batch):
+            if rate:
+                delay = started + i / rate - perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            sent_at[payload] = perf_counter()
+            publisher.publish(topic, payload)
+        stats = results.get(timeout=TIMEOUT * 2)
+        worker.join(TIMEOUT)
+    finally:
+        publisher.loop_stop()
+        publisher.disconnect()
+        broker.terminate()
+        if worker.is_alive():
+            worker.terminate()
+
+    done_at = stats.pop("done_at")
+    stats["latencies"] = [done_at[p] - sent_at[p] for p in done_at]
+    if done_at:
+        stats["duration_s"] = max(done_at.values()) - started
+    return stats
+
+
+def _direct_worker(dashboard, nodes, messages, rate, results):
+    results.put(run_direct(dashboard, nodes, messages, rate))
+
+
+def measure(dashboard, transport, nodes, messages, rate):
+    if transport == "broker":
+        stats = run_broker(dashboard, nodes, messages, rate)
+    else:
+        ctx = multiprocessing.get_context("spawn")
+        results = ctx.Queue()
+        worker = ctx.Process(
+            target=_direct_worker, args=(dashboard, nodes, messages, rate, results)
+        )
+        worker.start()
+        stats = results.get(timeout=TIMEOUT * 2)
+        worker.join(TIMEOUT)
+
+    latencies = np.asarray(stats.pop("latencies")) * 1000
+    received = stats["received"]
+    return {
+        "dashboard": dashboard,
+        "transport": transport,
+        "messages": messages,
+        "received": received,
+        "throughput_msg_s": received / stats["duration_s"],
+        "latency_ms": {
+            "mean": float(latencies.mean()) if received else None,
+            **{
+                f"p{q}": float(np.percentile(latencies, q)) if received else None
+                for q in (50, 90, 99)
+            },
+            "max": float(latencies.max()) if received else None,
+        },
+        "cpu_us_per_msg": stats["cpu_s"] / max(received, 1) * 1e6,
+        **{k: stats[k] for k in ("duration_s", "drain_ms", "persisted_rows")},
+        "writer": stats["writer"],
+    }
+
+
+# --- OUTPUT & PERBANDINGAN ---
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "json_backend": JSON_BACKEND,
+        "commit": commit,
+    }
+
+
+def _metric(result, path):
+    for key in path:
+        result = result[key]
+    return result
+
+
+def compare(report, baseline, tolerance):
+    """Cetak perubahan per metrik; return jumlah regresi di atas tolerance."""
+    previous = {(r["dashboard"], r["transport"]): r for r in baseline["results"]}
+    regressions = 0
+    print(f"\nDibanding {baseline['environment'].get('commit') or 'baseline'}:")
+    if baseline.get("params") != report["params"]:
+        print(f"  peringatan: parameter berbeda ({baseline.get('params')})")
+    for result in report["results"]:
+        old = previous.get((result["dashboard"], result["transport"]))
+        if old is None:
+            continue
+        for path, better in COMPARED_METRICS:
+            new_value, old_value = _metric(result, path), _metric(old, path)
+            if not new_value or not old_value:
+                continue
+            change = new_value / old_value - 1
+            worse = -change if better == "higher" else change
+            flag = "REGRESI" if worse > tolerance else ""
+            regressions += bool(flag)
+            print(
+                f"  {result['dashboard']:<18} {result['transport']:<7} "
+                f"{'.'.join(path):<17} {old_value:>10.2f} -> {new_value:>10.2f} "
+                f"({change:+.1%}) {flag}"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, default=50)
+    parser.add_argument("--messages", type=int, default=20_000)
+    parser.add_argument(
+        "--rate", type=float, default=0, help="Pesan/detik; 0 = secepatnya"
+    )
+    parser.add_argument("--dashboard", choices=DASHBOARDS, action="append")
+    parser.add_argument("--transport", choices=TRANSPORTS, action="append")
+    parser.add_argument("--output", help="Tulis hasil JSON ke file ini")
+    parser.add_argument("--compare", help="File JSON hasil sebelumnya")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+
+    report = {
+        "benchmark": "ingest",
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "environment": environment(),
+        "params": {"nodes": args.nodes, "messages": args.messages, "rate": args.rate},
+        "results": [],
+    }
+    print(
+        f"{'dashboard':<18} {'transport':<9} {'msg/s':>9} {'p50 ms':>8} "
+        f"{'p99 ms':>8} {'CPU us/msg':>11} {'drain ms':>9} {'rows':>7}"
+    )
+    for dashboard in args.dashboard or DASHBOARDS:
+        for transport in args.transport or TRANSPORTS:
+            result = measure(dashboard, transport, args.nodes, args.messages, args.rate)
+            report["results"].append(result)
+            latency = result["latency_ms"]
+            print(
+                f"{dashboard:<18} {transport:<9} {result['throughput_msg_s']:>9.0f} "
+                f"{latency['p50'] or 0:>8.3f} {latency['p99'] or 0:>8.3f} "
+                f"{result['cpu_us_per_msg']:>11.1f} {result['drain_ms']:>9.1f} "
+                f"{result['persisted_rows']:>7}"
+            )
+            if result["received"] != args.messages:
+                print(f"  peringatan: hanya {result['received']} pesan diterima")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nHasil ditulis ke {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
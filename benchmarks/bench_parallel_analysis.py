@@ -0,0 +1,105 @@
+"""
+Skalabilitas analisis paralel per node (ProcessPoolExecutor).
+
+Membuat database sintetis (default 100 node x total 1 juta baris), memastikan
+analyze_parallel (per node, dan per node x potongan waktu) sama dengan
+analyze_stream satu proses, lalu mengukur waktu untuk 1, 2, 4, ... worker
+sampai jumlah core.
+
+    python benchmarks/bench_parallel_analysis.py --nodes 100 --rows 1000000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from parallel_analysis import analyze_parallel  # noqa: E402
+from storage import (  # noqa: E402
+    CLIMATE_COLUMNS,
+    ClimateStore,
+    connect_reader,
+    connect_writer,
+)
+from stream_analysis import analyze_stream  # noqa: E402
+
+START_TS = 1_700_000_000
+
+
+def build_db(db_file, nodes, rows):
+    store = ClimateStore(db_file, "climate", CLIMATE_COLUMNS)
+    conn = connect_writer(db_file)
+    store.setup(conn)
+    rng = np.random.default_rng(0)
+    per_node = rows // nodes
+    sql = store.insert_sql(START_TS)
+    for n in range(nodes):
+        ts = START_TS + np.arange(per_node) * 5
+        temp = 25 + 0.0001 * n * np.arange(per_node) / 100 + rng.normal(0, 1, per_node)
+        hum = 60 + rng.normal(0, 2, per_node)
+        with conn:
+            conn.executemany(
+                sql,
+                zip(
+                    [f"node_{n:03d}"] * per_node,
+                    ts.tolist(),
+                    temp.tolist(),
+                    hum.tolist(),
+                ),
+            )
+    conn.close()
+    return store
+
+
+def check_equivalence(db_file, store):
+    conn = connect_reader(db_file)
+    expected = analyze_stream(conn, store)
+    conn.close()
+    for segments in (1, 4):
+        result = analyze_parallel(db_file, store, workers=2, segments=segments)
+        assert result.keys() == expected.keys()
+        for node, summary in result.items():
+            assert summary[:4] == expected[node][:4]
+            np.testing.assert_allclose(summary[4:], expected[node][4:], rtol=1e-9)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=100)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    db_file = os.path.join(tempfile.mkdtemp(prefix="bench_parallel_"), "bench.db")
+    start = time.perf_counter()
+    store = build_db(db_file, args.nodes, args.rows)
+    print(
+        f"Database sintetis {args.nodes} node x {args.rows:,} baris dibuat dalam "
+        f"{time.perf_counter() - start:.1f} s (CPU tersedia: {os.cpu_count()})"
+    )
+
+    check_equivalence(db_file, store)
+    print("Hasil paralel (per node dan per potongan waktu) sama dengan streaming.")
+
+    workers = sorted(
+        {1, args.max_workers} | {2**i for i in range(8) if 2**i < args.max_workers}
+    )
+    baseline = None
+    for count in workers:
+        start = time.perf_counter()
+        analyze_parallel(db_file, store, workers=count)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(
+            f"{count:3d} worker: {elapsed:6.2f} s, {args.rows / elapsed:10,.0f} baris/detik, "
+            f"speedup {baseline / elapsed:.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
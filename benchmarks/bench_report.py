@@ -0,0 +1,101 @@
+"""
+Benchmark laporan headless: render deret penuh vs deret hasil downsampling.
+
+Untuk satu node dengan banyak baris, bandingkan waktu render PNG (canvas Agg)
+jika semua titik digambar dengan jalur report.py (streaming + LTTB per chunk),
+lalu ukur generate_report untuk beberapa node dengan 1 dan N worker.
+
+    python benchmarks/bench_report.py --rows 500000 --nodes 8
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from bench_parallel_analysis import build_db  # noqa: E402
+from report import (  # noqa: E402
+    NodeReport,
+    collect_node,
+    generate_report,
+    render_matplotlib,
+)
+from storage import connect_reader  # noqa: E402
+
+
+def render_full(conn, store, path):
+    """Jalur lama: DataFrame penuh, rolling + polyfit, semua titik digambar."""
+    sql, params = store.select_sql(
+        conn, columns=("timestamp", "temperature", "humidity"), node_id="node_000"
+    )
+    df = pd.read_sql_query(sql, conn, params=params)
+    df["timestamp"] = pd.to_datetime(df["timestamp"], unit="s")
+    df = df.set_index("timestamp")
+    df["smoothed"] = df["temperature"].rolling(window=12).mean()
+    x = (df.index - df.index[0]).total_seconds().values
+    slope, intercept = np.polyfit(x, df["temperature"].values, 1)
+
+    fig = Figure(figsize=(15, 10))
+    FigureCanvasAgg(fig)
+    ax1, ax2 = fig.subplots(nrows=2, ncols=1, sharex=True)
+    ax1.plot(df.index, df["temperature"], color="red", alpha=0.7)
+    ax1.plot(df.index, df["humidity"], color="blue", alpha=0.7)
+    ax2.plot(df.index, df["temperature"], color="gray", linestyle=":", alpha=0.5)
+    ax2.plot(df.index, df["smoothed"], color="green", linewidth=2.5)
+    ax2.plot(df.index, slope * x + intercept, color="yellow", linestyle="--")
+    fig.savefig(path)
+    return len(df)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500_000, help="Baris per node")
+    parser.add_argument("--nodes", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench_report_")
+    db_file = os.path.join(tmp, "bench.db")
+    store = build_db(db_file, args.nodes, args.rows * args.nodes)
+    conn = connect_reader(db_file)
+
+    start = time.perf_counter()
+    rows = render_full(conn, store, os.path.join(tmp, "full.png"))
+    full_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    summary, series = collect_node(conn, store, "node_000", 12, 1000, "lttb")
+    render_matplotlib(
+        {"node_000": NodeReport(summary, series, None)},
+        os.path.join(tmp, "decimated.png"),
+        "node_000",
+    )
+    decimated_s = time.perf_counter() - start
+    conn.close()
+    points = sum(len(x) for x, _ in series.values())
+    print(
+        f"1 node, {rows:,} baris: semua titik {full_s:.2f} s, "
+        f"downsampling ({points:,} titik, termasuk analisis) {decimated_s:.2f} s"
+    )
+
+    for workers in sorted({1, args.workers}):
+        start = time.perf_counter()
+        generate_report(
+            db_file, store, os.path.join(tmp, f"laporan_{workers}"), workers=workers
+        )
+        print(
+            f"generate_report {args.nodes} node, {workers} worker: "
+            f"{time.perf_counter() - start:.2f} s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Benchmark tabel rollup: biaya compaction dan baca rentang panjang.
+
+Membuat database sintetis (beberapa node, satu baris per RAW_INTERVAL detik),
+memastikan statistik rollup (count, mean, min, max, std) sama dengan hasil
+agregasi pandas atas data mentah, memastikan compaction tetap jalan setelah
+semua baris diarsip (id tidak dipakai ulang), lalu membandingkan waktu membaca seluruh
+rentang dari data mentah dengan membaca rollup pada resolusi pilihan.
+
+    python benchmarks/bench_rollup.py --nodes 20 --days 30
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from columnar_archive import archive_closed_days  # noqa: E402
+from rollup import RESOLUTIONS, RollupStore, choose_resolution  # noqa: E402
+from storage import CLIMATE_COLUMNS, ClimateStore, connect_writer  # noqa: E402
+
+START_TS = 1_700_000_000
+RAW_INTERVAL = 5
+
+
+def build_db(db_file, nodes, days):
+    store = ClimateStore(db_file, "climate", CLIMATE_COLUMNS)
+    conn = connect_writer(db_file)
+    store.setup(conn)
+    rng = np.random.default_rng(0)
+    steps = days * 86400 // RAW_INTERVAL
+    sql = store.insert_sql(START_TS)
+    for n in range(nodes):
+        ts = START_TS + np.arange(steps) * RAW_INTERVAL
+        temp = 25 + 3 * np.sin(ts / 3600.0) + rng.normal(0, 0.5, steps)
+        hum = 60 + rng.normal(0, 2, steps)
+        node = f"node_{n:03d}"
+        with conn:
+            conn.executemany(
+                sql,
+                zip([node] * steps, ts.tolist(), temp.tolist(), hum.tolist()),
+            )
+    return store, conn
+
+
+def check_equivalence(conn, store, rollups, resolution):
+    seconds = dict(RESOLUTIONS)[resolution]
+    sql, params = store.select_sql(conn, node_id="node_000")
+    raw = pd.read_sql_query(sql, conn, params=params)
+    raw["bucket"] = (raw["timestamp"] // seconds) * seconds
+    expected = raw.groupby("bucket")["temperature"].agg(
+        ["count", "mean", "min", "max", "std"]
+    )
+
+    sql, params = rollups.select_sql(resolution, node_id="node_000")
+    roll = pd.read_sql_query(sql, conn, params=params).set_index("bucket")
+    n = roll["temperature_count"]
+    mean = roll["temperature_mean"]
+    # Standar deviasi sampel dari sum dan sum of squares
+    std = np.sqrt((roll["temperature_sumsq"] - n * mean**2) / (n - 1))
+
+    assert (roll.index.values == expected.index.values).all()
+    assert (n.values == expected["count"].values).all()
+    np.testing.assert_allclose(mean, expected["mean"], rtol=1e-9)
+    np.testing.assert_allclose(roll["temperature_min"], expected["min"])
+    np.testing.assert_allclose(roll["temperature_max"], expected["max"])
+    np.testing.assert_allclose(std, expected["std"], rtol=1e-5)
+
+
+def check_archive_cycle(partition):
+    """
+    Compact, arsip semua baris, insert baris baru, compact lagi: baris baru
+    harus masuk rollup (tabel kosong tidak boleh mengulang id dari 1).
+    """
+    tmp = tempfile.mkdtemp(prefix="bench_rollup_archive_")
+    store = ClimateStore(
+        os.path.join(tmp, "cycle.db"), "climate", CLIMATE_COLUMNS, partition
+    )
+    conn = connect_writer(store.db_file)
+    store.setup(conn)
+    rollups = RollupStore(store)
+    rollups.setup(conn)
+
+    def insert(timestamps):
+        with conn:
+            for ts in timestamps:
+                conn.execute(store.insert_sql(ts), ("node_000", ts, 25.0, 60.0))
+
+    def rollup_count():
+        (count,) = conn.execute(
+            f"SELECT SUM(temperature_count) FROM {rollups.table_for('1d')}"
+        ).fetchone()
+        return count
+
+    old_day = [START_TS + i * RAW_INTERVAL for i in range(100)]
+    insert(old_day)
+    assert rollups.compact(conn) == 100
+    archive_closed_days(conn, store, os.path.join(tmp, "archive"), time.time())
+    assert all(
+        conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] == 0
+        for t in store.data_tables(conn)
+    )
+
+    # Baris baru hari ini, lalu data terlambat untuk hari yang sudah diarsip
+    insert([int(time.time()) - i for i in range(10)])
+    insert(old_day[:5])
+    assert rollups.compact(conn) == 15
+    assert rollup_count() == 115, rollup_count()
+    conn.close()
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=20)
+    parser.add_argument("--days", type=int, default=30)
+    args = parser.parse_args()
+
+    db_file = os.path.join(tempfile.mkdtemp(prefix="bench_rollup_"), "bench.db")
+    store, conn = build_db(db_file, args.nodes, args.days)
+    rollups = RollupStore(store)
+    rollups.setup(conn)
+
+    rows, compact_s = timed(lambda: rollups.compact(conn))
+    print(
+        f"Compaction awal : {rows:,} baris dalam {compact_s:.2f} s "
+        f"({rows / compact_s:,.0f} baris/detik)"
+    )
+
+    # Compaction inkremental: satu menit data baru untuk semua node
+    sql = store.insert_sql(START_TS)
+    end_ts = START_TS + args.days * 86400
+    new_rows = [
+        (f"node_{n:03d}", end_ts + i * RAW_INTERVAL, 25.0, 60.0)
+        for n in range(args.nodes)
+        for i in range(60 // RAW_INTERVAL)
+    ]
+    with conn:
+        conn.executemany(sql, new_rows)
+    rows, inc_s = timed(lambda: rollups.compact(conn))
+    print(f"Compaction delta: {rows:,} baris dalam {inc_s * 1000:.1f} ms")
+
+    for label, _ in RESOLUTIONS:
+        check_equivalence(conn, store, rollups, label)
+    print("Statistik rollup sama dengan agregasi data mentah (1m, 1h, 1d).")
+
+    for partition in (None, "day"):
+        check_archive_cycle(partition)
+    print("Compaction setelah semua baris diarsip tetap lengkap (tanpa/per hari).")
+
+    first, last, per_node = rollups.summary(conn)
+    resolution = choose_resolution(first, last, raw_points=per_node)
+    sql, params = store.select_sql(conn, node_id="node_000")
+    raw, raw_s = timed(lambda: pd.read_sql_query(sql, conn, params=params))
+    sql, params = rollups.select_sql(resolution, node_id="node_000")
+    roll, roll_s = timed(lambda: pd.read_sql_query(sql, conn, params=params))
+    print(
+        f"Baca {args.days} hari satu node: mentah {len(raw):,} baris "
+        f"{raw_s * 1000:.0f} ms, rollup {resolution} {len(roll):,} baris "
+        f"{roll_s * 1000:.1f} ms ({raw_s / roll_s:.0f}x)"
+    )
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
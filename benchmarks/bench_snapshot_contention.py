@@ -0,0 +1,226 @@
+"""
+Kontensi ingest vs callback heatmap: data_lock lama vs snapshot copy-on-write.
+
+Satu thread ingestion menyimpan pembacaan dengan laju tetap (atau secepatnya)
+sementara beberapa thread menjalankan pekerjaan callback update_dashboard
+terus-menerus: status node, daftar status (html.Div), dan grid heatmap.
+Dua model state dibandingkan:
+
+- lock     : dict node_data + data_lock seperti versi lama; callback memegang
+             lock untuk loop status, membaca versi, membangun daftar status,
+             dan menyalin node_data
+- snapshot : field_state.FieldState; callback membaca satu referensi snapshot
+             immutable tanpa lock
+
+Yang diukur: latensi satu penyimpanan di sisi ingestion (termasuk menunggu
+lock), jumlah pesan yang tersimpan, dan latensi/jumlah callback.
+
+    python benchmarks/bench_snapshot_contention.py --nodes 50 --readers 4 --seconds 5
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+from dash import html
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from field_state import FieldState, NodeState  # noqa: E402
+from heatmap_engine import IncrementalHeatmap, build_grid  # noqa: E402
+
+FIELD_SIZE = 100
+GRID_RESOLUTION = 5
+NODE_RADIUS = 15
+NODE_TIMEOUT = 30
+
+
+def status_row(node_id, temperature, humidity, status):
+    return html.Div(
+        [
+            html.Span(f"● {node_id}", style={"fontWeight": "bold"}),
+            html.Span(f"T: {temperature}°C"),
+            html.Span(f"H: {humidity}%"),
+            html.Span(f"Status: {status}"),
+        ]
+    )
+
+
+class LockedModel:
+    """Replika state heatmap_dashboard sebelum snapshot copy-on-write."""
+
+    name = "lock"
+
+    def __init__(self, heatmap):
+        self.node_data = {}
+        self.data_lock = threading.Lock()
+        self.data_version = 0
+        self.heatmap = heatmap
+
+    def store(self, node_id, temp, hum, pos_x, pos_y, seen):
+        with self.data_lock:
+            self.node_data[node_id] = {
+                "temperature": temp,
+                "humidity": hum,
+                "pos_x": pos_x,
+                "pos_y": pos_y,
+                "last_seen": seen,
+                "status": "online",
+            }
+            self.data_version += 1
+
+    def callback(self):
+        now = datetime.now()
+        with self.data_lock:  # update_node_status
+            for data in self.node_data.values():
+                offline = (now - data["last_seen"]).total_seconds() > NODE_TIMEOUT
+                status = "offline" if offline else "online"
+                if data["status"] != status:
+                    data["status"] = status
+                    self.data_version += 1
+        with self.data_lock:
+            version = self.data_version
+        with self.data_lock:  # Daftar status dibangun di dalam lock
+            rows = [
+                status_row(n, d["temperature"], d["humidity"], d["status"])
+                for n, d in self.node_data.items()
+            ]
+        with self.data_lock:  # generate_heatmap_data
+            nodes = {n: dict(d) for n, d in self.node_data.items()}
+        readings = {
+            n: (d["pos_x"], d["pos_y"], d["temperature"]) for n, d in nodes.items()
+        }
+        return rows, self.heatmap.update(readings, version)
+
+
+class SnapshotModel:
+    name = "snapshot"
+
+    def __init__(self, heatmap):
+        self.state = FieldState()
+        self.heatmap = heatmap
+
+    def store(self, node_id, temp, hum, pos_x, pos_y, seen):
+        self.state.update({node_id: NodeState(temp, hum, pos_x, pos_y, seen)})
+
+    def callback(self):
+        snapshot = self.state.current
+        offline = snapshot.offline_nodes(datetime.now(), NODE_TIMEOUT)
+        rows = [
+            status_row(
+                n,
+                node.temperature,
+                node.humidity,
+                "offline" if n in offline else "online",
+            )
+            for n, node in snapshot.nodes.items()
+        ]
+        readings = {
+            n: (node.pos_x, node.pos_y, node.temperature)
+            for n, node in snapshot.nodes.items()
+        }
+        return rows, self.heatmap.update(readings, snapshot.version)
+
+
+def run(model_cls, nodes, readers, seconds, rate):
+    heatmap = IncrementalHeatmap(
+        *build_grid(FIELD_SIZE, FIELD_SIZE, GRID_RESOLUTION), NODE_RADIUS
+    )
+    model = model_cls(heatmap)
+    rng = np.random.default_rng(0)
+    positions = rng.uniform(0, FIELD_SIZE, (nodes, 2)).round(1)
+    temps = rng.normal(27.0, 4.0, 100_000).round(2)
+    node_ids = [f"node_{i:03d}" for i in range(nodes)]
+    # Sebagian node sudah lama tidak mengirim, supaya loop status ada isinya
+    start = datetime.now() - timedelta(seconds=NODE_TIMEOUT / 2)
+    for i, node_id in enumerate(node_ids):
+        model.store(node_id, 25.0, 60.0, *positions[i], start)
+
+    stop = threading.Event()
+    callback_latencies = []
+    results_lock = threading.Lock()
+
+    def reader():
+        local = []
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            model.callback()
+            local.append(time.perf_counter() - t0)
+        with results_lock:
+            callback_latencies.extend(local)
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    for t in threads:
+        t.start()
+
+    store_latencies = []
+    perf_counter = time.perf_counter
+    t_start = perf_counter()
+    sent = 0
+    while perf_counter() - t_start < seconds:
+        i = sent % nodes
+        seen = start + timedelta(seconds=sent * 0.001)
+        t0 = perf_counter()
+        model.store(node_ids[i], temps[sent % len(temps)], 60.0, *positions[i], seen)
+        store_latencies.append(perf_counter() - t0)
+        sent += 1
+        if rate:
+            ahead = t_start + sent / rate - perf_counter()
+            if ahead > 0:
+                time.sleep(ahead)
+    elapsed = perf_counter() - t_start
+
+    stop.set()
+    for t in threads:
+        t.join()
+
+    store_ms = np.array(store_latencies) * 1000
+    callback_ms = np.array(callback_latencies or [np.nan]) * 1000
+    return {
+        "model": model.name,
+        "stored": sent,
+        "store_rate": sent / elapsed,
+        "store_p50": np.percentile(store_ms, 50),
+        "store_p99": np.percentile(store_ms, 99),
+        "store_max": store_ms.max(),
+        "callbacks": len(callback_latencies),
+        "callback_p50": np.percentile(callback_ms, 50),
+        "callback_p99": np.percentile(callback_ms, 99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=50)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument(
+        "--rate", type=float, default=0, help="Pesan/detik; 0 = secepatnya"
+    )
+    args = parser.parse_args()
+
+    rate = f"{args.rate:.0f} pesan/detik" if args.rate else "secepatnya"
+    print(
+        f"Ingest {rate} selama {args.seconds:.0f} detik, {args.nodes} node, "
+        f"{args.readers} thread callback"
+    )
+    print(
+        f"{'model':<9} {'tersimpan':>9} {'pesan/s':>8} {'simpan p50 ms':>13} "
+        f"{'p99 ms':>8} {'maks ms':>8} {'callback':>8} {'cb p50 ms':>9} "
+        f"{'cb p99 ms':>9}"
+    )
+    for model_cls in (LockedModel, SnapshotModel):
+        r = run(model_cls, args.nodes, args.readers, args.seconds, args.rate)
+        print(
+            f"{r['model']:<9} {r['stored']:>9} {r['store_rate']:>8.0f} "
+            f"{r['store_p50']:>13.4f} {r['store_p99']:>8.3f} {r['store_max']:>8.2f} "
+            f"{r['callbacks']:>8} {r['callback_p50']:>9.2f} {r['callback_p99']:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
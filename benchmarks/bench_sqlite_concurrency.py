@@ -0,0 +1,247 @@
+"""
+Latensi baca SQLite saat ingest berjalan dengan laju tetap.
+
+Satu BatchWriter menulis baris sintetis dengan laju tetap, sementara beberapa
+thread pembaca menjalankan query "N menit terakhir satu node" (pola callback
+dashboard). Dua konfigurasi dibandingkan:
+
+- legacy : journal rollback default, koneksi sqlite3.connect biasa
+- wal    : connect_writer (WAL, synchronous=NORMAL) + ReaderPool read-only
+
+Sebelumnya diperiksa bahwa batch yang bertemu "database is locked" dicoba
+ulang (tidak ada baris hilang), baris yang tetap gagal dihitung per baris,
+dan satu baris yang melanggar constraint tidak ikut membuang batch-nya.
+
+    python benchmarks/bench_sqlite_concurrency.py --rate 2000 --seconds 5
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from db_writer import BatchWriter  # noqa: E402
+from storage import (  # noqa: E402
+    MULTI_NODE_COLUMNS,
+    ClimateStore,
+    ReaderPool,
+    connect_writer,
+)
+
+NODES = 50
+PRELOAD_ROWS = 200_000
+QUERY_WINDOW_S = 600
+
+
+class _PlainPool:
+    """Pembanding: koneksi biasa per thread pembaca (tanpa WAL/pragma)."""
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+        self._local = threading.local()
+
+    def connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file, timeout=30)
+            self._local.conn = conn
+        return _Borrowed(conn)
+
+
+class _Borrowed:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self.conn
+
+    def __exit__(self, *exc):
+        return False
+
+
+def prepare(db_file, mode, start_ts):
+    connect = connect_writer if mode == "wal" else sqlite3.connect
+    store = ClimateStore(db_file, "multi_node_climate", MULTI_NODE_COLUMNS)
+    conn = connect(db_file)
+    store.setup(conn)
+    rows = [
+        (f"node_{i % NODES:03d}", start_ts + i // NODES, 25.0, 60.0, 1.0, 1.0)
+        for i in range(PRELOAD_ROWS)
+    ]
+    with conn:
+        conn.executemany(store.insert_sql(start_ts), rows)
+    conn.close()
+    return store, connect
+
+
+def check_locked_retry():
+    """Batch saat database terkunci: dicoba ulang, atau dihitung sebagai baris gagal."""
+    tmp = tempfile.mkdtemp(prefix="bench_sqlite_lock_")
+    db_file = os.path.join(tmp, "lock.db")
+    store, _ = prepare(db_file, "legacy", 1_700_000_000)
+    sql = store.insert_sql(1_800_000_000)
+    rows = [
+        (f"node_{i:03d}", 1_800_000_000 + i, 25.0, 60.0, 1.0, 1.0) for i in range(50)
+    ]
+
+    def locked_write(retries, hold_s):
+        # timeout=0: lock langsung menjadi error, tidak ditunggu busy_timeout
+        writer = BatchWriter(
+            db_file,
+            connect=lambda path: sqlite3.connect(path, timeout=0),
+            retries=retries,
+            retry_backoff=0.05,
+        )
+        blocker = sqlite3.connect(
+            db_file, isolation_level=None, check_same_thread=False
+        )
+        blocker.execute("BEGIN EXCLUSIVE")
+        release = threading.Timer(hold_s, blocker.commit)
+        release.start()
+        for params in rows:
+            writer.submit(sql, params)
+        writer.flush(timeout=10)
+        writer.close()
+        release.join()
+        blocker.close()
+        return writer.stats()
+
+    stats = locked_write(retries=5, hold_s=0.2)
+    assert stats["write_retries"] > 0, stats
+    assert stats["rows_written"] == len(rows) and stats["rows_failed"] == 0, stats
+    stats = locked_write(retries=0, hold_s=0.2)
+    assert stats["rows_written"] == 0 and stats["rows_failed"] == len(rows), stats
+    print("Batch saat database terkunci: dicoba ulang tanpa kehilangan baris")
+
+
+def check_bad_row():
+    """Batch dengan satu baris NOT NULL: hanya baris itu yang gagal."""
+    tmp = tempfile.mkdtemp(prefix="bench_sqlite_bad_")
+    db_file = os.path.join(tmp, "bad.db")
+    store, _ = prepare(db_file, "wal", 1_700_000_000)
+    sql = store.insert_sql(1_800_000_000)
+    writer = BatchWriter(db_file, batch_size=100, flush_interval_ms=10_000)
+    for i in range(50):
+        writer.submit(sql, (f"node_{i:03d}", 1_800_000_000 + i, 25.0, 60.0, 1.0, 1.0))
+    writer.submit(sql, ("node_bad", 1_800_000_100, None, 60.0, 1.0, 1.0))
+    writer.flush(timeout=10)
+    writer.close()
+    stats = writer.stats()
+    assert stats["rows_written"] == 50 and stats["rows_failed"] == 1, stats
+    conn = connect_writer(db_file)
+    (count,) = conn.execute(
+        f"SELECT COUNT(*) FROM {store.table} WHERE timestamp >= 1800000000"
+    ).fetchone()
+    conn.close()
+    assert count == 50, count
+    print("Batch dengan satu baris buruk: 50 baris tersimpan, 1 gagal")
+
+
+def run(mode, rate, seconds, readers):
+    tmp = tempfile.mkdtemp(prefix="bench_sqlite_")
+    db_file = os.path.join(tmp, "bench.db")
+    start_ts = 1_700_000_000
+    store, connect = prepare(db_file, mode, start_ts)
+    now_ts = start_ts + PRELOAD_ROWS // NODES
+
+    writer = BatchWriter(db_file, connect=connect)
+    pool = ReaderPool(db_file, size=readers) if mode == "wal" else _PlainPool(db_file)
+    stop = threading.Event()
+    latencies = []
+    errors = []
+    lat_lock = threading.Lock()
+
+    def reader(idx):
+        local = []
+        i = 0
+        while not stop.is_set():
+            node = f"node_{(idx * 7 + i) % NODES:03d}"
+            i += 1
+            t0 = time.perf_counter()
+            try:
+                with pool.connection() as conn:
+                    sql, params = store.select_sql(
+                        conn,
+                        columns=("timestamp", "temperature"),
+                        node_id=node,
+                        start=now_ts - QUERY_WINDOW_S,
+                    )
+                    conn.execute(sql, params).fetchall()
+            except sqlite3.OperationalError as e:
+                errors.append(str(e))
+                continue
+            local.append((time.perf_counter() - t0) * 1000.0)
+        with lat_lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    for t in threads:
+        t.start()
+
+    sql = store.insert_sql(now_ts)
+    interval = 1.0 / rate
+    t_start = time.perf_counter()
+    sent = 0
+    while time.perf_counter() - t_start < seconds:
+        ts = now_ts + sent // NODES
+        writer.submit(sql, (f"node_{sent % NODES:03d}", ts, 25.0, 60.0, 1.0, 1.0))
+        sent += 1
+        # Jaga laju tetap (tidur hanya jika lebih cepat dari jadwal)
+        ahead = t_start + sent * interval - time.perf_counter()
+        if ahead > 0:
+            time.sleep(ahead)
+
+    stop.set()
+    for t in threads:
+        t.join()
+    writer.close()
+    stats = writer.stats()
+    if mode == "wal":
+        pool.close()
+
+    lat = np.array(latencies) if latencies else np.array([np.nan])
+    return {
+        "mode": mode,
+        "queries": len(latencies),
+        "errors": len(errors),
+        "p50": np.percentile(lat, 50),
+        "p95": np.percentile(lat, 95),
+        "p99": np.percentile(lat, 99),
+        "max": lat.max(),
+        "rows_written": stats["rows_written"],
+        "max_flush_ms": stats["max_flush_ms"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rate", type=int, default=2000, help="Baris per detik")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--readers", type=int, default=4)
+    args = parser.parse_args()
+
+    check_locked_retry()
+    check_bad_row()
+    print(
+        f"Ingest {args.rate} baris/detik selama {args.seconds:.0f} detik, "
+        f"{args.readers} thread pembaca, query {QUERY_WINDOW_S} detik terakhir"
+    )
+    for mode in ("legacy", "wal"):
+        r = run(mode, args.rate, args.seconds, args.readers)
+        print(
+            f"{r['mode']:<7}: {r['queries']:6d} query, p50 {r['p50']:6.2f} ms, "
+            f"p95 {r['p95']:6.2f} ms, p99 {r['p99']:6.2f} ms, "
+            f"maks {r['max']:7.2f} ms, error {r['errors']}, "
+            f"flush maks {r['max_flush_ms']:.1f} ms ({r['rows_written']} baris)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Broker MQTT 3.1.1 minimal (asyncio) untuk benchmark lokal.
+
+Hanya yang dibutuhkan paho dan dashboard: CONNECT, SUBSCRIBE (wildcard + dan
+#), PUBLISH QoS 0/1 (diteruskan ke subscriber sebagai QoS 0), PINGREQ,
+UNSUBSCRIBE, DISCONNECT. Tanpa retained message, session, atau autentikasi;
+bukan pengganti mosquitto, hanya agar benchmark bisa menguji jalur jaringan
+paho tanpa broker eksternal.
+
+    python benchmarks/mqtt_standin.py --port 18830
+"""
+
+import argparse
+import asyncio
+
+CONNECT, CONNACK, PUBLISH, PUBACK = 1, 2, 3, 4
+SUBSCRIBE, SUBACK, UNSUBSCRIBE, UNSUBACK = 8, 9, 10, 11
+PINGREQ, PINGRESP, DISCONNECT = 12, 13, 14
+
+
+def topic_matches(pattern, topic):
+    """Cocokkan topik dengan filter MQTT (+ satu level, # sisa level)."""
+    parts = topic.split("/")
+    for i, level in enumerate(pattern.split("/")):
+        if level == "#":
+            return True
+        if i >= len(parts) or (level != "+" and level != parts[i]):
+            return False
+    return len(pattern.split("/")) == len(parts)
+
+
+def _remaining_length(length):
+    encoded = bytearray()
+    while True:
+        byte, length = length % 128, length // 128
+        encoded.append(byte | (0x80 if length else 0))
+        if not length:
+            return bytes(encoded)
+
+
+def _string(data, offset):
+    size = int.from_bytes(data[offset : offset + 2], "big")
+    return data[offset + 2 : offset + 2 + size], offset + 2 + size
+
+
+class StandInBroker:
+    def __init__(self):
+        self._subscriptions = {}  # {writer: [filter, ...]}
+        self.published = 0
+
+    async def _read_packet(self, reader):
+        header = (await reader.readexactly(1))[0]
+        length, multiplier = 0, 1
+        while True:
+            byte = (await reader.readexactly(1))[0]
+            length += (byte & 0x7F) * multiplier
+            if not byte & 0x80:
+                break
+            multiplier *= 128
+        body = await reader.readexactly(length) if length else b""
+        return header, body
+
+    def _publish(self, topic, payload):
+        self.published += 1
+        name = topic.decode("utf-8")
+        topic_field = len(topic).to_bytes(2, "big") + topic
+        packet = (
+            bytes((PUBLISH << 4,))
+            + _remaining_length(len(topic_field) + len(payload))
+            + topic_field
+            + payload
+        )
+        for writer, filters in self._subscriptions.items():
+            if any(topic_matches(f, name) for f in filters):
+                writer.write(packet)
+
+    async def handle(self, reader, writer):
+        self._subscriptions[writer] = []
+        try:
+            while True:
+                header, body = await self._read_packet(reader)
+                kind = header >> 4
+                if kind == CONNECT:
+                    writer.write(bytes((CONNACK << 4, 2, 0, 0)))
+                elif kind == PUBLISH:
+                    qos = (header >> 1) & 3
+                    topic, offset = _string(body, 0)
+                    if qos:
+                        packet_id = body[offset : offset + 2]
+                        offset += 2
+                        writer.write(bytes((PUBACK << 4, 2)) + packet_id)
+                    self._publish(topic, body[offset:])
+                elif kind == SUBSCRIBE:
+                    packet_id, offset, granted = body[:2], 2, bytearray()
+                    while offset < len(body):
+                        topic, offset = _string(body, offset)
+                        offset += 1  # QoS yang diminta; selalu diberi QoS 0
+                        self._subscriptions[writer].append(topic.decode("utf-8"))
+                        granted.append(0)
+                    writer.write(
+                        bytes((SUBACK << 4,))
+                        + _remaining_length(2 + len(granted))
+                        + packet_id
+                        + granted
+                    )
+                elif kind == UNSUBSCRIBE:
+                    writer.write(bytes((UNSUBACK << 4, 2)) + body[:2])
+                elif kind == PINGREQ:
+                    writer.write(bytes((PINGRESP << 4, 0)))
+                elif kind == DISCONNECT:
+                    break
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._subscriptions.pop(writer, None)
+            writer.close()
+
+    async def serve(self, host, port, ready=None):
+        server = await asyncio.start_server(self.handle, host, port)
+        if ready is not None:
+            ready.set()
+        async with server:
+            await server.serve_forever()
+
+
+def run(host="127.0.0.1", port=18830, ready=None):
+    """Entry point proses broker (misal target multiprocessing.Process)."""
+    try:
+        asyncio.run(StandInBroker().serve(host, port, ready))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Broker MQTT minimal untuk benchmark.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18830)
+    args = parser.parse_args()
+    run(args.host, args.port)
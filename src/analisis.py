@@ -1,82 +1,277 @@
-import sqlite3
+"""
+Analisis data historis suhu & kelembaban.
+
+    python src/analisis.py                      # Plot interaktif seluruh data
+    python src/analisis.py --stream             # Streaming per node, memori konstan
+    python src/analisis.py --parallel --workers 4 --output-dir hasil
+    python src/analisis.py --report laporan --format png   # Headless (server/cron)
+    python src/analisis.py --columnar columnar  # Sertakan hari yang sudah diarsip
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
+from datetime import datetime
+
+from columnar_archive import load_archive
+from downsample import DEFAULT_POINTS, METHODS
+from migrate_db import store_for
+from parallel_analysis import analyze_parallel
+from report import FORMATS, generate_report, write_summary
+from rollup import RollupStore, choose_resolution
+from storage import connect_reader, connect_writer
+from stream_analysis import CHUNK_ROWS, analyze_stream
 
 DB_FILE = "climate_data.db"
 # Konfigurasi untuk Moving Average (Rata-rata Bergerak)
-MOVING_AVG_WINDOW = 12 
+MOVING_AVG_WINDOW = 12
+# Mode streaming: analisis per node dalam chunk (memori konstan), tanpa plot
+STREAMING_MODE = False
+STREAM_OUTPUT_CSV = "analisis_stream.csv"  # Hasil moving average per node
+# Kolom yang dibutuhkan plot interaktif (dibaca hanya kolom ini)
+ANALYSIS_COLUMNS = ('timestamp', 'temperature', 'humidity')
 
-try:
-    # --- 1. MEMBACA DATA DARI DATABASE ---
-    conn = sqlite3.connect(DB_FILE)
-    df = pd.read_sql_query("SELECT * FROM climate", conn, 
-                           parse_dates=['timestamp'], 
-                           index_col='timestamp')
-    print(f"Berhasil membaca {len(df)} baris data dari '{DB_FILE}'.")
-
-except Exception as e:
-    print(f"Gagal membaca database: {e}")
-    exit()
-finally:
-    if conn:
+
+def prepare_database(db_file):
+    """Migrasi skema lama dan susulkan rollup; return (store, rollups)."""
+    store = store_for(db_file, None)
+    rollups = RollupStore(store)
+    setup_conn = connect_writer(db_file)
+    try:
+        store.setup(setup_conn)  # Migrasi otomatis jika database masih skema lama
+        rollups.setup(setup_conn)
+        rollups.compact(setup_conn)  # Susulkan baris yang belum masuk rollup
+    finally:
+        setup_conn.close()
+    return store, rollups
+
+
+def print_report(summaries):
+    """Ringkasan per node: jumlah data, statistik suhu dan arah tren."""
+    for summary in summaries.values():
+        trend = "PENINGKATAN" if summary.slope > 0 else "PENURUNAN" if summary.slope < 0 else "STABIL"
+        print(f"[{summary.node_id}] {summary.rows} baris, suhu rata-rata "
+              f"{summary.temperature_mean:.2f}°C (min {summary.temperature_min:.1f}, "
+              f"maks {summary.temperature_max:.1f}), slope {summary.slope:.6f} -> {trend}")
+
+
+def run_streaming(db_file, store, window=MOVING_AVG_WINDOW, output_csv=STREAM_OUTPUT_CSV,
+                  columnar_dir=None):
+    """Analisis per node dari cursor berurutan (node_id, timestamp)."""
+    conn = connect_reader(db_file)
+    try:
+        with open(output_csv, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['node_id', 'timestamp', 'temperature', 'smoothed_temperature'])
+
+            def write_chunk(node_id, timestamps, temperature, smoothed):
+                writer.writerows(zip([node_id] * len(timestamps), timestamps.astype(int),
+                                     temperature, smoothed))
+
+            summaries = analyze_stream(conn, store, window=window,
+                                       chunk_rows=CHUNK_ROWS, on_chunk=write_chunk,
+                                       columnar_dir=columnar_dir)
+    finally:
         conn.close()
 
-if df.empty:
-    print("Tidak ada data untuk dianalisis.")
-    exit()
-
-# --- 2. PERHITUNGAN ANALISIS ---
-# Menghitung Suhu Mulus (Moving Average)
-df['smoothed_temperature'] = df['temperature'].rolling(window=MOVING_AVG_WINDOW).mean()
-
-# Menghitung Garis Tren (Linear Regression)
-x_numeric = (df.index - df.index[0]).total_seconds().values
-y_values = df['temperature'].values
-slope, intercept = np.polyfit(x_numeric, y_values, 1)
-df['trend_line'] = slope * x_numeric + intercept
-
-# --- 3. VISUALISASI DATA (DALAM SATU JENDELA) ---
-
-# Buat satu Figure (jendela) yang berisi 2 subplot (area plot)
-# nrows=2, ncols=1 berarti 2 baris, 1 kolom
-# figsize=(15, 10) membuat jendela lebih tinggi untuk mengakomodasi 2 plot
-# sharex=True adalah kunci untuk membuat zoom/pan terhubung
-fig, (ax1, ax2) = plt.subplots(nrows=2, ncols=1, figsize=(15, 10), sharex=True)
-
-# Mengatur judul utama untuk keseluruhan jendela
-fig.suptitle('Analisis Data Historis Suhu & Kelembaban', fontsize=16)
-
-# a) Plot Pertama (Atas): Data Mentah
-ax1.plot(df.index, df['temperature'], label='Suhu (Mentah)', color='red', alpha=0.7)
-ax1.plot(df.index, df['humidity'], label='Kelembaban (Mentah)', color='blue', alpha=0.7)
-ax1.set_title('Data Sensor Mentah')
-ax1.set_ylabel('Nilai')
-ax1.legend()
-ax1.grid(True)
-# Label sumbu-x di plot atas otomatis disembunyikan karena sharex=True
-
-# b) Plot Kedua (Bawah): Analisis Suhu
-ax2.plot(df.index, df['temperature'], label='Suhu (Mentah)', color='gray', linestyle=':', alpha=0.5)
-ax2.plot(df.index, df['smoothed_temperature'], label=f'Suhu Mulus (Moving Avg)', color='green', linewidth=2.5)
-ax2.plot(df.index, df['trend_line'], label='Garis Tren Jangka Panjang', color='yellow', linestyle='--', linewidth=2.5)
-ax2.set_title('Analisis Tren Suhu')
-ax2.set_xlabel('Waktu')
-ax2.set_ylabel('Suhu (°C)')
-ax2.legend()
-ax2.grid(True)
-
-# Merapikan layout agar tidak ada yang tumpang tindih
-fig.tight_layout(rect=[0, 0.03, 1, 0.95]) # rect menyesuaikan posisi agar suptitle tidak tumpang tindih
-
-# Tampilkan plot
-plt.show()
-
-print("\n--- Analisis Selesai ---")
-print(f"Kemiringan (Slope) Garis Tren: {slope:.6f}")
-if slope > 0:
-    print("Interpretasi: Secara umum, tren suhu menunjukkan PENINGKATAN.")
-elif slope < 0:
-    print("Interpretasi: Secara umum, tren suhu menunjukkan PENURUNAN.")
-else:
-    print("Interpretasi: Secara umum, tren suhu STABIL.")
\ No newline at end of file
+    print(f"Moving average per node ditulis ke '{output_csv}'.")
+    print_report(summaries)
+    return summaries
+
+
+def run_parallel(db_file, store, args):
+    """Analisis per node di beberapa proses, lalu gabungkan laporannya."""
+    start = time.perf_counter()
+    summaries = analyze_parallel(db_file, store, workers=args.workers,
+                                 segments=args.segments, window=args.window,
+                                 output_dir=args.output_dir, columnar_dir=args.columnar)
+    elapsed = time.perf_counter() - start
+    print(f"{len(summaries)} node dianalisis dalam {elapsed:.2f} detik "
+          f"({args.workers or os.cpu_count()} worker).")
+    print_report(summaries)
+    if args.output_dir:
+        write_summary(summaries, args.output_dir)
+        print(f"Moving average per node dan summary.csv/json ditulis ke '{args.output_dir}'.")
+    return summaries
+
+
+def run_report(db_file, store, args):
+    """Laporan headless: figure per node (atau facet) + summary.csv/json."""
+    start = time.perf_counter()
+    summaries, files = generate_report(db_file, store, args.report, fmt=args.format,
+                                       facet=args.facet, workers=args.workers,
+                                       window=args.window, points=args.points,
+                                       method=args.method, columnar_dir=args.columnar)
+    elapsed = time.perf_counter() - start
+    print_report(summaries)
+    print(f"{len(files)} figure dan summary.csv/json ditulis ke '{args.report}' "
+          f"dalam {elapsed:.2f} detik.")
+    return summaries
+
+
+def load_dataframe(db_file, store, rollups, columnar_dir=None):
+    """
+    Baca seluruh data (atau rollup untuk rentang panjang) ke satu DataFrame.
+
+    Jika columnar_dir diberikan, hari yang sudah dipindah ke arsip kolumnar
+    ikut dibaca (memory map, hanya kolom ANALYSIS_COLUMNS).
+    """
+    # Baca lewat koneksi read-only agar tidak menahan writer dashboard
+    conn = connect_reader(db_file)
+    try:
+        summary = rollups.summary(conn)
+        resolution = None
+        if summary:
+            first, last, rows_per_node = summary
+            resolution = choose_resolution(first, last, raw_points=rows_per_node)
+        if resolution is None:
+            sql, params = store.select_sql(conn, columns=ANALYSIS_COLUMNS, order_by="timestamp")
+            df = pd.read_sql_query(sql, conn, params=params)
+            archived = load_archive(columnar_dir, store.table, columns=ANALYSIS_COLUMNS) if columnar_dir else None
+            if archived is not None:
+                print(f"{archived.num_rows} baris dibaca dari arsip kolumnar '{columnar_dir}'.")
+                df = (pd.concat([archived.to_pandas(), df], ignore_index=True)
+                      .sort_values('timestamp', kind='stable', ignore_index=True))
+        else:
+            # Rentang panjang: baca rollup, gabungkan semua node per bucket
+            sql, params = rollups.select_sql(resolution, order_by="bucket")
+            sums = ['temperature_sum', 'temperature_count', 'humidity_sum', 'humidity_count']
+            buckets = pd.read_sql_query(sql, conn, params=params).groupby('bucket')[sums].sum()
+            df = pd.DataFrame({
+                'timestamp': buckets.index,
+                'temperature': buckets['temperature_sum'] / buckets['temperature_count'],
+                'humidity': buckets['humidity_sum'] / buckets['humidity_count'],
+                'count': buckets['temperature_count'],
+            })
+            print(f"Rentang data panjang, memakai rollup resolusi {resolution}.")
+    finally:
+        conn.close()
+    # Timestamp disimpan sebagai epoch UTC; tampilkan dalam waktu lokal
+    local_tz = datetime.now().astimezone().tzinfo
+    df['timestamp'] = (pd.to_datetime(df['timestamp'], unit='s', utc=True)
+                       .dt.tz_convert(local_tz).dt.tz_localize(None))
+    return df.set_index('timestamp')
+
+
+def run_interactive(df, window=MOVING_AVG_WINDOW):
+    """Analisis in-memory lalu tampilkan plot dalam satu jendela."""
+    # --- 2. PERHITUNGAN ANALISIS ---
+    # Menghitung Suhu Mulus (Moving Average)
+    df['smoothed_temperature'] = df['temperature'].rolling(window=window).mean()
+
+    # Menghitung Garis Tren (Linear Regression)
+    x_numeric = (df.index - df.index[0]).total_seconds().values
+    y_values = df['temperature'].values
+    # Titik rollup diberi bobot jumlah sampel agar setara dengan regresi data mentah
+    weights = np.sqrt(df['count'].values) if 'count' in df else None
+    slope, intercept = np.polyfit(x_numeric, y_values, 1, w=weights)
+    df['trend_line'] = slope * x_numeric + intercept
+
+    # --- 3. VISUALISASI DATA (DALAM SATU JENDELA) ---
+
+    # Buat satu Figure (jendela) yang berisi 2 subplot (area plot)
+    # nrows=2, ncols=1 berarti 2 baris, 1 kolom
+    # figsize=(15, 10) membuat jendela lebih tinggi untuk mengakomodasi 2 plot
+    # sharex=True adalah kunci untuk membuat zoom/pan terhubung
+    fig, (ax1, ax2) = plt.subplots(nrows=2, ncols=1, figsize=(15, 10), sharex=True)
+
+    # Mengatur judul utama untuk keseluruhan jendela
+    fig.suptitle('Analisis Data Historis Suhu & Kelembaban', fontsize=16)
+
+    # a) Plot Pertama (Atas): Data Mentah
+    ax1.plot(df.index, df['temperature'], label='Suhu (Mentah)', color='red', alpha=0.7)
+    ax1.plot(df.index, df['humidity'], label='Kelembaban (Mentah)', color='blue', alpha=0.7)
+    ax1.set_title('Data Sensor Mentah')
+    ax1.set_ylabel('Nilai')
+    ax1.legend()
+    ax1.grid(True)
+    # Label sumbu-x di plot atas otomatis disembunyikan karena sharex=True
+
+    # b) Plot Kedua (Bawah): Analisis Suhu
+    ax2.plot(df.index, df['temperature'], label='Suhu (Mentah)', color='gray', linestyle=':', alpha=0.5)
+    ax2.plot(df.index, df['smoothed_temperature'], label=f'Suhu Mulus (Moving Avg)', color='green', linewidth=2.5)
+    ax2.plot(df.index, df['trend_line'], label='Garis Tren Jangka Panjang', color='yellow', linestyle='--', linewidth=2.5)
+    ax2.set_title('Analisis Tren Suhu')
+    ax2.set_xlabel('Waktu')
+    ax2.set_ylabel('Suhu (°C)')
+    ax2.legend()
+    ax2.grid(True)
+
+    # Merapikan layout agar tidak ada yang tumpang tindih
+    fig.tight_layout(rect=[0, 0.03, 1, 0.95]) # rect menyesuaikan posisi agar suptitle tidak tumpang tindih
+
+    # Tampilkan plot
+    plt.show()
+
+    print("\n--- Analisis Selesai ---")
+    print(f"Kemiringan (Slope) Garis Tren: {slope:.6f}")
+    if slope > 0:
+        print("Interpretasi: Secara umum, tren suhu menunjukkan PENINGKATAN.")
+    elif slope < 0:
+        print("Interpretasi: Secara umum, tren suhu menunjukkan PENURUNAN.")
+    else:
+        print("Interpretasi: Secara umum, tren suhu STABIL.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analisis data historis suhu & kelembaban.")
+    parser.add_argument('--db', default=DB_FILE, help=f"File database (default: {DB_FILE}).")
+    parser.add_argument('--window', type=int, default=MOVING_AVG_WINDOW,
+                        help="Jendela moving average (jumlah titik).")
+    parser.add_argument('--stream', action='store_true', default=STREAMING_MODE,
+                        help="Analisis per node dalam chunk (memori konstan), tanpa plot.")
+    parser.add_argument('--parallel', action='store_true',
+                        help="Analisis per node di beberapa proses (ProcessPoolExecutor).")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Jumlah proses worker (default: jumlah CPU).")
+    parser.add_argument('--segments', type=int, default=1,
+                        help="Pecah deret setiap node menjadi N potongan waktu.")
+    parser.add_argument('--output-dir', help="Folder untuk CSV moving average per node dan summary.")
+    parser.add_argument('--report', metavar='FOLDER',
+                        help="Mode laporan headless: tulis figure + summary ke folder ini.")
+    parser.add_argument('--format', choices=FORMATS, default='png', help="Format figure laporan.")
+    parser.add_argument('--facet', action='store_true',
+                        help="Satu figure berisi semua node (bukan satu file per node).")
+    parser.add_argument('--points', type=int, default=DEFAULT_POINTS,
+                        help="Titik maksimal per deret setelah downsampling.")
+    parser.add_argument('--method', choices=sorted(METHODS), default='lttb',
+                        help="Metode downsampling untuk laporan.")
+    parser.add_argument('--columnar', metavar='FOLDER',
+                        help="Folder arsip kolumnar (migrate_db.py --columnar-dir) yang ikut "
+                             "dibaca (semua mode).")
+    args = parser.parse_args(argv)
+
+    # --- 1. MEMBACA DATA DARI DATABASE ---
+    try:
+        store, rollups = prepare_database(args.db)
+        if args.report:
+            run_report(args.db, store, args)
+            return 0
+        if args.parallel:
+            run_parallel(args.db, store, args)
+            return 0
+        if args.stream:
+            run_streaming(args.db, store, args.window, columnar_dir=args.columnar)
+            return 0
+        df = load_dataframe(args.db, store, rollups, args.columnar)
+        print(f"Berhasil membaca {len(df)} baris data dari '{args.db}'.")
+    except Exception as e:
+        print(f"Gagal membaca database: {e}")
+        return 1
+
+    if df.empty:
+        print("Tidak ada data untuk dianalisis.")
+        return 1
+
+    run_interactive(df, args.window)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,291 @@
+"""
+Arsip kolumnar (Parquet / Arrow IPC) untuk data sensor yang sudah "dingin".
+
+Hari yang sudah ditutup (sebelum batas tertentu, UTC) dipindah dari tabel
+SQLite ke file per node per hari:
+
+    <arsip>/<tabel>/node_id=<node>/date=<YYYY-MM-DD>/part-<n>.parquet|.arrow
+
+Parquet dikompresi zstd (kecil, cocok untuk disimpan lama); Arrow IPC
+disimpan tanpa kompresi agar bisa dibaca zero-copy lewat memory map. Saat
+dibaca hanya kolom yang diminta yang di-load, dan folder node/tanggal di luar
+filter dilewati tanpa membuka file.
+
+pyarrow adalah dependensi opsional; modul ini tetap bisa di-import tanpa
+pyarrow, tetapi fungsi arsip akan melempar ImportError yang jelas.
+"""
+
+import calendar
+import os
+import re
+import time
+
+from log_setup import get_logger
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - tergantung environment
+    pa = None
+
+logger = get_logger("columnar_archive")
+
+FORMAT_EXTENSIONS = {"parquet": ".parquet", "arrow": ".arrow"}
+PARQUET_COMPRESSION = "zstd"
+DAY_SECONDS = 86400
+
+_NODE_DIR = re.compile(r"^node_id=(.+)$")
+_DATE_DIR = re.compile(r"^date=(\d{4}-\d{2}-\d{2})$")
+_PART_INDEX = re.compile(r"^part-(\d+)\.")
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("Arsip kolumnar membutuhkan pyarrow (pip install pyarrow)")
+
+
+def _day_start(epoch):
+    return int(epoch) // DAY_SECONDS * DAY_SECONDS
+
+
+def _date_key(epoch):
+    return time.strftime("%Y-%m-%d", time.gmtime(epoch))
+
+
+def key_to_epoch(key):
+    """Kunci 'YYYYMMDD' atau 'YYYYMM' (UTC) -> epoch awal hari/bulan itu."""
+    fmt = {8: "%Y%m%d", 6: "%Y%m"}.get(len(key))
+    if fmt is None:
+        raise ValueError(f"Kunci tanggal tidak valid: {key!r}")
+    return calendar.timegm(time.strptime(key, fmt))
+
+
+def _schema(store):
+    _require_pyarrow()
+    fields = [pa.field("timestamp", pa.int64())]
+    fields += [pa.field(name, pa.float64()) for name, _ in store.columns]
+    return pa.schema(fields)
+
+
+def _write_file(table, directory, fmt):
+    """Tulis satu file part baru (tidak menimpa part yang sudah ada)."""
+    os.makedirs(directory, exist_ok=True)
+    extension = FORMAT_EXTENSIONS[fmt]
+    index = sum(1 for name in os.listdir(directory) if name.endswith(extension))
+    path = os.path.join(directory, f"part-{index}{extension}")
+    tmp_path = f"{path}.tmp"
+    if fmt == "parquet":
+        pq.write_table(table, tmp_path, compression=PARQUET_COMPRESSION)
+    else:
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    os.replace(tmp_path, path)  # File setengah jadi tidak pernah terbaca
+    return path
+
+
+def archive_closed_days(conn, store, archive_dir, before, fmt="parquet"):
+    """
+    Pindahkan semua baris dengan timestamp < before (dibulatkan ke awal hari
+    UTC) ke file kolumnar, lalu hapus dari SQLite. Hari yang sedang berjalan
+    tidak pernah diarsip, dan rollup sebaiknya sudah di-compact lebih dulu
+    karena baris yang diarsip tidak lagi ada di SQLite.
+
+    Tabel partisi yang seluruhnya sudah diarsip di-DROP; tabel tanpa partisi
+    di-DELETE. Return jumlah baris yang diarsip.
+    """
+    _require_pyarrow()
+    if fmt not in FORMAT_EXTENSIONS:
+        raise ValueError(f"Format arsip tidak dikenal: {fmt!r}")
+    # Hanya hari yang sudah ditutup; hari ini masih menerima data
+    before = min(_day_start(before), _day_start(time.time()))
+    schema = _schema(store)
+    value_names = schema.names
+    base_dir = os.path.join(archive_dir, store.table)
+
+    # Node dan rentang harinya, hanya untuk data yang sudah ditutup
+    ranges = {}
+    for table in store.data_tables(conn):
+        for node_id, first, last in conn.execute(
+            f"SELECT node_id, MIN(timestamp), MAX(timestamp) FROM {table} "
+            "WHERE timestamp < ? GROUP BY node_id",
+            (before,),
+        ):
+            lo, hi = ranges.get(node_id, (first, last))
+            ranges[node_id] = (min(lo, first), max(hi, last))
+
+    archived = 0
+    for node_id, (first, last) in sorted(ranges.items()):
+        for day in range(_day_start(first), _day_start(last) + 1, DAY_SECONDS):
+            sql, params = store.select_sql(
+                conn,
+                columns=value_names,
+                node_id=node_id,
+                start=day,
+                end=day + DAY_SECONDS,
+                order_by="timestamp",
+            )
+            rows = conn.execute(sql, params).fetchall()
+            if not rows:
+                continue
+            columns = list(zip(*rows))
+            table = pa.Table.from_arrays(
+                [pa.array(col, type=f.type) for col, f in zip(columns, schema)],
+                schema=schema,
+            )
+            directory = os.path.join(
+                base_dir, f"node_id={node_id}", f"date={_date_key(day)}"
+            )
+            _write_file(table, directory, fmt)
+            archived += len(rows)
+
+    # Baru hapus dari SQLite setelah semua file selesai ditulis
+    with conn:
+        for table in store.data_tables(conn):
+            (newest,) = conn.execute(f"SELECT MAX(timestamp) FROM {table}").fetchone()
+            if table != store.table and newest is not None and newest < before:
+                conn.execute(f"DROP TABLE {table}")
+                store._known_tables.discard(table)
+            else:
+                conn.execute(f"DELETE FROM {table} WHERE timestamp < ?", (before,))
+    logger.info(
+        "%d baris %s sebelum %s diarsip ke %s",
+        archived,
+        store.table,
+        _date_key(before),
+        base_dir,
+    )
+    return archived
+
+
+def archive_files(archive_dir, table, node_ids=None, start=None, end=None):
+    """[(node_id, path)] file arsip yang mungkin berisi data dalam filter."""
+    base_dir = os.path.join(archive_dir, table)
+    if not os.path.isdir(base_dir):
+        return []
+    start_key = _date_key(_day_start(start)) if start is not None else None
+    end_key = _date_key(end - 1) if end is not None else None
+    wanted = set(node_ids) if node_ids is not None else None
+
+    files = []
+    for node_dir in sorted(os.listdir(base_dir)):
+        match = _NODE_DIR.match(node_dir)
+        if not match or (wanted is not None and match.group(1) not in wanted):
+            continue
+        for date_dir in sorted(os.listdir(os.path.join(base_dir, node_dir))):
+            date = _DATE_DIR.match(date_dir)
+            if not date:
+                continue
+            key = date.group(1)
+            if (start_key and key < start_key) or (end_key and key > end_key):
+                continue
+            directory = os.path.join(base_dir, node_dir, date_dir)
+            names = [
+                name
+                for name in os.listdir(directory)
+                if name.endswith(tuple(FORMAT_EXTENSIONS.values()))
+            ]
+            # Urut menurut nomor part (part-10 setelah part-2)
+            for name in sorted(names, key=_part_order):
+                files.append((match.group(1), os.path.join(directory, name)))
+    return files
+
+
+def _part_order(name):
+    match = _PART_INDEX.match(name)
+    return (int(match.group(1)) if match else -1, name)
+
+
+def archive_ranges(archive_dir, table):
+    """
+    {node_id: (awal, akhir)} epoch dari folder tanggal arsip, tanpa membuka
+    file. Rentangnya per hari penuh (awal hari pertama, detik terakhir hari
+    terakhir), jadi bisa sedikit lebih lebar dari data sebenarnya.
+    """
+    ranges = {}
+    for node_id, path in archive_files(archive_dir, table):
+        date = _DATE_DIR.match(os.path.basename(os.path.dirname(path))).group(1)
+        day = calendar.timegm(time.strptime(date, "%Y-%m-%d"))
+        first, last = ranges.get(node_id, (day, day + DAY_SECONDS - 1))
+        ranges[node_id] = (min(first, day), max(last, day + DAY_SECONDS - 1))
+    return ranges
+
+
+def _read_file(path, columns):
+    if path.endswith(FORMAT_EXTENSIONS["parquet"]):
+        return pq.read_table(path, columns=columns, memory_map=True)
+    # Arrow IPC tanpa kompresi: buffer kolom langsung menunjuk ke memory map
+    reader = pa.ipc.open_file(pa.memory_map(path, "r"))
+    table = reader.read_all()
+    return table.select(columns) if columns is not None else table
+
+
+def iter_archive(archive_dir, table, columns=None, node_ids=None, start=None, end=None):
+    """
+    Yield (node_id, pyarrow.Table) per file arsip, urut node lalu tanggal.
+
+    Hanya kolom yang diminta yang dibaca; filter waktu start/end (epoch)
+    memangkas folder tanggal lalu baris di tepi rentang. Dipakai untuk
+    membaca arsip sepotong demi sepotong (mode streaming/paralel).
+    """
+    _require_pyarrow()
+    columns = list(columns) if columns is not None else None
+    file_columns = None
+    if columns is not None:
+        file_columns = [c for c in columns if c != "node_id"]
+        if (start is not None or end is not None) and "timestamp" not in file_columns:
+            file_columns.append("timestamp")
+
+    for node_id, path in archive_files(archive_dir, table, node_ids, start, end):
+        part = _read_file(path, file_columns)
+        if start is not None or end is not None:
+            mask = None
+            if start is not None:
+                mask = pc.greater_equal(part["timestamp"], start)
+            if end is not None:
+                upper = pc.less(part["timestamp"], end)
+                mask = upper if mask is None else pc.and_(mask, upper)
+            part = part.filter(mask)
+        if columns is None or "node_id" in columns:
+            part = part.append_column(
+                "node_id",
+                pa.DictionaryArray.from_arrays(
+                    pa.array([0] * len(part), pa.int32()), pa.array([node_id])
+                ),
+            )
+        if columns is not None:
+            part = part.select(columns)
+        yield node_id, part
+
+
+def load_archive(archive_dir, table, columns=None, node_ids=None, start=None, end=None):
+    """
+    Baca arsip sebagai satu pyarrow.Table, hanya kolom yang diminta.
+
+    columns boleh memuat "node_id" (diambil dari nama folder). Filter waktu
+    start/end (epoch) memangkas folder tanggal lalu baris di tepi rentang.
+    """
+    tables = [
+        part
+        for _, part in iter_archive(archive_dir, table, columns, node_ids, start, end)
+    ]
+    if not tables:
+        return None
+    return pa.concat_tables(tables, promote_options="permissive")
+
+
+def archive_tail(archive_dir, table, node_id, column, before, count):
+    """count nilai terakhir kolom node sebelum epoch `before`, urut naik."""
+    _require_pyarrow()
+    files = archive_files(archive_dir, table, [node_id], end=before)
+    values = []
+    # Dari file terbaru ke belakang, berhenti begitu count nilai terkumpul
+    for _, path in reversed(files):
+        part = _read_file(path, ["timestamp", column])
+        part = part.filter(pc.less(part["timestamp"], before))
+        values[:0] = part[column].to_pylist()
+        if len(values) >= count:
+            break
+    return values[-count:] if count else []
@@ -0,0 +1,296 @@
+import queue
+import sqlite3
+import threading
+import time
+
+from log_setup import get_logger
+from metrics import ROWS_PERSISTED, SQLITE_WRITE_SECONDS
+from storage import connect_writer
+
+logger = get_logger("db_writer")
+
+# --- KONFIGURASI DEFAULT WRITER ---
+BATCH_SIZE = 200  # Flush setelah sekian baris terkumpul
+FLUSH_INTERVAL_MS = 500  # ...atau setelah sekian milidetik sejak baris pertama
+QUEUE_MAXSIZE = 10000  # Batas antrean agar memori tidak tumbuh tanpa batas
+PUT_TIMEOUT = 0.05  # Detik maksimal thread MQTT menunggu jika antrean penuh
+WRITE_RETRIES = 5  # Percobaan ulang batch saat database sementara terkunci
+RETRY_BACKOFF = 0.1  # Detik tunggu percobaan ulang pertama, lalu dikali dua
+
+# Kode error SQLite (primary) yang bersifat sementara: SQLITE_BUSY, SQLITE_LOCKED
+_TRANSIENT_CODES = (5, 6)
+
+_STOP = object()
+
+
+def is_transient(error):
+    """True untuk OperationalError "database is locked/busy" yang layak dicoba ulang."""
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    code = getattr(error, "sqlite_errorcode", None)
+    if code is not None:
+        return code & 0xFF in _TRANSIENT_CODES
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+
+class BatchWriter:
+    """
+    Thread writer khusus untuk SQLite.
+
+    Thread MQTT hanya memasukkan (sql, params) ke antrean; thread ini yang
+    mengumpulkan baris dan menyimpannya dengan executemany di dalam satu
+    transaksi per BATCH_SIZE baris atau per FLUSH_INTERVAL_MS, sehingga
+    hanya ada satu commit (fsync) per batch, bukan per pesan.
+
+    Batch yang gagal karena database sementara terkunci dicoba ulang dengan
+    backoff (transaksi sudah di-rollback, jadi tidak ada baris ganda). Jika
+    gagal karena error lain, baris disimpan ulang satu per satu sehingga
+    hanya baris yang benar-benar gagal yang dihitung di rows_failed.
+    """
+
+    def __init__(
+        self,
+        db_file,
+        batch_size=BATCH_SIZE,
+        flush_interval_ms=FLUSH_INTERVAL_MS,
+        maxsize=QUEUE_MAXSIZE,
+        connect=connect_writer,
+        retries=WRITE_RETRIES,
+        retry_backoff=RETRY_BACKOFF,
+    ):
+        self.db_file = db_file
+        self._connect = connect
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._stats_lock = threading.Lock()
+        self._closed = False
+
+        # Statistik untuk monitoring
+        self.rows_written = 0
+        self.batches_written = 0
+        self.rows_dropped = 0  # Antrean penuh
+        self.rows_failed = 0  # Gagal disimpan setelah semua percobaan ulang
+        self.write_retries = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+
+        self._thread = threading.Thread(
+            target=self._run, name="sqlite-batch-writer", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, sql, params, node_id=None):
+        """
+        Masukkan satu baris ke antrean. Return False jika data terpaksa dibuang.
+
+        node_id diisi untuk baris pembacaan sensor, supaya ikut dihitung di
+        metrik monitoring_rows_persisted_total setelah di-commit.
+        """
+        if self._closed:
+            return False
+        try:
+            self._queue.put((sql, params, node_id), timeout=PUT_TIMEOUT)
+            return True
+        except queue.Full:
+            with self._stats_lock:
+                self.rows_dropped += 1
+            return False
+
+    def flush(self, timeout=None):
+        """Paksa flush semua baris yang sudah diantrekan dan tunggu sampai selesai."""
+        if self._closed:
+            return False
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout=10.0):
+        """Flush sisa antrean lalu hentikan thread writer."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        stats = self.stats()
+        logger.info(
+            "Writer SQLite ditutup: %d baris dalam %d batch, %d dibuang, "
+            "%d gagal disimpan, flush maks %.1f ms",
+            stats["rows_written"],
+            stats["batches_written"],
+            stats["rows_dropped"],
+            stats["rows_failed"],
+            stats["max_flush_ms"],
+        )
+
+    def stats(self):
+        """Ringkasan kondisi writer: kedalaman antrean dan latensi flush."""
+        with self._stats_lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "queue_maxsize": self._queue.maxsize,
+                "rows_written": self.rows_written,
+                "batches_written": self.batches_written,
+                "rows_dropped": self.rows_dropped,
+                "rows_failed": self.rows_failed,
+                "write_retries": self.write_retries,
+                "last_flush_ms": self.last_flush_ms,
+                "max_flush_ms": self.max_flush_ms,
+            }
+
+    def _run(self):
+        conn = self._connect(self.db_file)
+        pending = []
+        waiters = []
+        deadline = None
+
+        try:
+            while True:
+                timeout = None
+                if pending:
+                    timeout = max(0.0, deadline - time.monotonic())
+
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = None
+
+                stop = item is _STOP
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                elif item is not None and not stop:
+                    if not pending:
+                        deadline = time.monotonic() + self.flush_interval
+                    pending.append(item)
+
+                    # Ambil sisa antrean yang sudah siap tanpa menunggu
+                    while len(pending) < self.batch_size:
+                        try:
+                            extra = self._queue.get_nowait()
+                        except queue.Empty:
+                            break
+                        if extra is _STOP:
+                            stop = True
+                            break
+                        if isinstance(extra, threading.Event):
+                            waiters.append(extra)
+                            break
+                        pending.append(extra)
+
+                if pending and (
+                    stop
+                    or waiters
+                    or len(pending) >= self.batch_size
+                    or time.monotonic() >= deadline
+                ):
+                    self._write_batch(conn, pending)
+                    pending = []
+
+                for waiter in waiters:
+                    waiter.set()
+                waiters = []
+
+                if stop:
+                    break
+        finally:
+            conn.close()
+
+    def _execute(self, conn, grouped, count):
+        """
+        Jalankan grouped {sql: [params]} dalam satu transaksi (satu commit).
+
+        Dicoba ulang dengan backoff selama error bersifat sementara; error
+        lain (atau percobaan habis) diteruskan ke pemanggil. Transaksi yang
+        gagal sudah di-rollback. Return (start, inserted, end) perf_counter.
+        """
+        delay = self.retry_backoff
+        for attempt in range(self.retries + 1):
+            start = time.perf_counter()
+            try:
+                with conn:
+                    for sql, params_list in grouped.items():
+                        conn.executemany(sql, params_list)
+                    inserted = time.perf_counter()
+                return start, inserted, time.perf_counter()
+            except sqlite3.Error as e:
+                if attempt >= self.retries or not is_transient(e):
+                    raise
+                logger.warning(
+                    "Batch (%d baris) gagal: %s; dicoba ulang dalam %.2f s",
+                    count,
+                    e,
+                    delay,
+                )
+                with self._stats_lock:
+                    self.write_retries += 1
+                time.sleep(delay)
+                delay *= 2
+
+    def _write_batch(self, conn, rows):
+        # Kelompokkan per statement, urutan baris dalam statement tetap terjaga
+        grouped = {}
+        persisted = {}
+        for sql, params, node_id in rows:
+            grouped.setdefault(sql, []).append(params)
+            if node_id is not None:
+                persisted[node_id] = persisted.get(node_id, 0) + 1
+
+        try:
+            start, inserted, end = self._execute(conn, grouped, len(rows))
+        except sqlite3.Error as e:
+            if is_transient(e) or len(rows) == 1:
+                logger.error("Error menyimpan batch (%d baris): %s", len(rows), e)
+                with self._stats_lock:
+                    self.rows_failed += len(rows)
+                return
+            # Satu baris buruk (misal IntegrityError) tidak boleh membuang batch
+            logger.warning(
+                "Batch (%d baris) gagal: %s; disimpan ulang per baris", len(rows), e
+            )
+            self._write_rows(conn, rows)
+            return
+        elapsed_ms = (end - start) * 1000.0
+        SQLITE_WRITE_SECONDS.labels("insert").observe(inserted - start)
+        SQLITE_WRITE_SECONDS.labels("commit").observe(end - inserted)
+        for node_id, count in persisted.items():
+            ROWS_PERSISTED.labels(node_id).inc(count)
+
+        with self._stats_lock:
+            self.rows_written += len(rows)
+            self.batches_written += 1
+            self.last_flush_ms = elapsed_ms
+            self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+
+    def _write_rows(self, conn, rows):
+        """Simpan baris satu per satu; hanya baris yang gagal dihitung rows_failed."""
+        start = time.perf_counter()
+        written = 0
+        failed = 0
+        for i, (sql, params, node_id) in enumerate(rows):
+            try:
+                self._execute(conn, {sql: [params]}, 1)
+            except sqlite3.Error as e:
+                if is_transient(e):
+                    # Database tetap terkunci: sisa baris tidak perlu dicoba lagi
+                    logger.error("Error menyimpan %d baris: %s", len(rows) - i, e)
+                    failed += len(rows) - i
+                    break
+                logger.error(
+                    "Baris gagal disimpan: %s %r", e, params, extra={"node_id": node_id}
+                )
+                failed += 1
+                continue
+            written += 1
+            if node_id is not None:
+                ROWS_PERSISTED.labels(node_id).inc()
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+
+        with self._stats_lock:
+            self.rows_written += written
+            self.rows_failed += failed
+            self.batches_written += 1
+            self.last_flush_ms = elapsed_ms
+            self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
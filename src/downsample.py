@@ -0,0 +1,80 @@
+"""
+Downsampling deret waktu sebelum dikirim ke Plotly.
+
+Grafik selebar ~1000 piksel tidak butuh ratusan ribu titik. lttb() memilih
+titik yang paling menjaga bentuk kurva (Largest-Triangle-Three-Buckets),
+minmax_decimate() menyimpan nilai minimum dan maksimum setiap bucket sehingga
+puncak/lembah tidak pernah hilang.
+"""
+
+import numpy as np
+
+DEFAULT_POINTS = 1000  # Kira-kira satu titik per piksel lebar grafik
+
+
+def lttb(x, y, n_out=DEFAULT_POINTS):
+    """
+    Largest-Triangle-Three-Buckets: turunkan (x, y) menjadi n_out titik.
+
+    Titik pertama dan terakhir selalu dipertahankan; dari setiap bucket di
+    antaranya dipilih titik yang membentuk segitiga terbesar dengan titik
+    terpilih sebelumnya dan rata-rata bucket berikutnya. x harus terurut.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return x, y
+
+    # Batas bucket titik 1..n-2; batas terakhir (n-1, n) adalah titik terakhir
+    every = (n - 2) / (n_out - 2)
+    edges = (np.arange(n_out - 1) * every).astype(np.int64) + 1
+    edges[-1] = n - 1
+    edges = np.append(edges, n)
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end, next_end = edges[i], edges[i + 1], edges[i + 2]
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        # Dua kali luas segitiga (a, kandidat, rata-rata bucket berikutnya)
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(area.argmax())
+        selected[i + 1] = a
+    return x[selected], y[selected]
+
+
+def minmax_decimate(x, y, n_out=DEFAULT_POINTS):
+    """
+    Decimation min/max: dari setiap bucket ambil titik minimum dan maksimum.
+
+    Menghasilkan paling banyak n_out titik, urut menurut x.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    buckets = n_out // 2
+    if n <= n_out or buckets < 1:
+        return x, y
+
+    # Bucket berukuran sama (bucket terakhir diisi NaN), argmin/argmax per baris
+    size = -(-n // buckets)
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    padded = padded.reshape(buckets, size)
+    filled = ~np.isnan(padded).all(axis=1)
+    offsets = np.arange(buckets)[filled] * size
+    lo = offsets + np.nanargmin(padded[filled], axis=1)
+    hi = offsets + np.nanargmax(padded[filled], axis=1)
+    selected = np.unique(np.concatenate((lo, hi)))
+    return x[selected], y[selected]
+
+
+METHODS = {"lttb": lttb, "minmax": minmax_decimate}
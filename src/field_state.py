@@ -0,0 +1,62 @@
+"""
+State node heatmap sebagai snapshot immutable (copy-on-write).
+
+Sisi ingestion membangun FieldSnapshot baru untuk setiap perubahan lalu
+menukar satu referensi; callback Dash cukup membaca FieldState.current dan
+memakai snapshot itu sampai selesai tanpa lock. Pembaca tidak pernah
+menahan writer, dan writer tidak pernah mengubah snapshot yang sedang
+dibaca. Lock hanya ada di antara writer (thread MQTT / service), supaya
+dua pembaruan bersamaan tidak saling menimpa.
+"""
+
+import threading
+from datetime import datetime
+from types import MappingProxyType
+from typing import Mapping, NamedTuple
+
+
+class NodeState(NamedTuple):
+    temperature: float
+    humidity: float
+    pos_x: float
+    pos_y: float
+    last_seen: datetime  # Waktu pembacaan terakhir (timestamp dari node)
+
+
+class FieldSnapshot(NamedTuple):
+    version: int  # Naik setiap snapshot baru dipasang
+    nodes: Mapping[str, NodeState]  # Read-only (MappingProxyType)
+
+    def offline_nodes(self, now, timeout):
+        """Tuple node_id terurut yang last_seen-nya lebih lama dari timeout detik."""
+        return tuple(
+            sorted(
+                node_id
+                for node_id, node in self.nodes.items()
+                if (now - node.last_seen).total_seconds() > timeout
+            )
+        )
+
+
+EMPTY_SNAPSHOT = FieldSnapshot(0, MappingProxyType({}))
+
+
+class FieldState:
+    def __init__(self, write_lock=None):
+        self.current = EMPTY_SNAPSHOT
+        self._write_lock = write_lock or threading.Lock()
+
+    def update(self, changes, reset=False):
+        """
+        Pasang snapshot baru berisi {node_id: NodeState} dari changes.
+
+        reset=True membuang semua node lama (misal snapshot penuh dari service
+        setelah reconnect). Return snapshot baru.
+        """
+        with self._write_lock:
+            nodes = {} if reset else dict(self.current.nodes)
+            nodes.update(changes)
+            snapshot = FieldSnapshot(self.current.version + 1, MappingProxyType(nodes))
+            # Satu assignment atribut: pembaca melihat snapshot lama atau baru
+            self.current = snapshot
+        return snapshot
@@ -0,0 +1,61 @@
+import base64
+import threading
+
+import numpy as np
+
+# dtype yang bisa di-decode Plotly.js sebagai typed array (bdata)
+TYPED_ARRAY_DTYPES = ("i1", "u1", "i2", "u2", "i4", "u4", "f4", "f8")
+
+
+class FigureCache:
+    """
+    Cache output callback Dash berdasarkan versi data.
+
+    Selama versi data (dinaikkan oleh on_message) tidak berubah, semua tab
+    browser memakai figure yang sama tanpa membangun ulang Plotly figure.
+    Figure disimpan dalam bentuk dict (hasil to_dict) supaya validasi
+    graph_objects tidak diulang setiap kali dikirim.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._outputs = None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, version, build):
+        """Kembalikan output untuk versi ini; panggil build() hanya jika belum ada."""
+        # Build dilakukan di dalam lock agar banyak tab yang datang bersamaan
+        # cukup menunggu satu kali build, bukan membangun figure masing-masing.
+        with self._lock:
+            if self._outputs is not None and self._version == version:
+                self.hits += 1
+                return self._outputs
+            self._outputs = build()
+            self._version = version
+            self.misses += 1
+            return self._outputs
+
+
+def serialize_figure(fig):
+    """Ubah go.Figure menjadi dict siap-JSON untuk disimpan di cache."""
+    return fig.to_dict()
+
+
+def typed_array(values, dtype="f8"):
+    """
+    Array numerik sebagai typed array Plotly ({"dtype", "bdata", "shape"}).
+
+    Data dikirim sebagai base64 dari byte mentah (little-endian), bukan list
+    float JSON: lebih kecil, NaN tidak perlu diubah menjadi null, dan encode
+    JSON per response hanya menyalin satu string. Panggil saat membangun
+    figure (sekali per versi data, lalu disimpan di FigureCache).
+    """
+    if dtype not in TYPED_ARRAY_DTYPES:
+        raise ValueError(f"dtype {dtype} tidak didukung Plotly.js")
+    array = np.ascontiguousarray(values, dtype=np.dtype(dtype).newbyteorder("<"))
+    spec = {"dtype": dtype, "bdata": base64.b64encode(array.data).decode("ascii")}
+    if array.ndim > 1:
+        spec["shape"] = ", ".join(str(n) for n in array.shape)
+    return spec
@@ -1,118 +1,168 @@
 import dash
 from dash import dcc, html
-from dash.dependencies import Input, Output
+from dash.dependencies import Input, Output, State
 import plotly.graph_objects as go
 import plotly.express as px
 import paho.mqtt.client as mqtt
-import sqlite3
-import json
-import numpy as np
 from datetime import datetime, timedelta
-import threading
-from collections import defaultdict
+import os
 import sys
 import random
 import time
+import atexit
+
+from db_writer import BatchWriter
+from field_state import FieldState, NodeState
+from figure_cache import FigureCache, serialize_figure, typed_array
+from heatmap_engine import IncrementalHeatmap, field_geometry
+from heatmap_tiles import TiledHeatmap, pyramid_resolutions
+from ingest import decode_payload, topic_node_id
+from ingest_service import SnapshotSubscriber
+from log_setup import get_logger, setup_logging
+from metrics import (
+    CALLBACK_SECONDS,
+    HEATMAP_GENERATE_SECONDS,
+    LOCK_WAIT_SECONDS,
+    MESSAGES_PARSED,
+    MESSAGES_RECEIVED,
+    MESSAGES_REJECTED,
+    ON_MESSAGE_SECONDS,
+    UNREGISTERED_NODE,
+    TimedLock,
+    serve_metrics,
+)
+from node_registry import NodeRegistry
+from rollup import RollupCompactor, RollupStore
+from storage import (
+    MULTI_NODE_COLUMNS,
+    UPSERT_NODE_INFO_SQL,
+    ClimateStore,
+    ReaderPool,
+    connect_writer,
+    setup_node_info,
+)
 
 # --- KONFIGURASI ---
 MQTT_BROKER = "broker.hivemq.com"
-# Ganti topik wildcard dengan daftar node spesifik
-ALLOWED_NODES = ["node_001", "node_002"]  # Tambahkan ini
+# Node awal registry; node lain didaftarkan di tabel node_info lewat
+# node_registry.py dan ikut diizinkan tanpa restart (hot reload)
+ALLOWED_NODES = ["node_001", "node_002"]
 MQTT_TOPIC_BASE = "Informatika/IoT-E/Kelompok9/multi_node"
 DB_FILE = "multi_node_climate.db"
+# Pecah tabel multi_node_climate per "day" / "month" agar data lama mudah di-drop/arsip
+PARTITION_SCHEME = None
 CLIENT_ID = f"multi_node_dashboard_{random.randint(0, 10000)}"
+# Alamat ingest_service.py (misal 127.0.0.1:8765). Kosong = dashboard
+# subscribe MQTT dan menulis database sendiri.
+INGEST_SERVICE = os.environ.get("MONITORING_INGEST_SERVICE")
 
 # --- KONFIGURASI FIELD MONITORING ---
 FIELD_WIDTH = 100  # Lebar field dalam meter
 FIELD_HEIGHT = 100  # Tinggi field dalam meter
-NODE_RADIUS = 15  # Radius monitoring per node dalam meter
-GRID_RESOLUTION = 5  # Resolusi grid untuk heatmap (meter per grid)
+NODE_RADIUS = 15  # Radius monitoring bawaan (meter); bisa diatur per node di node_info
+GRID_RESOLUTION = 5  # Resolusi terhalus heatmap (meter per grid), dipakai saat zoom
+# Batas sel per sumbu untuk overview dan satu tampilan zoom; field yang lebih
+# besar dari ini dikirim sebagai overview kasar + tile halus area zoom
+VIEW_CELLS = 200
 
 # --- THRESHOLD SUHU ---
 TEMP_MIN = 15.0
 TEMP_MAX = 40.0
 
+# --- LOGGING ---
+# Level diatur lewat MONITORING_LOG_LEVEL; log per pesan ada di level DEBUG
+setup_logging()
+logger = get_logger("heatmap_dashboard")
+
 # --- DATA STORAGE ---
-node_data = defaultdict(dict)  # {node_id: {latest_data, last_seen, status}}
-data_lock = threading.Lock()
+# Snapshot immutable {node_id: NodeState}; writer menukar referensi, callback
+# Dash membaca field_state.current tanpa lock. Status online/offline tidak
+# disimpan, tetapi dihitung dari last_seen saat snapshot dibaca.
+field_state = FieldState(TimedLock(LOCK_WAIT_SECONDS.labels("state_write")))
 NODE_TIMEOUT = 30  # Detik untuk menganggap node mati
 
+# Resolusi per level pyramid: level 0 = overview, level terakhir = GRID_RESOLUTION
+HEATMAP_LEVELS = pyramid_resolutions(
+    FIELD_WIDTH, FIELD_HEIGHT, GRID_RESOLUTION, VIEW_CELLS
+)
+
+# Sumbu grid + stencil bobot per posisi node untuk overview, dihitung sekali
+field = field_geometry(FIELD_WIDTH, FIELD_HEIGHT, HEATMAP_LEVELS[0])
+
+# Akumulator heatmap; hanya area radius node yang berubah yang dihitung ulang
+heatmap_state = IncrementalHeatmap(
+    field.x_grid, field.y_grid, NODE_RADIUS, geometry=field
+)
+
+# Tile level yang lebih halus (LRU), hanya untuk area yang di-zoom
+heatmap_tiles = TiledHeatmap(
+    FIELD_WIDTH, FIELD_HEIGHT, HEATMAP_LEVELS, view_cells=VIEW_CELLS
+)
+
+# Cache status node + figure heatmap per versi snapshot
+figure_cache = FigureCache()
+
+
+# Tabel data climate: timestamp epoch integer + index (node_id, timestamp)
+climate_store = ClimateStore(
+    DB_FILE, "multi_node_climate", MULTI_NODE_COLUMNS, PARTITION_SCHEME
+)
+
 
 def setup_database():
     """Setup database dengan tabel untuk multi-node monitoring"""
-    conn = sqlite3.connect(DB_FILE, check_same_thread=False)
-    cursor = conn.cursor()
-
-    # Tabel untuk data climate dari setiap node
-    cursor.execute(
-        """
-        CREATE TABLE IF NOT EXISTS multi_node_climate (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            node_id TEXT NOT NULL,
-            timestamp DATETIME NOT NULL,
-            temperature REAL NOT NULL,
-            humidity REAL NOT NULL,
-            pos_x REAL NOT NULL,
-            pos_y REAL NOT NULL,
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-    """
-    )
+    conn = connect_writer(DB_FILE)  # Sekaligus mengaktifkan WAL
+    # Tabel untuk data climate dari setiap node (tabel lama dimigrasikan otomatis)
+    climate_store.setup(conn)
 
     # Tabel untuk informasi node (konfigurasi dan status)
-    cursor.execute(
-        """
-        CREATE TABLE IF NOT EXISTS node_info (
-            node_id TEXT PRIMARY KEY,
-            pos_x REAL NOT NULL,
-            pos_y REAL NOT NULL,
-            radius REAL DEFAULT 15.0,
-            status TEXT DEFAULT 'active',
-            last_seen DATETIME,
-            description TEXT
-        )
-    """
-    )
-
-    conn.commit()
+    setup_node_info(conn)
+    conn.close()
     print(f"Database multi-node '{DB_FILE}' siap.")
-    return conn
 
 
-db_conn = setup_database()
+setup_database()
+
+# Rollup 1m/1h/1d per node diperbarui berkala dari baris mentah yang baru masuk
+rollups = RollupStore(climate_store)
+if INGEST_SERVICE:
+    # Database ditulis (dan rollup di-compact) oleh service ingestion
+    rollup_compactor = db_writer = None
+else:
+    rollup_compactor = RollupCompactor(DB_FILE, rollups)
+    atexit.register(rollup_compactor.close)
 
+    # Semua INSERT lewat writer thread agar thread MQTT tidak menunggu commit
+    db_writer = BatchWriter(DB_FILE)
+    atexit.register(db_writer.close)
 
-def update_node_status():
-    """Update status node berdasarkan last_seen"""
-    with data_lock:
-        current_time = datetime.now()
-        for node_id, data in node_data.items():
-            if "last_seen" in data:
-                time_diff = (current_time - data["last_seen"]).total_seconds()
-                if time_diff > NODE_TIMEOUT:
-                    data["status"] = "offline"
-                else:
-                    data["status"] = "online"
+# Koneksi read-only untuk query dari callback Dash (tidak mengganggu writer)
+reader_pool = ReaderPool(DB_FILE)
+atexit.register(reader_pool.close)
+
+# Node yang diizinkan + posisi/radius/warnanya, dari tabel node_info
+node_registry = NodeRegistry(DB_FILE, ALLOWED_NODES, default_radius=NODE_RADIUS)
+node_registry.start()
+atexit.register(node_registry.close)
 
 
 # --- LOGIKA MQTT ---
 def on_connect(client, userdata, flags, reason_code, properties):
     if reason_code == 0:
-        print("MQTT Terhubung! Subscribe ke topik multi-node...")
+        logger.info("MQTT Terhubung! Subscribe ke topik multi-node...")
 
-        # Subscribe ke node spesifik saja
-        for node_id in ALLOWED_NODES:
-            topic = f"{MQTT_TOPIC_BASE}/{node_id}"
-            result = client.subscribe(topic)
-            print(f"Subscribe to {topic} - Result: {result}")
+        # Satu subscription wildcard; filter node lewat registry (O(1))
+        topic = f"{MQTT_TOPIC_BASE}/+"
+        result = client.subscribe(topic)
+        logger.info("Subscribe to %s - Result: %s", topic, result)
 
-        print(f"Listening to nodes: {ALLOWED_NODES}")
+        logger.info("Registry node: %d node", len(node_registry))
     else:
-        print(f"Gagal terhubung ke MQTT, code: {reason_code}")
+        logger.error("Gagal terhubung ke MQTT, code: %s", reason_code)
 
 
 def on_subscribe(client, userdata, mid, reason_codes, properties):
-    print(f"Subscribe callback - MID: {mid}, Reason codes: {reason_codes}")
+    logger.info("Subscribe callback - MID: %s, Reason codes: %s", mid, reason_codes)
 
 
 def on_message(client, userdata, msg):
@@ -127,139 +177,159 @@ def on_message(client, userdata, msg):
         "timestamp": 1695123456.789
     }
     """
+    start = time.perf_counter()
+    node_label = UNREGISTERED_NODE
     try:
-        # Debug: print raw message
-        print(
-            f"Raw MQTT message - Topic: {msg.topic}, Payload: {msg.payload.decode('utf-8')}"
-        )
-
         # Extract node_id dari topik (format: base/topic/node_id)
-        topic_parts = msg.topic.split("/")
-        node_id_from_topic = topic_parts[-1] if len(topic_parts) > 0 else "unknown"
+        node_id_from_topic = topic_node_id(msg.topic)
 
         # Filter: Hanya terima data dari node yang diizinkan
-        if node_id_from_topic not in ALLOWED_NODES:
-            print(f"Node {node_id_from_topic} tidak diizinkan. Data diabaikan.")
+        if node_id_from_topic not in node_registry:
+            MESSAGES_RECEIVED.labels(node_label).inc()
+            MESSAGES_REJECTED.labels(node_label, "not_allowed").inc()
+            logger.warning(
+                "Node %s tidak diizinkan. Data diabaikan.",
+                node_id_from_topic,
+                extra={"node_id": UNREGISTERED_NODE},
+            )
             return
 
-        print(f"Topic parts: {topic_parts}, Node ID from topic: {node_id_from_topic}")
+        node_label = node_id_from_topic
+        MESSAGES_RECEIVED.labels(node_label).inc()
 
-        payload = json.loads(msg.payload.decode("utf-8"))
+        # Decode + validasi payload satu kali (JSON atau biner)
+        reading = decode_payload(msg.payload, node_id_from_topic)
+        MESSAGES_PARSED.labels(node_label).inc()
 
-        # Ambil data dari payload
-        node_id = payload.get("node_id", node_id_from_topic)
-
-        # Double check: pastikan node_id di payload juga sesuai
-        if node_id not in ALLOWED_NODES:
-            print(f"Node ID dalam payload ({node_id}) tidak diizinkan. Data diabaikan.")
-            return
+        node_id = reading.node_id
 
-        temp = payload.get("temperature")
-        hum = payload.get("humidity")
-        pos_x = payload.get("pos_x")
-        pos_y = payload.get("pos_y")
-        ts = payload.get("timestamp", datetime.now().timestamp())
-
-        dt_object = datetime.fromtimestamp(ts)
-
-        print(f"Data dari {node_id}: T={temp}°C, H={hum}%, Pos=({pos_x},{pos_y})")
-
-        if all(v is not None for v in [temp, hum, pos_x, pos_y]):
-            # Simpan ke database
-            cursor = db_conn.cursor()
-            cursor.execute(
-                """
-                INSERT INTO multi_node_climate 
-                (node_id, timestamp, temperature, humidity, pos_x, pos_y) 
-                VALUES (?, ?, ?, ?, ?, ?)
-            """,
-                (
-                    node_id,
-                    dt_object.strftime("%Y-%m-%d %H:%M:%S"),
-                    temp,
-                    hum,
-                    pos_x,
-                    pos_y,
-                ),
-            )
+        # Debug: pesan yang diterima (hanya diformat jika level DEBUG aktif)
+        logger.debug(
+            "MQTT message: %s", reading, extra={"node_id": node_id, "topic": msg.topic}
+        )
 
-            # Update atau insert node info
-            cursor.execute(
-                """
-                INSERT OR REPLACE INTO node_info 
-                (node_id, pos_x, pos_y, last_seen) 
-                VALUES (?, ?, ?, ?)
-            """,
-                (node_id, pos_x, pos_y, dt_object.strftime("%Y-%m-%d %H:%M:%S")),
+        # Double check: pastikan node_id di payload juga sesuai
+        if node_id not in node_registry:
+            MESSAGES_REJECTED.labels(UNREGISTERED_NODE, "not_allowed").inc()
+            logger.warning(
+                "Node ID dalam payload (%s) tidak diizinkan. Data diabaikan.",
+                node_id,
+                extra={"node_id": UNREGISTERED_NODE},
             )
+            return
 
-            db_conn.commit()
-
-            # Update data di memory
-            with data_lock:
-                node_data[node_id] = {
-                    "temperature": temp,
-                    "humidity": hum,
-                    "pos_x": pos_x,
-                    "pos_y": pos_y,
-                    "timestamp": dt_object,
-                    "last_seen": dt_object,
-                    "status": "online",
-                }
+        store_reading(reading)
 
     except Exception as e:
-        print(f"Error memproses pesan: {e}")
-
+        MESSAGES_REJECTED.labels(node_label, "invalid").inc()
+        logger.error("Error memproses pesan: %s", e, extra={"topic": msg.topic})
+    finally:
+        ON_MESSAGE_SECONDS.observe(time.perf_counter() - start)
+
+
+def store_reading(reading, persist=True):
+    """Simpan satu Reading ke database (jika persist) dan ke field_state"""
+    # Node tanpa GPS/konfigurasi posisi: pakai posisi dari registry
+    reading = node_registry.fill_position(reading)
+    temp = reading.temperature
+    hum = reading.humidity
+    pos_x = reading.pos_x
+    pos_y = reading.pos_y
+    node_id = reading.node_id
+    dt_object = datetime.fromtimestamp(reading.timestamp)
+
+    if all(v is not None for v in [temp, hum, pos_x, pos_y]):
+        if persist:
+            # Simpan ke database (diantrekan ke writer thread)
+            epoch = int(reading.timestamp)
+            db_writer.submit(
+                climate_store.insert_sql(epoch),
+                (node_id, epoch, temp, hum, pos_x, pos_y),
+                node_id=node_id,
+            )
 
-def generate_heatmap_data():
-    """Generate data untuk heatmap berdasarkan posisi dan data node"""
-    with data_lock:
-        if not node_data:
-            return None, None, None, None
+            # Update atau insert node info
+            ts_str = dt_object.strftime("%Y-%m-%d %H:%M:%S")
+            db_writer.submit(UPSERT_NODE_INFO_SQL, (node_id, pos_x, pos_y, ts_str))
 
-    # Buat grid koordinat
-    x_grid = np.arange(0, FIELD_WIDTH + GRID_RESOLUTION, GRID_RESOLUTION)
-    y_grid = np.arange(0, FIELD_HEIGHT + GRID_RESOLUTION, GRID_RESOLUTION)
-    X, Y = np.meshgrid(x_grid, y_grid)
+        # Snapshot baru di memory (copy-on-write, tanpa menunggu pembaca)
+        field_state.update({node_id: NodeState(temp, hum, pos_x, pos_y, dt_object)})
+    else:
+        MESSAGES_REJECTED.labels(node_id, "incomplete").inc()
+
+
+def on_service_readings(readings, reset):
+    """Pembacaan dari service ingestion (sudah disimpan ke database oleh service)"""
+    if reset:
+        # Snapshot penuh setelah (re)connect menggantikan state lama
+        field_state.update({}, reset=True)
+    for reading in readings:
+        if reading.node_id not in node_registry:
+            continue
+        try:
+            store_reading(reading, persist=False)
+        except Exception as e:
+            logger.error("Error memproses pembacaan service: %s", e)
+
+
+def heatmap_readings(snapshot):
+    """{node_id: (pos_x, pos_y, temperature, radius)} dan versinya."""
+    readings = {
+        node_id: (
+            node.pos_x,
+            node.pos_y,
+            node.temperature,
+            node_registry.radius(node_id),
+        )
+        for node_id, node in snapshot.nodes.items()
+    }
+    return readings, (snapshot.version, node_registry.version)
 
-    # Inisialisasi temperature grid
-    temp_grid = np.full(X.shape, np.nan)
 
-    # Untuk setiap titik di grid, hitung suhu berdasarkan node terdekat
-    with data_lock:
-        for i in range(len(y_grid)):
-            for j in range(len(x_grid)):
-                grid_x, grid_y = X[i, j], Y[i, j]
+@HEATMAP_GENERATE_SECONDS.time()
+def generate_heatmap_data(snapshot):
+    """
+    Generate data untuk heatmap berdasarkan posisi dan data node.
 
-                # Cari node dalam radius dan hitung weighted average
-                weights = []
-                temps = []
+    Return sumbu + grid overview dan nodes.
+    """
+    nodes = snapshot.nodes
+    if not nodes:
+        return None, None, None, None
 
-                for node_id, data in node_data.items():
-                    if "pos_x" not in data or "pos_y" not in data:
-                        continue
+    # Weighted average (inverse distance) dari node dalam radius; jika versi
+    # data belum berubah, grid terakhir dipakai ulang tanpa perhitungan
+    temp_grid = heatmap_state.update(*heatmap_readings(snapshot))
 
-                    node_x, node_y = data["pos_x"], data["pos_y"]
-                    distance = np.sqrt((grid_x - node_x) ** 2 + (grid_y - node_y) ** 2)
+    # Sumbu grid dari geometri yang di-cache (tanpa meshgrid per panggilan)
+    return field.x_grid, field.y_grid, temp_grid, nodes
 
-                    # Hanya node dalam radius yang berkontribusi
-                    if distance <= NODE_RADIUS:
-                        # Weight berdasarkan inverse distance (node lebih dekat = weight lebih besar)
-                        weight = 1.0 / (
-                            distance + 0.1
-                        )  # +0.1 untuk avoid division by zero
-                        weights.append(weight)
-                        temps.append(data["temperature"])
 
-                # Hitung weighted average temperature
-                if weights:
-                    temp_grid[i, j] = np.average(temps, weights=weights)
+def detail_trace(snapshot, detail_key):
+    """
+    Trace heatmap resolusi halus untuk area zoom (lihat TiledHeatmap.view_key).
 
-    return X, Y, temp_grid, node_data.copy()
+    Dibangun per browser dari tile di heatmap_tiles; tile di luar radius node
+    yang berubah tetap dipakai dari cache, jadi zoom yang berbeda di banyak
+    tab tidak saling membuang figure bersama di figure_cache.
+    """
+    heatmap_tiles.update(*heatmap_readings(snapshot))
+    detail_x, detail_y, detail_grid = heatmap_tiles.view(detail_key)
+    return go.Heatmap(
+        x=typed_array(detail_x),
+        y=typed_array(detail_y),
+        z=typed_array(detail_grid, "f4"),
+        colorscale="RdYlBu_r",
+        zmin=TEMP_MIN,
+        zmax=TEMP_MAX,
+        hoverongaps=False,
+        showscale=False,
+    ).to_plotly_json()
 
 
 # --- APLIKASI DASH ---
 app = dash.Dash(__name__)
+serve_metrics(app.server)  # Metrik Prometheus di /metrics
 app.title = "Multi-Node Temperature Monitoring"
 
 app.layout = html.Div(
@@ -322,56 +392,127 @@ app.layout = html.Div(
         dcc.Interval(
             id="interval-component", interval=2000, n_intervals=0  # 2 seconds
         ),
+        # Versi data terakhir yang sudah diterima browser ini
+        dcc.Store(id="data-version-store", data=None),
+        # Area zoom heatmap [[x0, x1], [y0, y1]] (None = seluruh field)
+        dcc.Store(id="viewport-store", data=None),
     ],
 )
 
 
+def _axis_range(relayout, axis, current):
+    """Range satu sumbu dari relayoutData; current jika sumbu tidak berubah."""
+    if relayout.get(f"{axis}.autorange"):
+        return None
+    if f"{axis}.range[0]" in relayout and f"{axis}.range[1]" in relayout:
+        return [relayout[f"{axis}.range[0]"], relayout[f"{axis}.range[1]"]]
+    if f"{axis}.range" in relayout:
+        return list(relayout[f"{axis}.range"])
+    return current
+
+
 @app.callback(
-    [Output("nodes-status", "children"), Output("heatmap-graph", "figure")],
-    [Input("interval-component", "n_intervals")],
+    Output("viewport-store", "data"),
+    [Input("heatmap-graph", "relayoutData")],
+    [State("viewport-store", "data")],
 )
-def update_dashboard(_):
-    # Update status node
-    update_node_status()
+@CALLBACK_SECONDS.labels("update_viewport").time()
+def update_viewport(relayout, viewport):
+    if not relayout:
+        return dash.no_update
+    x_range, y_range = viewport or (None, None)
+    x_range = _axis_range(relayout, "xaxis", x_range)
+    y_range = _axis_range(relayout, "yaxis", y_range)
+    if x_range is None and y_range is None:
+        new_viewport = None
+    else:
+        new_viewport = [x_range or [0, FIELD_WIDTH], y_range or [0, FIELD_HEIGHT]]
+    if new_viewport == viewport:
+        return dash.no_update
+    return new_viewport
 
+
+@app.callback(
+    [
+        Output("nodes-status", "children"),
+        Output("heatmap-graph", "figure"),
+        Output("data-version-store", "data"),
+    ],
+    [
+        Input("interval-component", "n_intervals"),
+        Input("viewport-store", "data"),
+    ],
+    [State("data-version-store", "data")],
+)
+@CALLBACK_SECONDS.labels("update_dashboard").time()
+def update_dashboard(_, viewport, last_version):
+    # Satu snapshot untuk seluruh callback: status, heatmap, dan versi konsisten
+    snapshot = field_state.current
+    offline = snapshot.offline_nodes(datetime.now(), NODE_TIMEOUT)
+    # Level + rentang tile untuk area zoom (None = cukup overview)
+    detail_key = heatmap_tiles.view_key(viewport)
+
+    # Perubahan status node, registry (radius/warna), dan tile zoom juga
+    # mengubah tampilan
+    version = [
+        snapshot.version,
+        node_registry.version,
+        list(offline),
+        list(detail_key) if detail_key else None,
+    ]
+
+    # Browser ini sudah punya versi terbaru: tidak ada yang perlu dikirim
+    if version == last_version:
+        return dash.no_update, dash.no_update, dash.no_update
+
+    # Overview + status sama untuk semua browser; tile zoom ditambahkan per
+    # browser tanpa mengganti isi figure_cache
+    nodes_status, fig = figure_cache.get(
+        (snapshot.version, node_registry.version, offline),
+        lambda: build_dashboard(snapshot, offline),
+    )
+    if detail_key is not None and snapshot.nodes:
+        # Salinan dangkal: trace overview dan node tetap dipakai bersama
+        overview, *others = fig["data"]
+        fig = {**fig, "data": [overview, detail_trace(snapshot, detail_key), *others]}
+    return nodes_status, fig, version
+
+
+def build_dashboard(snapshot, offline):
     # Generate status nodes display
-    with data_lock:
-        nodes_status = []
-        for node_id, data in node_data.items():
-            status_color = "#00ff00" if data.get("status") == "online" else "#ff4444"
-            last_temp = data.get("temperature", "N/A")
-            last_hum = data.get("humidity", "N/A")
-            pos_x = data.get("pos_x", "N/A")
-            pos_y = data.get("pos_y", "N/A")
-
-            nodes_status.append(
-                html.Div(
-                    [
-                        html.Span(
-                            f"● {node_id}",
-                            style={
-                                "color": status_color,
-                                "fontWeight": "bold",
-                                "marginRight": "15px",
-                            },
-                        ),
-                        html.Span(f"T: {last_temp}°C", style={"marginRight": "10px"}),
-                        html.Span(f"H: {last_hum}%", style={"marginRight": "10px"}),
-                        html.Span(
-                            f"Pos: ({pos_x}, {pos_y})", style={"marginRight": "10px"}
-                        ),
-                        html.Span(
-                            f"Status: {data.get('status', 'unknown')}",
-                            style={"color": "#cccccc"},
-                        ),
-                    ],
-                    style={
-                        "marginBottom": "8px",
-                        "display": "inline-block",
-                        "width": "100%",
-                    },
-                )
+    nodes_status = []
+    for node_id, node in snapshot.nodes.items():
+        status = "offline" if node_id in offline else "online"
+        status_color = "#00ff00" if status == "online" else "#ff4444"
+
+        nodes_status.append(
+            html.Div(
+                [
+                    html.Span(
+                        f"● {node_id}",
+                        style={
+                            "color": status_color,
+                            "fontWeight": "bold",
+                            "marginRight": "15px",
+                        },
+                    ),
+                    html.Span(
+                        f"T: {node.temperature}°C", style={"marginRight": "10px"}
+                    ),
+                    html.Span(f"H: {node.humidity}%", style={"marginRight": "10px"}),
+                    html.Span(
+                        f"Pos: ({node.pos_x}, {node.pos_y})",
+                        style={"marginRight": "10px"},
+                    ),
+                    html.Span(f"Status: {status}", style={"color": "#cccccc"}),
+                ],
+                style={
+                    "marginBottom": "8px",
+                    "display": "inline-block",
+                    "width": "100%",
+                },
             )
+        )
 
     if not nodes_status:
         nodes_status = [
@@ -379,24 +520,24 @@ def update_dashboard(_):
         ]
 
     # Generate heatmap
-    X, Y, temp_grid, nodes = generate_heatmap_data()
+    x_grid, y_grid, temp_grid, nodes = generate_heatmap_data(snapshot)
 
-    if X is None:
+    if x_grid is None:
         # Tampilan kosong jika belum ada data
         fig = go.Figure()
         fig.update_layout(
             title="Menunggu Data Node...", template="plotly_dark", height=600
         )
-        return nodes_status, fig
+        return nodes_status, serialize_figure(fig)
 
     # Buat heatmap
     fig = go.Figure()
 
-    # Tambahkan heatmap
+    # Tambahkan heatmap; grid dikirim sebagai typed array (suhu cukup float32)
     heatmap = go.Heatmap(
-        x=X[0, :],
-        y=Y[:, 0],
-        z=temp_grid,
+        x=typed_array(x_grid),
+        y=typed_array(y_grid),
+        z=typed_array(temp_grid, "f4"),
         colorscale="RdYlBu_r",  # Red-Yellow-Blue terbalik (merah = panas)
         zmin=TEMP_MIN,
         zmax=TEMP_MAX,
@@ -412,16 +553,11 @@ def update_dashboard(_):
     node_text = []
     node_colors = []
 
-    for node_id, data in nodes.items():
-        if "pos_x" in data and "pos_y" in data:
-            node_x.append(data["pos_x"])
-            node_y.append(data["pos_y"])
-            node_text.append(
-                f"{node_id}<br>T: {data['temperature']}°C<br>H: {data['humidity']}%"
-            )
-            node_colors.append(
-                "#00ff00" if data.get("status") == "online" else "#ff4444"
-            )
+    for node_id, node in nodes.items():
+        node_x.append(node.pos_x)
+        node_y.append(node.pos_y)
+        node_text.append(f"{node_id}<br>T: {node.temperature}°C<br>H: {node.humidity}%")
+        node_colors.append("#ff4444" if node_id in offline else "#00ff00")
 
     if node_x:
         fig.add_trace(
@@ -445,19 +581,19 @@ def update_dashboard(_):
         )
 
         # Tambahkan lingkaran radius untuk setiap node
-        for i, (node_id, data) in enumerate(nodes.items()):
-            if "pos_x" in data and "pos_y" in data:
-                fig.add_shape(
-                    type="circle",
-                    xref="x",
-                    yref="y",
-                    x0=data["pos_x"] - NODE_RADIUS,
-                    y0=data["pos_y"] - NODE_RADIUS,
-                    x1=data["pos_x"] + NODE_RADIUS,
-                    y1=data["pos_y"] + NODE_RADIUS,
-                    line=dict(color=node_colors[i], width=2, dash="dash"),
-                    fillcolor="rgba(0,0,0,0)",
-                )
+        for node_id, node in nodes.items():
+            radius = node_registry.radius(node_id)
+            fig.add_shape(
+                type="circle",
+                xref="x",
+                yref="y",
+                x0=node.pos_x - radius,
+                y0=node.pos_y - radius,
+                x1=node.pos_x + radius,
+                y1=node.pos_y + radius,
+                line=dict(color=node_registry.color(node_id), width=2, dash="dash"),
+                fillcolor="rgba(0,0,0,0)",
+            )
 
     fig.update_layout(
         title=f"Temperature Field Heatmap - {datetime.now().strftime('%H:%M:%S')}",
@@ -468,40 +604,50 @@ def update_dashboard(_):
         xaxis=dict(range=[0, FIELD_WIDTH]),
         yaxis=dict(range=[0, FIELD_HEIGHT], scaleanchor="x", scaleratio=1),
         showlegend=False,
+        # Zoom/pan pengguna dipertahankan saat figure diperbarui
+        uirevision="field",
     )
 
-    return nodes_status, fig
+    return nodes_status, serialize_figure(fig)
 
 
 @app.callback(
     Output("interval-component", "interval"), [Input("update-interval-slider", "value")]
 )
+@CALLBACK_SECONDS.labels("update_interval").time()
 def update_interval(value):
     return value * 1000  # Convert to milliseconds
 
 
 # --- MAIN ---
 if __name__ == "__main__":
-    # Setup MQTT
-    mqtt_client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, CLIENT_ID)
-    mqtt_client.on_connect = on_connect
-    mqtt_client.on_subscribe = on_subscribe
-    mqtt_client.on_message = on_message
+    print("=== Multi-Node Temperature Monitoring Dashboard ===")
+    print(f"Database: {DB_FILE}")
+    print(f"Registry Node: {list(node_registry.node_ids)} (hot reload dari {DB_FILE})")
 
-    try:
-        mqtt_client.connect(MQTT_BROKER, 1883, 60)
-    except Exception as e:
-        print(f"Gagal terhubung ke broker MQTT: {e}")
-        sys.exit(1)
+    if INGEST_SERVICE:
+        # Data datang dari ingest_service.py, bukan subscription sendiri
+        subscriber = SnapshotSubscriber(INGEST_SERVICE, on_service_readings).start()
+        atexit.register(subscriber.close)
+        print(f"Service ingestion: {INGEST_SERVICE}")
+    else:
+        # Setup MQTT
+        mqtt_client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, CLIENT_ID)
+        mqtt_client.on_connect = on_connect
+        mqtt_client.on_subscribe = on_subscribe
+        mqtt_client.on_message = on_message
 
-    mqtt_client.loop_start()
+        try:
+            mqtt_client.connect(MQTT_BROKER, 1883, 60)
+        except Exception as e:
+            print(f"Gagal terhubung ke broker MQTT: {e}")
+            sys.exit(1)
+
+        mqtt_client.loop_start()
+        print(f"MQTT Topic: {MQTT_TOPIC_BASE}/+")
 
-    print("=== Multi-Node Temperature Monitoring Dashboard ===")
-    print(f"Database: {DB_FILE}")
-    print(f"Allowed Nodes: {ALLOWED_NODES}")
-    print(f"MQTT Topics: {[f'{MQTT_TOPIC_BASE}/{node}' for node in ALLOWED_NODES]}")
     print(f"Field Size: {FIELD_WIDTH}x{FIELD_HEIGHT}m")
-    print(f"Node Radius: {NODE_RADIUS}m")
+    print(f"Node Radius (bawaan): {NODE_RADIUS}m")
     print("Dashboard akan berjalan di http://127.0.0.1:8050")
 
     app.run(debug=True, use_reloader=False, port=8050)
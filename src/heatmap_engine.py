@@ -0,0 +1,315 @@
+import functools
+import threading
+
+import numpy as np
+
+# Batas jumlah elemen (sel x node) per chunk agar memori tetap terkendali.
+# 2 juta float64 ~ 16 MB per array sementara.
+CHUNK_ELEMENTS = 2_000_000
+
+# Konstanta yang sama dengan loop lama: 1 / (jarak + 0.1)
+DISTANCE_EPSILON = 0.1
+
+# Ukuran tile (jumlah sel per sisi) untuk interpolasi berbasis spatial index
+TILE_CELLS = 64
+
+# Batas stencil yang disimpan per FieldGeometry (posisi node yang berbeda)
+MAX_STENCILS = 4096
+
+
+def build_grid(width, height, resolution):
+    """Koordinat sumbu grid, sama dengan np.arange pada versi loop."""
+    x_grid = np.arange(0, width + resolution, resolution)
+    y_grid = np.arange(0, height + resolution, resolution)
+    return x_grid, y_grid
+
+
+def interpolate_idw(x_grid, y_grid, node_x, node_y, node_temp, radius):
+    """
+    Inverse distance weighting dengan batas radius untuk seluruh grid.
+
+    Hasilnya array (len(y_grid), len(x_grid)); sel tanpa node dalam radius
+    bernilai NaN. Grid diproses per blok baris supaya array sementara
+    (baris x kolom x node) tidak melebihi CHUNK_ELEMENTS. radius boleh
+    berupa skalar atau array radius per node.
+    """
+    ny, nx = len(y_grid), len(x_grid)
+    temp_grid = np.full((ny, nx), np.nan)
+    n_nodes = len(node_x)
+    if n_nodes == 0 or nx == 0 or ny == 0:
+        return temp_grid
+
+    chunk_rows = max(1, CHUNK_ELEMENTS // (nx * n_nodes))
+    dx2 = (x_grid[:, None] - node_x[None, :]) ** 2  # (nx, n)
+
+    for start in range(0, ny, chunk_rows):
+        stop = min(start + chunk_rows, ny)
+        dy2 = (y_grid[start:stop, None] - node_y[None, :]) ** 2  # (rows, n)
+        distance = np.sqrt(dy2[:, None, :] + dx2[None, :, :])  # (rows, nx, n)
+
+        # Hanya node dalam radius yang berkontribusi
+        weights = np.where(distance <= radius, 1.0 / (distance + DISTANCE_EPSILON), 0.0)
+        weight_sum = weights.sum(axis=2)
+        value_sum = weights @ node_temp
+
+        covered = weight_sum > 0
+        block = temp_grid[start:stop]
+        block[covered] = value_sum[covered] / weight_sum[covered]
+
+    return temp_grid
+
+
+def interpolate_idw_indexed(
+    x_grid, y_grid, node_x, node_y, node_temp, radius, index, tile_cells=TILE_CELLS
+):
+    """
+    Sama dengan interpolate_idw, tetapi grid diproses per tile dan setiap
+    tile hanya menghitung node dari spatial index yang berada dalam radius
+    kotak tile. Biaya mengikuti kepadatan node lokal, bukan total node.
+    Untuk radius per node (array), index di-query dengan radius terbesar.
+    """
+    ny, nx = len(y_grid), len(x_grid)
+    temp_grid = np.full((ny, nx), np.nan)
+    if len(index) == 0 or nx == 0 or ny == 0:
+        return temp_grid
+    per_node = np.ndim(radius) > 0
+    margin = float(np.max(radius)) if per_node else radius
+
+    for row in range(0, ny, tile_cells):
+        row_end = min(row + tile_cells, ny)
+        tile_y = y_grid[row:row_end]
+        for col in range(0, nx, tile_cells):
+            col_end = min(col + tile_cells, nx)
+            tile_x = x_grid[col:col_end]
+
+            nearby = index.query_box(
+                tile_x[0], tile_y[0], tile_x[-1], tile_y[-1], margin=margin
+            )
+            if len(nearby) == 0:
+                continue
+
+            temp_grid[row:row_end, col:col_end] = interpolate_idw(
+                tile_x,
+                tile_y,
+                node_x[nearby],
+                node_y[nearby],
+                node_temp[nearby],
+                radius[nearby] if per_node else radius,
+            )
+
+    return temp_grid
+
+
+class FieldGeometry:
+    """
+    Sumbu grid satu field (ukuran + resolusi) dan stencil bobot sparse per node.
+
+    Stencil berisi indeks sel (flat) di dalam radius node beserta bobot
+    1/(d+0.1). Stencil hanya bergantung pada posisi dan radius, jadi disimpan
+    per (pos_x, pos_y, radius) dan dipakai ulang selama node tidak berpindah;
+    perubahan suhu cukup dihitung sebagai penjumlahan berbobot sparse.
+    """
+
+    def __init__(self, x_grid, y_grid, max_stencils=MAX_STENCILS):
+        self.x_grid = np.asarray(x_grid, dtype=float)
+        self.y_grid = np.asarray(y_grid, dtype=float)
+        self.shape = (len(self.y_grid), len(self.x_grid))
+        self.size = self.shape[0] * self.shape[1]
+        self.max_stencils = max_stencils
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._stencils = {}  # {(pos_x, pos_y, radius): (cells, weights)}
+
+    def _build_stencil(self, pos_x, pos_y, r):
+        # Hanya kotak radius yang dihitung, lalu disaring ke lingkaran radius
+        col0 = np.searchsorted(self.x_grid, pos_x - r, side="left")
+        col1 = np.searchsorted(self.x_grid, pos_x + r, side="right")
+        row0 = np.searchsorted(self.y_grid, pos_y - r, side="left")
+        row1 = np.searchsorted(self.y_grid, pos_y + r, side="right")
+
+        dx2 = (self.x_grid[col0:col1] - pos_x) ** 2
+        dy2 = (self.y_grid[row0:row1] - pos_y) ** 2
+        distance = np.sqrt(dy2[:, None] + dx2[None, :])
+        rows, cols = np.nonzero(distance <= r)
+        cells = (rows + row0) * self.shape[1] + (cols + col0)
+        weights = 1.0 / (distance[rows, cols] + DISTANCE_EPSILON)
+        return cells, weights
+
+    def stencil(self, pos_x, pos_y, radius):
+        """(cells, weights) untuk node di (pos_x, pos_y); dari cache jika ada."""
+        key = (float(pos_x), float(pos_y), float(radius))
+        stencil = self._stencils.get(key)
+        if stencil is not None:
+            self.hits += 1
+            return stencil
+        stencil = self._build_stencil(*key)
+        with self._lock:
+            self.misses += 1
+            if len(self._stencils) >= self.max_stencils:
+                # Buang yang paling lama disimpan (urutan insert dict)
+                self._stencils.pop(next(iter(self._stencils)))
+            self._stencils[key] = stencil
+        return stencil
+
+    def weighted_sums(self, stencils, temps):
+        """Jumlah bobot, bobot x suhu, dan jumlah node per sel (array flat)."""
+        if not stencils:
+            zeros = np.zeros(self.size)
+            return zeros, zeros.copy(), np.zeros(self.size, dtype=np.int32)
+        cells = np.concatenate([c for c, _ in stencils])
+        weights = np.concatenate([w for _, w in stencils])
+        lengths = [len(c) for c, _ in stencils]
+        values = weights * np.repeat(np.asarray(temps, dtype=float), lengths)
+        return (
+            np.bincount(cells, weights, minlength=self.size),
+            np.bincount(cells, values, minlength=self.size),
+            np.bincount(cells, minlength=self.size).astype(np.int32),
+        )
+
+    def interpolate(self, readings):
+        """
+        Grid IDW dari [(pos_x, pos_y, temperature, radius), ...] sebagai satu
+        penjumlahan sparse; sama dengan interpolate_idw untuk radius yang sama.
+        """
+        stencils = [self.stencil(x, y, r) for x, y, _, r in readings]
+        weight_sum, value_sum, contributors = self.weighted_sums(
+            stencils, [t for _, _, t, _ in readings]
+        )
+        grid = np.full(self.size, np.nan)
+        covered = contributors > 0
+        grid[covered] = value_sum[covered] / weight_sum[covered]
+        return grid.reshape(self.shape)
+
+
+@functools.lru_cache(maxsize=8)
+def field_geometry(width, height, resolution):
+    """FieldGeometry bersama untuk ukuran field dan resolusi ini."""
+    return FieldGeometry(*build_grid(width, height, resolution))
+
+
+class IncrementalHeatmap:
+    """
+    Heatmap yang menyimpan akumulator bobot dan nilai per sel.
+
+    Saat pembacaan satu node berubah, hanya sel di dalam lingkaran radius
+    node tersebut yang diperbarui. Jika tidak ada perubahan, grid terakhir
+    dikembalikan apa adanya. Grid yang sudah dikembalikan tidak pernah
+    diubah lagi (setiap pembaruan membuat salinan baru). Stencil diambil dari
+    FieldGeometry, sehingga tetap terpakai setelah bangun ulang penuh.
+    """
+
+    # Bangun ulang akumulator penuh setelah sekian pembaruan inkremental
+    # untuk membuang sisa pembulatan float dari operasi kurang/tambah.
+    REBUILD_EVERY = 1000
+
+    def __init__(self, x_grid, y_grid, radius, geometry=None):
+        self.geometry = geometry or FieldGeometry(x_grid, y_grid)
+        self.x_grid = self.geometry.x_grid
+        self.y_grid = self.geometry.y_grid
+        self.radius = float(radius)
+        self.version = None
+        self.full_rebuilds = 0
+        self.partial_updates = 0
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        # Akumulator disimpan flat (indeks sel sama dengan stencil)
+        size = self.geometry.size
+        self.weight_sum = np.zeros(size)
+        self.value_sum = np.zeros(size)
+        self.contributors = np.zeros(size, dtype=np.int32)
+        self.temp_grid = np.full(self.geometry.shape, np.nan)
+        self._readings = {}  # {node_id: (pos_x, pos_y, temperature[, radius])}
+        self._updates_since_rebuild = 0
+
+    def _stencil(self, pos_x, pos_y, radius=None):
+        r = self.radius if radius is None else radius
+        return self.geometry.stencil(pos_x, pos_y, r)
+
+    def _apply(self, reading, sign):
+        pos_x, pos_y, temp, *radius = reading
+        cells, weights = self._stencil(pos_x, pos_y, *radius)
+        # Indeks dalam satu stencil unik, jadi += dengan fancy index aman
+        self.weight_sum[cells] += sign * weights
+        self.value_sum[cells] += sign * weights * temp
+        self.contributors[cells] += sign
+        return cells
+
+    def _recompute(self, grid, cells):
+        covered = self.contributors[cells] > 0
+        block = np.full(len(cells), np.nan)
+        block[covered] = (
+            self.value_sum[cells][covered] / self.weight_sum[cells][covered]
+        )
+        grid[cells] = block
+
+    def update(self, readings, version=None):
+        """
+        Sinkronkan dengan {node_id: (pos_x, pos_y, temperature)} dan kembalikan grid.
+
+        Pembacaan boleh berisi elemen keempat, radius per node; tanpa itu
+        dipakai radius bawaan heatmap.
+
+        Jika version sama dengan versi terakhir, grid cache langsung dikembalikan
+        tanpa membandingkan pembacaan.
+        """
+        with self._lock:
+            if version is not None and version == self.version:
+                return self.temp_grid
+
+            changed = [
+                node_id
+                for node_id, reading in readings.items()
+                if self._readings.get(node_id) != reading
+            ]
+            removed = [node_id for node_id in self._readings if node_id not in readings]
+            self.version = version
+            if not changed and not removed:
+                return self.temp_grid
+
+            self._updates_since_rebuild += len(changed) + len(removed)
+            if self._updates_since_rebuild >= self.REBUILD_EVERY:
+                self._rebuild(readings)
+                return self.temp_grid
+
+            dirty = []
+            for node_id in removed:
+                dirty.append(self._apply(self._readings.pop(node_id), -1))
+            for node_id in changed:
+                reading = readings[node_id]
+                old = self._readings.get(node_id)
+                if old is not None:
+                    # Stencil lama (posisi/radius sebelumnya) tetap ada di cache
+                    dirty.append(self._apply(old, -1))
+                dirty.append(self._apply(reading, +1))
+                self._readings[node_id] = reading
+
+            grid = self.temp_grid.copy()
+            flat = grid.reshape(-1)
+            for cells in dirty:
+                self._recompute(flat, cells)
+            self.temp_grid = grid
+            self.partial_updates += 1
+            return self.temp_grid
+
+    def _rebuild(self, readings):
+        """Hitung ulang akumulator sebagai satu penjumlahan sparse semua node."""
+        version = self.version
+        self._reset()
+        self.version = version
+        stencils, temps = [], []
+        for node_id, reading in readings.items():
+            pos_x, pos_y, temp, *radius = reading
+            stencils.append(self._stencil(pos_x, pos_y, *radius))
+            temps.append(temp)
+            self._readings[node_id] = reading
+        self.weight_sum, self.value_sum, self.contributors = (
+            self.geometry.weighted_sums(stencils, temps)
+        )
+        grid = np.full(self.geometry.size, np.nan)
+        covered = self.contributors > 0
+        grid[covered] = self.value_sum[covered] / self.weight_sum[covered]
+        self.temp_grid = grid.reshape(self.geometry.shape)
+        self.full_rebuilds += 1
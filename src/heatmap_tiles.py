@@ -0,0 +1,236 @@
+"""
+Heatmap bertingkat (pyramid) berbasis tile untuk field yang besar.
+
+Level 0 adalah overview kasar seluruh field; setiap level berikutnya dua
+kali lebih halus sampai resolusi terhalus (GRID_RESOLUTION). Browser cukup
+menerima overview, lalu tile level yang lebih halus hanya untuk area yang
+sedang di-zoom (relayoutData), sehingga ukuran figure mengikuti viewport,
+bukan luas field. Tile disimpan di LRU; saat pembacaan node berubah hanya
+tile yang bersinggungan dengan radius node tersebut yang dibuang.
+"""
+
+import math
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from heatmap_engine import build_grid, interpolate_idw_indexed
+from spatial_index import SpatialIndexCache
+
+TILE_CELLS = 64  # Sel per sisi tile
+TILE_CACHE_SIZE = 256  # Tile yang disimpan (semua level)
+VIEW_CELLS = 200  # Batas sel per sumbu untuk overview dan satu tampilan zoom
+
+
+def pyramid_resolutions(width, height, finest, view_cells=VIEW_CELLS):
+    """
+    Resolusi setiap level, dari overview (kasar) ke finest.
+
+    Resolusi digandakan dari finest sampai seluruh field muat dalam
+    view_cells sel per sumbu; field kecil hanya punya satu level.
+    """
+    resolutions = [finest]
+    while max(width, height) / resolutions[-1] > view_cells:
+        resolutions.append(resolutions[-1] * 2)
+    return tuple(reversed(resolutions))
+
+
+class TileCache:
+    """LRU {(level, tx, ty): grid tile} dengan pembuangan per area."""
+
+    def __init__(self, maxsize=TILE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._tiles = OrderedDict()
+
+    def __len__(self):
+        return len(self._tiles)
+
+    def get(self, key):
+        tile = self._tiles.get(key)
+        if tile is None:
+            self.misses += 1
+            return None
+        self._tiles.move_to_end(key)
+        self.hits += 1
+        return tile
+
+    def put(self, key, tile):
+        self._tiles[key] = tile
+        self._tiles.move_to_end(key)
+        while len(self._tiles) > self.maxsize:
+            self._tiles.popitem(last=False)
+
+    def evict(self, predicate):
+        """Buang semua tile yang key-nya memenuhi predicate(key)."""
+        stale = [key for key in self._tiles if predicate(key)]
+        for key in stale:
+            del self._tiles[key]
+        self.evictions += len(stale)
+        return len(stale)
+
+    def clear(self):
+        self.evictions += len(self._tiles)
+        self._tiles.clear()
+
+
+class TiledHeatmap:
+    """
+    Pyramid tile IDW untuk satu field.
+
+    update() menyinkronkan pembacaan {node_id: (pos_x, pos_y, temperature,
+    radius)} dan membuang tile yang terkena perubahan; view() menyusun grid
+    untuk sebuah viewport dari tile level yang sesuai (dari cache jika ada).
+    Tile dihitung dengan interpolate_idw_indexed pada potongan sumbu level
+    tersebut, jadi nilainya sama dengan grid penuh di resolusi yang sama.
+    """
+
+    def __init__(
+        self,
+        width,
+        height,
+        resolutions,
+        tile_cells=TILE_CELLS,
+        cache_size=TILE_CACHE_SIZE,
+        view_cells=VIEW_CELLS,
+    ):
+        self.width = width
+        self.height = height
+        self.resolutions = tuple(resolutions)
+        self.tile_cells = tile_cells
+        self.view_cells = view_cells
+        self.axes = [build_grid(width, height, r) for r in self.resolutions]
+        self.cache = TileCache(cache_size)
+        self.version = None
+        # Build tile di dalam lock: tile tidak bisa tersimpan dari node lama
+        # setelah update() membuangnya
+        self._lock = threading.Lock()
+        self._index_cache = SpatialIndexCache()
+        self._readings = {}
+        self._set_nodes({})
+
+    def _set_nodes(self, readings):
+        values = np.asarray(list(readings.values()), dtype=float).reshape(-1, 4)
+        self._node_x, self._node_y, self._node_temp, self._node_radius = values.T
+        self._index = None
+        if len(values):
+            self._index = self._index_cache.get(
+                self._node_x, self._node_y, self._node_radius.max()
+            )
+
+    def update(self, readings, version=None):
+        """Sinkronkan pembacaan dan buang tile di sekitar node yang berubah."""
+        with self._lock:
+            if version is not None and version == self.version:
+                return
+            self.version = version
+            boxes = []
+            for node_id in self._readings.keys() | readings.keys():
+                old = self._readings.get(node_id)
+                new = readings.get(node_id)
+                if old == new:
+                    continue
+                for reading in (old, new):
+                    if reading is not None:
+                        x, y, _, r = reading
+                        boxes.append((x - r, y - r, x + r, y + r))
+            if not boxes:
+                return
+            self._readings = dict(readings)
+            self._set_nodes(self._readings)
+            if len(boxes) > len(self.cache):
+                self.cache.clear()
+            else:
+                self.cache.evict(lambda key: self._tile_touches(key, boxes))
+
+    def _tile_bounds(self, level, tx, ty):
+        x_grid, y_grid = self.axes[level]
+        t = self.tile_cells
+        xs = x_grid[tx * t : (tx + 1) * t]
+        ys = y_grid[ty * t : (ty + 1) * t]
+        return xs, ys
+
+    def _tile_touches(self, key, boxes):
+        xs, ys = self._tile_bounds(*key)
+        return any(
+            x0 <= xs[-1] and xs[0] <= x1 and y0 <= ys[-1] and ys[0] <= y1
+            for x0, y0, x1, y1 in boxes
+        )
+
+    def tile(self, level, tx, ty):
+        """Grid satu tile (baris y x kolom x); dihitung jika belum di cache."""
+        with self._lock:
+            key = (level, tx, ty)
+            grid = self.cache.get(key)
+            if grid is None:
+                xs, ys = self._tile_bounds(level, tx, ty)
+                if self._index is None:
+                    grid = np.full((len(ys), len(xs)), np.nan)
+                else:
+                    grid = interpolate_idw_indexed(
+                        xs,
+                        ys,
+                        self._node_x,
+                        self._node_y,
+                        self._node_temp,
+                        self._node_radius,
+                        self._index,
+                        tile_cells=self.tile_cells,
+                    )
+                grid.flags.writeable = False  # Dipakai bersama oleh semua view
+                self.cache.put(key, grid)
+            return grid
+
+    def view_key(self, viewport):
+        """
+        (level, tx0, tx1, ty0, ty1) untuk viewport ((x0, x1), (y0, y1)).
+
+        Level yang dipilih adalah level terhalus yang masih muat dalam
+        view_cells sel per sumbu. None jika viewport kosong atau cukup
+        ditampilkan dengan overview (level 0).
+        """
+        if viewport is None:
+            return None
+        (x0, x1), (y0, y1) = viewport
+        x0, x1 = max(min(x0, x1), 0), min(max(x0, x1), self.width)
+        y0, y1 = max(min(y0, y1), 0), min(max(y0, y1), self.height)
+        if x1 <= x0 or y1 <= y0:
+            return None
+        span = max(x1 - x0, y1 - y0)
+        level = 0
+        for candidate in range(len(self.resolutions) - 1, 0, -1):
+            if span / self.resolutions[candidate] <= self.view_cells:
+                level = candidate
+                break
+        if level == 0:
+            return None
+        r = self.resolutions[level]
+        t = self.tile_cells
+        x_grid, y_grid = self.axes[level]
+        last_tx = (len(x_grid) - 1) // t
+        last_ty = (len(y_grid) - 1) // t
+        return (
+            level,
+            min(math.floor(x0 / r / t), last_tx),
+            min(math.floor(x1 / r / t), last_tx),
+            min(math.floor(y0 / r / t), last_ty),
+            min(math.floor(y1 / r / t), last_ty),
+        )
+
+    def view(self, key):
+        """Sumbu x, sumbu y, dan grid hasil gabungan tile untuk view_key."""
+        level, tx0, tx1, ty0, ty1 = key
+        t = self.tile_cells
+        x_grid, y_grid = self.axes[level]
+        rows = [
+            np.hstack([self.tile(level, tx, ty) for tx in range(tx0, tx1 + 1)])
+            for ty in range(ty0, ty1 + 1)
+        ]
+        return (
+            x_grid[tx0 * t : (tx1 + 1) * t],
+            y_grid[ty0 * t : (ty1 + 1) * t],
+            np.vstack(rows),
+        )
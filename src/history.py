@@ -0,0 +1,104 @@
+"""
+Query riwayat per node untuk rentang waktu bebas.
+
+Rentang pendek dibaca dari tabel mentah lewat index (node_id, timestamp);
+rentang panjang dibaca dari rollup dengan resolusi paling halus yang masih
+di bawah RAW_LIMIT titik per node. Hasilnya diturunkan ke `points` titik per
+node (LTTB atau min/max) sebelum dikirim ke browser, jadi ukuran payload
+tetap terbatas berapa pun panjang rentangnya.
+"""
+
+import numpy as np
+
+from downsample import DEFAULT_POINTS, METHODS
+from rollup import choose_resolution
+
+RAW_LIMIT = 50_000  # Baris maksimal per node yang dibaca sebelum downsampling
+
+
+class NodeHistory:
+    """Deret satu node: {kolom: (x_epoch, y)} plus info sumber datanya."""
+
+    def __init__(self, node_id, series, rows_read, resolution):
+        self.node_id = node_id
+        self.series = series
+        self.rows_read = rows_read
+        self.resolution = resolution  # None = data mentah
+
+    @property
+    def points(self):
+        return sum(len(x) for x, _ in self.series.values())
+
+
+def _raw_series(conn, store, node_id, columns, start, end):
+    sql, params = store.select_sql(
+        conn,
+        columns=("timestamp",) + tuple(columns),
+        node_id=node_id,
+        start=start,
+        end=end,
+        order_by="timestamp",
+    )
+    rows = conn.execute(sql, params).fetchall()
+    data = np.array(rows, dtype=float).reshape(len(rows), len(columns) + 1)
+    return len(rows), {
+        col: (data[:, 0], data[:, i + 1]) for i, col in enumerate(columns)
+    }
+
+
+def _rollup_series(conn, rollups, resolution, node_id, columns, start, end, method):
+    # min/max: selipkan min dan max setiap bucket agar puncak tidak hilang
+    stats = ("min", "max") if method == "minmax" else ("mean",)
+    sql, params = rollups.select_sql(
+        resolution,
+        columns=columns,
+        node_id=node_id,
+        start=start,
+        end=end,
+        order_by="bucket",
+        stats=stats,
+    )
+    # Kolom pertama node_id (sama untuk semua baris) dibuang
+    rows = [row[1:] for row in conn.execute(sql, params)]
+    width = len(stats)
+    data = np.array(rows, dtype=float).reshape(len(rows), 1 + len(columns) * width)
+    buckets = data[:, 0]
+
+    series = {}
+    for i, col in enumerate(columns):
+        values = data[:, 1 + i * width : 1 + (i + 1) * width]
+        series[col] = (np.repeat(buckets, width), values.ravel())
+    return len(rows), series
+
+
+def load_history(
+    conn,
+    store,
+    rollups,
+    node_ids,
+    start,
+    end,
+    columns=("temperature", "humidity"),
+    points=DEFAULT_POINTS,
+    method="lttb",
+):
+    """
+    Baca dan downsample riwayat setiap node dalam [start, end) (epoch).
+
+    Return {node_id: NodeHistory}; node tanpa data dilewati.
+    """
+    downsample = METHODS[method]
+    resolution = choose_resolution(start, end, max_points=RAW_LIMIT)
+    result = {}
+    for node_id in node_ids:
+        if resolution is None:
+            rows, series = _raw_series(conn, store, node_id, columns, start, end)
+        else:
+            rows, series = _rollup_series(
+                conn, rollups, resolution, node_id, columns, start, end, method
+            )
+        if not rows:
+            continue
+        series = {col: downsample(x, y, points) for col, (x, y) in series.items()}
+        result[node_id] = NodeHistory(node_id, series, rows, resolution)
+    return result
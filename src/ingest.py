@@ -0,0 +1,165 @@
+"""
+Jalur decode payload MQTT yang dipakai bersama oleh kedua dashboard.
+
+Payload di-decode satu kali, divalidasi terhadap skema pembacaan yang tetap,
+dan dikembalikan sebagai Reading bertipe. Backend JSON tercepat yang
+tersedia dipakai (orjson, lalu msgspec, lalu json bawaan). Node juga boleh
+mengirim encoding biner ringkas (lihat encode_binary).
+"""
+
+import json
+import math
+import struct
+import time
+from typing import NamedTuple, Optional
+
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+    JSON_BACKEND = "orjson"
+except ImportError:  # pragma: no cover - tergantung environment
+    try:
+        import msgspec
+
+        _json_loads = msgspec.json.Decoder().decode
+        JSON_BACKEND = "msgspec"
+    except ImportError:
+        _json_loads = json.loads
+        JSON_BACKEND = "json"
+
+# --- FORMAT BINER ---
+# [0xB1][panjang node_id: u8][node_id: utf-8][timestamp: f64][temperature,
+# humidity, pos_x, pos_y: f32], little-endian. pos_x/pos_y NaN = tidak dikirim.
+BINARY_MAGIC = 0xB1
+_BINARY_PREFIX = bytes((BINARY_MAGIC,))
+_BINARY_BODY = struct.Struct("<dffff")
+
+
+class PayloadError(ValueError):
+    """Payload tidak bisa di-decode atau tidak sesuai skema pembacaan."""
+
+
+class Reading(NamedTuple):
+    node_id: str
+    temperature: Optional[float]
+    humidity: Optional[float]
+    pos_x: Optional[float]
+    pos_y: Optional[float]
+    timestamp: float  # Unix epoch (detik)
+
+
+def topic_node_id(topic):
+    """Ambil node_id dari topik (format: base/topic/node_id)."""
+    return topic.rpartition("/")[2] or "unknown"
+
+
+def _finite(key, value):
+    # NaN/inf lolos dari float() dan struct, tapi tidak bisa disimpan
+    if not math.isfinite(value):
+        raise PayloadError(f"Field '{key}' harus angka hingga, bukan {value!r}")
+    return value
+
+
+def _number(payload, key):
+    value = payload.get(key)
+    # type() persis, supaya bool (subclass int) tidak lolos sebagai angka
+    if value is None:
+        return None
+    if type(value) is float:
+        return _finite(key, value)
+    if type(value) is int:
+        return _finite(key, float(value))
+    raise PayloadError(f"Field '{key}' harus angka, bukan {type(value).__name__}")
+
+
+def _timestamp(payload):
+    # Support both 'timestamp' and 'ts' field
+    value = payload.get("timestamp")
+    if value is None:
+        value = payload.get("ts")
+    if value is None:
+        return time.time()
+    if type(value) is bool:
+        raise PayloadError("Field 'timestamp' harus angka, bukan bool")
+    try:
+        value = float(value)
+    except (TypeError, ValueError, OverflowError):
+        raise PayloadError(f"Field 'timestamp' tidak valid: {value!r}") from None
+    return _finite("timestamp", value)
+
+
+def _decode_json(payload, default_node_id):
+    try:
+        data = _json_loads(payload)
+    except ValueError as e:
+        raise PayloadError(f"JSON tidak valid: {e}") from None
+    if type(data) is not dict:
+        raise PayloadError("Payload JSON harus berupa object")
+
+    node_id = data.get("node_id", default_node_id)
+    if type(node_id) is not str:
+        raise PayloadError("Field 'node_id' harus string")
+
+    return Reading(
+        node_id,
+        _number(data, "temperature"),
+        _number(data, "humidity"),
+        _number(data, "pos_x"),
+        _number(data, "pos_y"),
+        _timestamp(data),
+    )
+
+
+def _decode_binary(payload):
+    if len(payload) < 2:
+        raise PayloadError("Payload biner terlalu pendek")
+    id_len = payload[1]
+    body_start = 2 + id_len
+    if len(payload) != body_start + _BINARY_BODY.size:
+        raise PayloadError("Panjang payload biner tidak sesuai")
+    try:
+        node_id = payload[2:body_start].decode("utf-8")
+    except UnicodeDecodeError:
+        raise PayloadError("node_id biner bukan UTF-8") from None
+
+    ts, temp, hum, pos_x, pos_y = _BINARY_BODY.unpack_from(payload, body_start)
+    return Reading(
+        node_id,
+        _finite("temperature", temp),
+        _finite("humidity", hum),
+        None if pos_x != pos_x else _finite("pos_x", pos_x),  # NaN -> tidak dikirim
+        None if pos_y != pos_y else _finite("pos_y", pos_y),
+        _finite("timestamp", ts),
+    )
+
+
+def decode_payload(payload, default_node_id=None):
+    """
+    Decode payload MQTT (JSON atau biner) menjadi Reading.
+
+    default_node_id dipakai jika payload JSON tidak menyertakan node_id
+    (biasanya node_id dari topik). Melempar PayloadError jika tidak valid.
+    """
+    if payload[:1] == _BINARY_PREFIX:
+        return _decode_binary(payload)
+    return _decode_json(payload, default_node_id)
+
+
+def encode_binary(reading):
+    """Encode Reading ke format biner ringkas (kebalikan dari decode_payload)."""
+    node_id = reading.node_id.encode("utf-8")
+    if len(node_id) > 255:
+        raise ValueError("node_id maksimal 255 byte")
+    nan = float("nan")
+    return (
+        bytes((BINARY_MAGIC, len(node_id)))
+        + node_id
+        + _BINARY_BODY.pack(
+            reading.timestamp,
+            reading.temperature,
+            reading.humidity,
+            nan if reading.pos_x is None else reading.pos_x,
+            nan if reading.pos_y is None else reading.pos_y,
+        )
+    )
@@ -0,0 +1,395 @@
+"""
+Service ingestion MQTT mandiri, terpisah dari proses Dash.
+
+Satu subscription MQTT melayani kedua dashboard: pesan di-decode dan
+difilter sekali, ditulis ke semua database sensor (lewat BatchWriter),
+lalu pembacaan terbaru disiarkan ke dashboard lewat socket lokal. Dengan
+begitu throughput ingestion tidak lagi bergantung pada jumlah pengguna
+dashboard yang sedang terhubung.
+
+Protokol socket: satu object JSON per baris.
+
+    {"type": "snapshot", "version": 12, "readings": [[node_id, temperature,
+     humidity, pos_x, pos_y, timestamp], ...]}
+    {"type": "update", "version": 13, "readings": [...]}
+
+Client baru (atau client yang tersambung ulang) selalu menerima "snapshot"
+berisi SNAPSHOT_WINDOW pembacaan terakhir per node, setelah itu hanya
+"update". Client yang terlalu lambat diputus dan akan menerima snapshot
+baru saat tersambung lagi.
+
+    python src/ingest_service.py
+    python src/ingest_service.py --address unix:/tmp/climate_ingest.sock
+
+Dashboard memakai service ini jika MONITORING_INGEST_SERVICE berisi alamat
+yang sama (misal 127.0.0.1:8765).
+"""
+
+import argparse
+import asyncio
+import atexit
+import json
+import os
+import random
+import signal
+import socket
+import sys
+import threading
+import time
+from collections import deque
+
+import paho.mqtt.client as mqtt
+
+from db_writer import BatchWriter
+from ingest import PayloadError, Reading, decode_payload, topic_node_id
+from log_setup import get_logger, setup_logging
+from migrate_db import KNOWN_DATABASES, store_for
+from node_registry import REGISTRY_DB, NodeRegistry
+from rollup import RollupCompactor, RollupStore
+from storage import UPSERT_NODE_INFO_SQL, connect_writer, setup_node_info
+
+try:
+    import orjson
+
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ImportError:  # pragma: no cover - tergantung environment
+    _loads = json.loads
+
+    def _dumps(obj):
+        return json.dumps(obj, separators=(",", ":")).encode()
+
+
+# --- KONFIGURASI ---
+MQTT_BROKER = "broker.hivemq.com"
+ALLOWED_NODES = ["node_001", "node_002"]  # Node awal registry (lihat node_registry.py)
+MQTT_TOPIC_BASE = "Informatika/IoT-E/Kelompok9/multi_node"
+CLIENT_ID = f"ingest_service_{random.randint(0, 10000)}"
+# TCP localhost agar juga jalan di Windows; "unix:/path" untuk Unix socket
+DEFAULT_ADDRESS = "127.0.0.1:8765"
+PUBLISH_INTERVAL = 0.2  # Detik; pembacaan digabung per interval sebelum disiarkan
+SNAPSHOT_WINDOW = 50  # Pembacaan terakhir per node yang dikirim ke client baru
+CLIENT_QUEUE = 256  # Pesan tertunda per client sebelum client dianggap lambat
+RECONNECT_DELAY = 2.0  # Detik sebelum client mencoba tersambung lagi
+
+logger = get_logger("ingest_service")
+
+
+def parse_address(address):
+    """'host:port' -> ("tcp", (host, port)); 'unix:/path' -> ("unix", path)."""
+    if address.startswith("unix:"):
+        return "unix", address[len("unix:") :]
+    host, _, port = address.rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"Alamat service tidak valid: {address!r}")
+    return "tcp", (host, int(port))
+
+
+class Sink:
+    """Satu database tujuan: ClimateStore + BatchWriter + rollup compactor."""
+
+    def __init__(self, db_file):
+        self.store = store_for(db_file, None)
+        self.value_names = tuple(name for name, _ in self.store.columns)
+        # Database dengan posisi node juga menyimpan tabel node_info
+        self.node_info = "pos_x" in self.value_names
+        conn = connect_writer(db_file)
+        try:
+            self.store.setup(conn)
+            if self.node_info:
+                setup_node_info(conn)
+        finally:
+            conn.close()
+        self.writer = BatchWriter(db_file)
+        self.compactor = RollupCompactor(db_file, RollupStore(self.store))
+
+    def submit(self, reading):
+        values = [getattr(reading, name) for name in self.value_names]
+        if any(value is None for value in values):
+            return False
+        epoch = int(reading.timestamp)
+        self.writer.submit(
+            self.store.insert_sql(epoch),
+            (reading.node_id, epoch, *values),
+            node_id=reading.node_id,
+        )
+        if self.node_info:
+            last_seen = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(epoch))
+            self.writer.submit(
+                UPSERT_NODE_INFO_SQL,
+                (reading.node_id, reading.pos_x, reading.pos_y, last_seen),
+            )
+        return True
+
+    def close(self):
+        # Compactor ditutup setelah writer agar baris terakhir ikut di-rollup
+        self.writer.close()
+        self.compactor.close()
+
+
+class IngestService:
+    """
+    Ingestion MQTT + penyiaran snapshot ke dashboard.
+
+    Callback paho berjalan di thread jaringan paho: decode, filter, dan
+    antrean tulis SQLite semuanya non-blocking. Pembacaan yang lolos
+    dimasukkan ke deque; event loop asyncio mengambilnya setiap
+    PUBLISH_INTERVAL, memperbarui state terakhir per node, lalu
+    men-serialisasi satu pesan untuk semua client.
+    """
+
+    def __init__(self, address, sinks, registry, window=SNAPSHOT_WINDOW):
+        self.address = address
+        self.sinks = sinks
+        self.registry = registry  # NodeRegistry (filter + posisi cadangan)
+        self.window = window
+        self.version = 0
+        self.received = 0
+        self.rejected = 0
+        self._pending = deque()  # Diisi thread paho, dikosongkan event loop
+        self._latest = {}  # {node_id: deque(pembacaan terakhir)}
+        self._clients = set()
+
+    # --- SISI MQTT (thread paho) ---
+
+    def on_connect(self, client, userdata, flags, reason_code, properties):
+        if reason_code == 0:
+            # Satu subscription wildcard; filter node lewat registry (O(1))
+            client.subscribe(f"{MQTT_TOPIC_BASE}/+")
+            logger.info("MQTT terhubung, registry %d node", len(self.registry))
+        else:
+            logger.error("Gagal terhubung ke MQTT, code: %s", reason_code)
+
+    def on_message(self, client, userdata, msg):
+        self.received += 1
+        node_id = topic_node_id(msg.topic)
+        if node_id not in self.registry:
+            self.rejected += 1
+            return
+        try:
+            reading = decode_payload(msg.payload, node_id)
+        except PayloadError as e:
+            self.rejected += 1
+            logger.warning("Payload ditolak: %s", e, extra={"node_id": node_id})
+            return
+        try:
+            self.ingest(reading)
+        except Exception as e:
+            # Exception di callback menghentikan loop paho (ingestion semua dashboard)
+            self.rejected += 1
+            logger.error("Error memproses pesan: %s", e, extra={"node_id": node_id})
+
+    def ingest(self, reading):
+        """Simpan satu Reading ke semua database dan antrekan untuk disiarkan."""
+        if reading.node_id not in self.registry:
+            self.rejected += 1
+            return False
+        # Posisi cadangan sama dengan jalur MQTT langsung di dashboard
+        reading = self.registry.fill_position(reading)
+        stored = [sink.submit(reading) for sink in self.sinks]
+        if not any(stored):
+            self.rejected += 1
+            return False
+        self._pending.append(reading)
+        return True
+
+    # --- SISI SOCKET (event loop asyncio) ---
+
+    def _drain_pending(self):
+        readings = []
+        while self._pending:
+            reading = self._pending.popleft()
+            readings.append(reading)
+            latest = self._latest.get(reading.node_id)
+            if latest is None:
+                latest = deque(maxlen=self.window)
+                self._latest[reading.node_id] = latest
+            latest.append(reading)
+        return readings
+
+    def _message(self, kind, readings):
+        rows = [tuple(reading) for reading in readings]
+        return _dumps({"type": kind, "version": self.version, "readings": rows}) + b"\n"
+
+    def snapshot_message(self):
+        readings = [r for latest in self._latest.values() for r in latest]
+        return self._message("snapshot", readings)
+
+    async def publish_forever(self):
+        while True:
+            await asyncio.sleep(PUBLISH_INTERVAL)
+            readings = self._drain_pending()
+            if not readings:
+                continue
+            self.version += 1
+            # Serialisasi sekali untuk semua client
+            message = self._message("update", readings)
+            for queue in list(self._clients):
+                if queue.qsize() >= CLIENT_QUEUE:
+                    # Client tertinggal terlalu jauh: putus, nanti dapat snapshot baru
+                    self._clients.discard(queue)
+                    queue.put_nowait(None)
+                else:
+                    queue.put_nowait(message)
+
+    async def handle_client(self, reader, writer):
+        peer = writer.get_extra_info("peername") or "unix"
+        # Pembacaan yang belum disiarkan menyusul lewat update berikutnya
+        queue = asyncio.Queue()  # Panjangnya dibatasi di publish_forever
+        queue.put_nowait(self.snapshot_message())
+        self._clients.add(queue)
+        logger.info("Dashboard tersambung: %s (%d client)", peer, len(self._clients))
+        try:
+            while True:
+                message = await queue.get()
+                if message is None:
+                    logger.warning("Client %s terlalu lambat, diputus", peer)
+                    break
+                writer.write(message)
+                await writer.drain()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self._clients.discard(queue)
+            writer.close()
+            logger.info("Dashboard terputus: %s", peer)
+
+    async def serve(self):
+        kind, target = parse_address(self.address)
+        if kind == "unix":
+            if os.path.exists(target):
+                os.remove(target)  # Sisa socket dari proses sebelumnya
+            server = await asyncio.start_unix_server(self.handle_client, target)
+        else:
+            server = await asyncio.start_server(self.handle_client, *target)
+        logger.info("Snapshot disiarkan di %s", self.address)
+        async with server:
+            await self.publish_forever()
+
+
+class SnapshotSubscriber:
+    """
+    Client service untuk dashboard (thread biasa, bukan asyncio).
+
+    on_readings(readings, reset) dipanggil untuk setiap pesan; reset=True
+    berarti pesan adalah snapshot penuh dan state lama harus dibuang dulu.
+    Sambungan yang putus dicoba lagi setiap RECONNECT_DELAY detik.
+    """
+
+    def __init__(self, address, on_readings, reconnect_delay=RECONNECT_DELAY):
+        self.address = address
+        self.on_readings = on_readings
+        self.reconnect_delay = reconnect_delay
+        self.version = None
+        self.messages = 0
+        self._stop = threading.Event()
+        self._sock = None
+        self._thread = threading.Thread(
+            target=self._run, name="ingest-subscriber", daemon=True
+        )
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._stop.set()
+        sock = self._sock
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self._thread.join(timeout=5.0)
+
+    def _connect(self):
+        kind, target = parse_address(self.address)
+        if kind == "unix":
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.connect(target)
+            return sock
+        return socket.create_connection(target)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._sock = self._connect()
+                logger.info("Tersambung ke service ingestion %s", self.address)
+                with self._sock, self._sock.makefile("rb") as stream:
+                    for line in stream:
+                        message = _loads(line)
+                        readings = [Reading(*r) for r in message["readings"]]
+                        self.version = message["version"]
+                        self.messages += 1
+                        self.on_readings(readings, message["type"] == "snapshot")
+            except OSError as e:
+                if not self._stop.is_set():
+                    logger.warning(
+                        "Service ingestion %s tidak tersedia: %s", self.address, e
+                    )
+            except Exception as e:
+                logger.error("Error memproses snapshot: %s", e)
+            finally:
+                self._sock = None
+            self._stop.wait(self.reconnect_delay)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Service ingestion MQTT untuk kedua dashboard."
+    )
+    parser.add_argument("--address", default=DEFAULT_ADDRESS)
+    parser.add_argument("--broker", default=MQTT_BROKER)
+    parser.add_argument(
+        "--db",
+        action="append",
+        help="Database tujuan (bisa diulang). Default: kedua database bawaan.",
+    )
+    parser.add_argument(
+        "--node", action="append", help="Node awal registry (bisa diulang)."
+    )
+    args = parser.parse_args(argv)
+
+    setup_logging()
+    sinks = [Sink(db_file) for db_file in args.db or list(KNOWN_DATABASES)]
+    for sink in sinks:
+        atexit.register(sink.close)
+    registry = NodeRegistry(REGISTRY_DB, args.node or ALLOWED_NODES).start()
+    atexit.register(registry.close)
+    service = IngestService(args.address, sinks, registry)
+
+    client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, CLIENT_ID)
+    client.on_connect = service.on_connect
+    client.on_message = service.on_message
+    try:
+        client.connect(args.broker, 1883, 60)
+    except Exception as e:
+        print(f"Gagal terhubung ke broker MQTT: {e}")
+        return 1
+    client.loop_start()
+
+    print("=== Service Ingestion Multi-Node ===")
+    print(f"Database: {[sink.store.db_file for sink in sinks]}")
+    print(f"Registry Node: {list(registry.node_ids)} (hot reload dari {REGISTRY_DB})")
+    print(f"Snapshot disiarkan di {args.address}")
+
+    loop = asyncio.new_event_loop()
+    task = loop.create_task(service.serve())
+    if hasattr(signal, "SIGTERM"):
+        try:
+            loop.add_signal_handler(signal.SIGTERM, task.cancel)
+        except NotImplementedError:  # Windows
+            pass
+    try:
+        loop.run_until_complete(task)
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    finally:
+        client.loop_stop()
+        client.disconnect()
+        loop.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,23 +1,53 @@
 import dash
 from dash import dcc, html
-from dash.dependencies import Input, Output
+from dash.dependencies import Input, Output, State
 import plotly.graph_objects as go
 import paho.mqtt.client as mqtt
-import sqlite3
-import json
-from datetime import datetime
+from datetime import date, datetime, timedelta
 import threading
-from collections import deque
+import time
+import os
 import sys
 import random
+import atexit
+
+import numpy as np
+
+from db_writer import BatchWriter
+from figure_cache import FigureCache, serialize_figure, typed_array
+from history import load_history
+from ingest import decode_payload, topic_node_id
+from ingest_service import SnapshotSubscriber
+from log_setup import get_logger, setup_logging
+from metrics import (
+    CALLBACK_SECONDS,
+    LOCK_WAIT_SECONDS,
+    MESSAGES_PARSED,
+    MESSAGES_RECEIVED,
+    MESSAGES_REJECTED,
+    ON_MESSAGE_SECONDS,
+    UNREGISTERED_NODE,
+    TimedLock,
+    serve_metrics,
+)
+from node_registry import REGISTRY_DB, NodeRegistry
+from rollup import RollupCompactor, RollupStore
+from ring_buffer import NodeBuffers
+from storage import CLIMATE_COLUMNS, ClimateStore, ReaderPool, connect_writer
 
 # --- KONFIGURASI ---
 MQTT_BROKER = "broker.hivemq.com"
-# Ganti topik wildcard dengan list node yang diizinkan
-ALLOWED_NODES = ["node_001", "node_002"]  # Hanya node ini yang diizinkan
+# Node awal registry; node lain didaftarkan di tabel node_info lewat
+# node_registry.py dan ikut diizinkan tanpa restart (hot reload)
+ALLOWED_NODES = ["node_001", "node_002"]
 MQTT_TOPIC_BASE = "Informatika/IoT-E/Kelompok9/multi_node"
 DB_FILE = "climate_data.db"
+# Pecah tabel climate per "day" / "month" agar data lama mudah di-drop/arsip
+PARTITION_SCHEME = None
 CLIENT_ID = f"dashboard_client_iot_project_{random.randint(0, 10000)}"
+# Alamat ingest_service.py (misal 127.0.0.1:8765). Kosong = dashboard
+# subscribe MQTT dan menulis database sendiri.
+INGEST_SERVICE = os.environ.get("MONITORING_INGEST_SERVICE")
 
 # --- THRESHOLD PERINGATAN ---
 TEMP_LOW = 15.0
@@ -26,47 +56,83 @@ TEMP_VERY_HIGH = 40.0  # >40 dianggap sangat tinggi (opsional)
 HUM_LOW = 30.0
 HUM_HIGH = 70.0
 
+# --- LOGGING ---
+# Level diatur lewat MONITORING_LOG_LEVEL; log per pesan ada di level DEBUG
+setup_logging()
+logger = get_logger("line_dashboard")
+
 # --- SETUP DATA ---
-live_data = deque(maxlen=50)
-data_lock = threading.Lock()
+LIVE_WINDOW = 50  # Jumlah titik per node yang ditampilkan di grafik real-time
+NODE_WINDOWS = {}  # Override jendela per node, misal {"node_001": 200}
+LIVE_COLUMNS = {
+    "timestamp": "datetime64[ms]",
+    "temperature": "f8",
+    "humidity": "f8",
+    "seq": "i8",
+}
+# Ring buffer per node: node yang sering mengirim tidak menggeser riwayat node lain
+live_data = NodeBuffers(LIVE_COLUMNS, LIVE_WINDOW, NODE_WINDOWS)
+data_lock = TimedLock(LOCK_WAIT_SECONDS.labels("data_lock"))  # Catat lama menunggu
+data_version = 0  # Naik setiap ada data baru; juga dipakai sebagai seq per titik
+live_generation = 0  # Naik jika buffer live diganti (snapshot service); paksa redraw
+alert_cache = FigureCache()
+figure_cache = FigureCache()
+
+# --- RIWAYAT ---
+HISTORY_DEFAULT_DAYS = 7  # Rentang awal date picker
+HISTORY_POINTS = 1000  # Titik per node per grafik setelah downsampling
+
+
+# Tabel climate: timestamp epoch integer + index (node_id, timestamp)
+climate_store = ClimateStore(DB_FILE, "climate", CLIMATE_COLUMNS, PARTITION_SCHEME)
 
 
 def setup_database():
-    conn = sqlite3.connect(DB_FILE, check_same_thread=False)
-    cursor = conn.cursor()
-    cursor.execute(
-        """
-        CREATE TABLE IF NOT EXISTS climate (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            node_id TEXT NOT NULL,
-            timestamp DATETIME NOT NULL,
-            temperature REAL NOT NULL,
-            humidity REAL NOT NULL
-        )"""
-    )
-    conn.commit()
+    conn = connect_writer(DB_FILE)  # Sekaligus mengaktifkan WAL
+    # Membuat tabel, atau memigrasikan tabel lama (timestamp string) otomatis
+    climate_store.setup(conn)
+    conn.close()
     print(f"Database '{DB_FILE}' siap.")
-    return conn
 
 
-db_conn = setup_database()
+setup_database()
+
+# Rollup 1m/1h/1d per node diperbarui berkala dari baris mentah yang baru masuk
+rollups = RollupStore(climate_store)
+if INGEST_SERVICE:
+    # Database ditulis (dan rollup di-compact) oleh service ingestion
+    rollup_compactor = db_writer = None
+else:
+    rollup_compactor = RollupCompactor(DB_FILE, rollups)
+    atexit.register(rollup_compactor.close)
+
+    # Semua INSERT lewat writer thread agar thread MQTT tidak menunggu commit
+    db_writer = BatchWriter(DB_FILE)
+    atexit.register(db_writer.close)
+
+# Koneksi read-only untuk query dari callback Dash (tidak mengganggu writer)
+reader_pool = ReaderPool(DB_FILE)
+atexit.register(reader_pool.close)
+
+# Node yang diizinkan + warnanya, dari node_info di database multi-node
+node_registry = NodeRegistry(REGISTRY_DB, ALLOWED_NODES).start()
+atexit.register(node_registry.close)
 
 # --- LOGIKA MQTT ---
 
 
 def on_connect(client, userdata, flags, reason_code, properties):
     if reason_code == 0:
-        print("MQTT Terhubung! Mengirim permintaan subscribe...")
+        logger.info("MQTT Terhubung! Mengirim permintaan subscribe...")
 
-        # Subscribe ke setiap node yang diizinkan
-        for node_id in ALLOWED_NODES:
-            topic = f"{MQTT_TOPIC_BASE}/{node_id}"
-            result = client.subscribe(topic)
-            print(f"Subscribe to {topic} - Result: {result}")
+        # Satu subscription wildcard; filter node lewat registry (O(1))
+        topic = f"{MQTT_TOPIC_BASE}/+"
+        result = client.subscribe(topic)
+        logger.info("Subscribe to %s - Result: %s", topic, result)
 
-        print(f"Listening to nodes: {ALLOWED_NODES}")
+        logger.info("Registry node: %d node", len(node_registry))
     else:
-        print(f"Gagal terhubung ke MQTT, code: {reason_code}")
+        logger.error("Gagal terhubung ke MQTT, code: %s", reason_code)
 
 
 def on_subscribe(client, userdata, mid, reason_codes, properties):
@@ -74,67 +140,119 @@ def on_subscribe(client, userdata, mid, reason_codes, properties):
     success_count = sum(1 for rc in reason_codes if rc < 128)
     failed_count = len(reason_codes) - success_count
 
-    print(f"Subscribe result - Success: {success_count}, Failed: {failed_count}")
+    logger.info(
+        "Subscribe result - Success: %d, Failed: %d", success_count, failed_count
+    )
     if failed_count > 0:
-        print(f"Failed reason codes: {[rc for rc in reason_codes if rc >= 128]}")
+        logger.warning(
+            "Failed reason codes: %s", [rc for rc in reason_codes if rc >= 128]
+        )
 
 
 def on_message(client, userdata, msg):
-    # DIAGNOSTIK 2: Cetak pesan mentah SEGERA setelah diterima
-    print(f"--> Pesan mentah diterima di topik '{msg.topic}': {msg.payload.decode()}")
-
+    start = time.perf_counter()
+    node_label = UNREGISTERED_NODE
     try:
         # Extract node_id dari topik (format: base/topic/node_id)
-        topic_parts = msg.topic.split("/")
-        node_id_from_topic = topic_parts[-1] if len(topic_parts) > 0 else "unknown"
+        node_id_from_topic = topic_node_id(msg.topic)
 
         # Filter: Hanya terima data dari node yang diizinkan
-        if node_id_from_topic not in ALLOWED_NODES:
-            print(f"Node {node_id_from_topic} tidak diizinkan. Data diabaikan.")
+        if node_id_from_topic not in node_registry:
+            MESSAGES_RECEIVED.labels(node_label).inc()
+            MESSAGES_REJECTED.labels(node_label, "not_allowed").inc()
+            logger.warning(
+                "Node %s tidak diizinkan. Data diabaikan.",
+                node_id_from_topic,
+                extra={"node_id": UNREGISTERED_NODE},
+            )
             return
 
-        payload = json.loads(msg.payload.decode("utf-8"))
+        node_label = node_id_from_topic
+        MESSAGES_RECEIVED.labels(node_label).inc()
 
-        # Ambil data dari payload
-        node_id = payload.get("node_id", node_id_from_topic)
+        # Decode + validasi payload satu kali (JSON atau biner)
+        reading = decode_payload(msg.payload, node_id_from_topic)
+        MESSAGES_PARSED.labels(node_label).inc()
 
-        # Double check: pastikan node_id di payload juga sesuai
-        if node_id not in ALLOWED_NODES:
-            print(f"Node ID dalam payload ({node_id}) tidak diizinkan. Data diabaikan.")
-            return
+        # DIAGNOSTIK 2: Pesan yang diterima (hanya diformat jika level DEBUG aktif)
+        logger.debug(
+            "Pesan diterima: %s",
+            reading,
+            extra={"node_id": reading.node_id, "topic": msg.topic},
+        )
+
+        store_reading(reading)
 
-        temp = payload.get("temperature")
-        hum = payload.get("humidity")
+    except Exception as e:
+        MESSAGES_REJECTED.labels(node_label, "invalid").inc()
+        logger.error("Error memproses pesan: %s", e, extra={"topic": msg.topic})
+    finally:
+        ON_MESSAGE_SECONDS.observe(time.perf_counter() - start)
 
-        # Support both 'ts' and 'timestamp' field
-        ts_val = payload.get("timestamp")
-        if ts_val is None:
-            ts_val = payload.get("ts")
-        ts = float(ts_val) if ts_val is not None else datetime.now().timestamp()
 
-        dt_object = datetime.fromtimestamp(ts)
+def store_reading(reading, persist=True):
+    """Simpan satu Reading ke database (jika persist) dan ke buffer live"""
+    global data_version
 
-        print(f"Data diterima dari {node_id}: T={temp}°C, H={hum}%")
+    node_id = reading.node_id
 
-        if temp is not None and hum is not None:
-            cursor = db_conn.cursor()
-            cursor.execute(
-                "INSERT INTO climate (node_id, timestamp, temperature, humidity) VALUES (?, ?, ?, ?)",
-                (node_id, dt_object.strftime("%Y-%m-%d %H:%M:%S"), temp, hum),
+    # Double check: pastikan node_id di payload juga sesuai
+    if node_id not in node_registry:
+        MESSAGES_REJECTED.labels(UNREGISTERED_NODE, "not_allowed").inc()
+        logger.warning(
+            "Node ID dalam payload (%s) tidak diizinkan. Data diabaikan.",
+            node_id,
+            extra={"node_id": UNREGISTERED_NODE},
+        )
+        return
+
+    temp = reading.temperature
+    hum = reading.humidity
+    dt_object = datetime.fromtimestamp(reading.timestamp)
+
+    if temp is not None and hum is not None:
+        if persist:
+            epoch = int(reading.timestamp)
+            db_writer.submit(
+                climate_store.insert_sql(epoch),
+                (node_id, epoch, temp, hum),
+                node_id=node_id,
             )
-            db_conn.commit()
 
-            with data_lock:
-                live_data.append((dt_object, temp, hum, node_id))  # Tambah node_id
-        else:
-            print(f"Data tidak lengkap dari {node_id}: temp={temp}, hum={hum}")
+        with data_lock:
+            data_version += 1
+            live_data.append(
+                node_id, np.datetime64(dt_object, "ms"), temp, hum, data_version
+            )
+    else:
+        MESSAGES_REJECTED.labels(node_id, "incomplete").inc()
+        logger.warning(
+            "Data tidak lengkap: temp=%s, hum=%s",
+            temp,
+            hum,
+            extra={"node_id": node_id},
+        )
 
-    except Exception as e:
-        print(f"Error memproses pesan: {e}")
+
+def on_service_readings(readings, reset):
+    """Pembacaan dari service ingestion (sudah disimpan ke database oleh service)"""
+    global live_data, live_generation
+
+    if reset:
+        # Snapshot penuh setelah (re)connect: buang buffer lama agar tidak dobel
+        with data_lock:
+            live_data = NodeBuffers(LIVE_COLUMNS, LIVE_WINDOW, NODE_WINDOWS)
+            live_generation += 1
+    for reading in readings:
+        try:
+            store_reading(reading, persist=False)
+        except Exception as e:
+            logger.error("Error memproses pembacaan service: %s", e)
 
 
 # --- APLIKASI DASH (Tidak ada perubahan di sini) ---
 app = dash.Dash(__name__)
+serve_metrics(app.server)  # Metrik Prometheus di /metrics
 # ... (sisa layout Dash sama persis)
 app.title = "Climate Monitor"
 
@@ -182,7 +300,40 @@ app.layout = html.Div(
                 dcc.Graph(id="graph-kelembaban"),
             ],
         ),
+        html.Div(
+            className="history-container",
+            style={"marginTop": "30px"},
+            children=[
+                html.H2(children="Riwayat Data", style={"textAlign": "center"}),
+                html.Div(
+                    style={"display": "flex", "gap": "20px", "alignItems": "center"},
+                    children=[
+                        dcc.DatePickerRange(
+                            id="history-range",
+                            start_date=date.today()
+                            - timedelta(days=HISTORY_DEFAULT_DAYS),
+                            end_date=date.today(),
+                            display_format="YYYY-MM-DD",
+                        ),
+                        dcc.RadioItems(
+                            id="history-method",
+                            options=[
+                                {"label": "LTTB", "value": "lttb"},
+                                {"label": "Min/Max", "value": "minmax"},
+                            ],
+                            value="lttb",
+                            inline=True,
+                        ),
+                        html.Span(id="history-info", style={"color": "#999"}),
+                    ],
+                ),
+                dcc.Graph(id="history-suhu"),
+                dcc.Graph(id="history-kelembaban"),
+            ],
+        ),
         dcc.Interval(id="interval-component", interval=1 * 1000, n_intervals=0),
+        # Versi data dan urutan trace terakhir yang sudah diterima browser ini
+        dcc.Store(id="client-state-store", data=None),
     ],
 )
 
@@ -191,39 +342,144 @@ app.layout = html.Div(
     [
         Output("alert-container", "children"),
         Output("graph-suhu", "figure"),
+        Output("graph-suhu", "extendData"),
         Output("graph-kelembaban", "figure"),
+        Output("graph-kelembaban", "extendData"),
+        Output("client-state-store", "data"),
     ],
     [Input("interval-component", "n_intervals")],
+    [State("client-state-store", "data")],
 )
-def update_graphs(_):
+@CALLBACK_SECONDS.labels("update_graphs").time()
+def update_graphs(_, client_state):
     with data_lock:
-        if not live_data:
-            empty_fig = go.Figure().update_layout(
-                title_text="Menunggu Data...", template="plotly_dark"
-            )
-            return (
-                "Menunggu data sensor...",
-                empty_fig,
-                empty_fig,
-            )
+        version = data_version
+        generation = live_generation
+        snapshot = live_data.snapshot()
+    registry_version = node_registry.version
+
+    last_version = client_state["version"] if client_state else None
+
+    # Browser ini sudah punya versi terbaru: tidak ada yang perlu dikirim
+    if version == last_version and client_state.get("registry") == registry_version:
+        return (dash.no_update,) * 6
+
+    nodes = plotted_nodes(snapshot)
+    cache_key = (version, registry_version)
+    alert_container = alert_cache.get(cache_key, lambda: build_alerts(snapshot))
+    new_state = {
+        "version": version,
+        "nodes": nodes,
+        "generation": generation,
+        "registry": registry_version,
+    }
+
+    # Redraw penuh hanya jika browser baru, set node berubah, buffer live
+    # diganti, atau registry (misal warna node) berubah. Browser yang
+    # tertinggal cukup menerima seluruh jendela lewat extendData + maxPoints.
+    if (
+        client_state is None
+        or client_state["nodes"] != nodes
+        or client_state.get("generation") != generation
+        or client_state.get("registry") != registry_version
+    ):
+        fig_suhu, fig_kelembaban = figure_cache.get(
+            cache_key, lambda: build_figures(snapshot)
+        )
+        return (
+            alert_container,
+            fig_suhu,
+            dash.no_update,
+            fig_kelembaban,
+            dash.no_update,
+            new_state,
+        )
+
+    # Streaming: kirim hanya titik baru sejak versi terakhir browser ini
+    extend_suhu, extend_kelembaban = build_extend_data(snapshot, nodes, last_version)
+    return (
+        alert_container,
+        dash.no_update,
+        extend_suhu,
+        dash.no_update,
+        extend_kelembaban,
+        new_state,
+    )
+
+
+def date_ms(timestamps):
+    """
+    datetime64 (waktu lokal) -> milidetik untuk sumbu date Plotly.
 
-        # Get latest data for each node
-        latest_data_per_node = {}
-        for ts, temp, hum, node_id in live_data:
-            if (
-                node_id not in latest_data_per_node
-                or ts > latest_data_per_node[node_id]["timestamp"]
-            ):
-                latest_data_per_node[node_id] = {
-                    "timestamp": ts,
-                    "temperature": temp,
-                    "humidity": hum,
-                }
+    Plotly menampilkan angka milidetik apa adanya sebagai jam dinding, jadi
+    titik bisa dikirim sebagai typed array float, bukan string ISO per titik.
+    """
+    return timestamps.astype("datetime64[ms]").astype(np.int64).astype(float)
+
+
+def local_ms(epoch_seconds):
+    """Epoch UTC (detik) -> milidetik waktu lokal, seperti datetime.fromtimestamp."""
+    x = np.asarray(epoch_seconds, dtype=float)
+    if not len(x):
+        return x
+
+    def offset(ts):
+        return datetime.fromtimestamp(ts).astimezone().utcoffset().total_seconds()
+
+    if offset(x[0]) == offset(x[-1]):
+        return (x + offset(x[0])) * 1000.0
+    # Rentang melewati pergantian DST: offset dihitung per titik
+    return (x + np.array([offset(ts) for ts in x.tolist()])) * 1000.0
+
+
+def plotted_nodes(snapshot):
+    """Node yang punya data, dalam urutan trace di grafik"""
+    return sorted(node_id for node_id in snapshot if node_id in node_registry)
+
+
+def build_extend_data(snapshot, nodes, last_version):
+    """Payload extendData (titik baru per trace) untuk grafik suhu dan kelembaban"""
+    trace_indices, xs, temps, hums, max_points = [], [], [], [], []
+    for index, node_id in enumerate(nodes):
+        columns = snapshot[node_id]
+        new = columns["seq"] > last_version
+        if not new.any():
+            continue
+        trace_indices.append(index)
+        xs.append(date_ms(columns["timestamp"][new]).tolist())
+        temps.append(columns["temperature"][new].tolist())
+        hums.append(columns["humidity"][new].tolist())
+        max_points.append(live_data.window(node_id))
+
+    if not trace_indices:
+        return dash.no_update, dash.no_update
+
+    # maxPoints membatasi panjang tiap trace di browser sesuai jendela node-nya
+    max_points = {"x": max_points, "y": max_points}
+    return (
+        [{"x": xs, "y": temps}, trace_indices, max_points],
+        [{"x": xs, "y": hums}, trace_indices, max_points],
+    )
+
+
+def build_alerts(snapshot):
+    if not snapshot:
+        return "Menunggu data sensor..."
+
+    # Get latest data for each node
+    latest_data_per_node = {
+        node_id: {
+            "timestamp": columns["timestamp"][-1].item(),
+            "temperature": float(columns["temperature"][-1]),
+            "humidity": float(columns["humidity"][-1]),
+        }
+        for node_id, columns in snapshot.items()
+    }
 
     # --- Logika peringatan untuk SEMUA node ---
     alerts = []
 
-    for node_id in ALLOWED_NODES:
+    for node_id in node_registry.node_ids:
         if node_id not in latest_data_per_node:
             # Node tidak mengirim data
             alerts.append(
@@ -324,28 +580,32 @@ def update_graphs(_):
         alerts.append(html.Div(children=node_alerts, style={"marginBottom": "8px"}))
 
     # Container untuk semua alerts
-    alert_container = html.Div(children=alerts)
+    return html.Div(children=alerts)
+
+
+def build_figures(snapshot):
+    if not snapshot:
+        empty_fig = serialize_figure(
+            go.Figure().update_layout(
+                title_text="Menunggu Data...", template="plotly_dark"
+            )
+        )
+        return empty_fig, empty_fig
 
     # --- Grafik dengan color coding per node ---
     fig_suhu = go.Figure()
     fig_kelembaban = go.Figure()
 
-    # Warna berbeda untuk setiap node
-    node_colors = {
-        "node_001": "#FF5733",
-        "node_002": "#33FF57",
-        "node_003": "#3357FF",
-        "node_004": "#FF33F5",
-    }
-
-    for node_id in ALLOWED_NODES:
+    for node_id in plotted_nodes(snapshot):
         # Filter data for this node
-        node_timestamps = [ts for ts, _, _, nid in live_data if nid == node_id]
-        node_temps = [temp for _, temp, _, nid in live_data if nid == node_id]
-        node_hums = [hum for _, _, hum, nid in live_data if nid == node_id]
+        columns = snapshot.get(node_id)
 
-        if node_timestamps:  # Only add if there's data
-            color = node_colors.get(node_id, "#FFFFFF")
+        if columns is not None:  # Only add if there's data
+            # Typed array (bdata) dibuat sekali per versi, disimpan di cache
+            node_timestamps = typed_array(date_ms(columns["timestamp"]))
+            node_temps = typed_array(columns["temperature"])
+            node_hums = typed_array(columns["humidity"])
+            color = node_registry.color(node_id)
 
             fig_suhu.add_trace(
                 go.Scatter(
@@ -372,6 +632,7 @@ def update_graphs(_):
     # Update layout untuk grafik suhu
     fig_suhu.update_layout(
         title="Grafik Suhu Real-time (Multi-Node)",
+        xaxis_type="date",
         yaxis_title="Suhu (°C)",
         template="plotly_dark",
         margin=dict(l=40, r=40, t=40, b=40),
@@ -383,6 +644,7 @@ def update_graphs(_):
     fig_kelembaban.update_layout(
         title="Grafik Kelembaban Real-time (Multi-Node)",
         xaxis_title="Waktu",
+        xaxis_type="date",
         yaxis_title="Kelembaban (%)",
         template="plotly_dark",
         margin=dict(l=40, r=40, t=40, b=40),
@@ -390,27 +652,116 @@ def update_graphs(_):
         showlegend=True,
     )
 
-    return alert_container, fig_suhu, fig_kelembaban
+    return serialize_figure(fig_suhu), serialize_figure(fig_kelembaban)
+
+
+@app.callback(
+    [
+        Output("history-suhu", "figure"),
+        Output("history-kelembaban", "figure"),
+        Output("history-info", "children"),
+    ],
+    [
+        Input("history-range", "start_date"),
+        Input("history-range", "end_date"),
+        Input("history-method", "value"),
+    ],
+)
+@CALLBACK_SECONDS.labels("update_history").time()
+def update_history(start_date, end_date, method):
+    if not start_date or not end_date:
+        return dash.no_update, dash.no_update, "Pilih rentang tanggal."
+
+    # Tanggal dari date picker dalam waktu lokal; tanggal akhir ikut dihitung
+    start = int(datetime.fromisoformat(start_date[:10]).timestamp())
+    end = int((datetime.fromisoformat(end_date[:10]) + timedelta(days=1)).timestamp())
+
+    started = datetime.now()
+    with reader_pool.connection() as conn:
+        history = load_history(
+            conn,
+            climate_store,
+            rollups,
+            node_registry.node_ids,
+            start,
+            end,
+            points=HISTORY_POINTS,
+            method=method,
+        )
+    elapsed_ms = (datetime.now() - started).total_seconds() * 1000.0
+
+    fig_suhu, fig_kelembaban = build_history_figures(history)
+    rows = sum(node.rows_read for node in history.values())
+    points = sum(node.points for node in history.values())
+    sources = {node.resolution or "mentah" for node in history.values()}
+    info = (
+        f"{points} titik dari {rows} baris ({', '.join(sorted(sources)) or '-'}), "
+        f"{elapsed_ms:.0f} ms"
+    )
+    return fig_suhu, fig_kelembaban, info
+
+
+def build_history_figures(history):
+    """Figure riwayat suhu dan kelembaban dari hasil load_history"""
+    figures = []
+    for column, title, y_title in (
+        ("temperature", "Riwayat Suhu", "Suhu (°C)"),
+        ("humidity", "Riwayat Kelembaban", "Kelembaban (%)"),
+    ):
+        fig = go.Figure()
+        for node_id, node in history.items():
+            x, y = node.series[column]
+            fig.add_trace(
+                go.Scattergl(
+                    # Epoch UTC -> waktu lokal, sama seperti grafik real-time
+                    x=typed_array(local_ms(x)),
+                    y=typed_array(y),
+                    mode="lines",
+                    name=f"{node_id}",
+                    line=dict(color=node_registry.color(node_id), width=1.5),
+                )
+            )
+        fig.update_layout(
+            title=title if history else f"{title} (tidak ada data)",
+            xaxis_type="date",
+            yaxis_title=y_title,
+            template="plotly_dark",
+            margin=dict(l=40, r=40, t=40, b=40),
+            legend=dict(
+                orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1
+            ),
+        )
+        figures.append(serialize_figure(fig))
+    return figures
 
 
 # --- JALANKAN SERVER DAN INISIALISASI MQTT ---
 if __name__ == "__main__":
-    mqtt_client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, CLIENT_ID)
-    mqtt_client.on_connect = on_connect
-    mqtt_client.on_message = on_message
-    mqtt_client.on_subscribe = on_subscribe
+    print("=== Line Dashboard Multi-Node ===")
+    print(
+        f"Registry Node: {list(node_registry.node_ids)} (hot reload dari {REGISTRY_DB})"
+    )
 
-    try:
-        mqtt_client.connect(MQTT_BROKER, 1883)
-    except Exception as e:
-        print(f"Gagal terhubung ke broker MQTT: {e}")
-        sys.exit(1)
+    if INGEST_SERVICE:
+        # Data datang dari ingest_service.py, bukan subscription sendiri
+        subscriber = SnapshotSubscriber(INGEST_SERVICE, on_service_readings).start()
+        atexit.register(subscriber.close)
+        print(f"Service ingestion: {INGEST_SERVICE}")
+    else:
+        mqtt_client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, CLIENT_ID)
+        mqtt_client.on_connect = on_connect
+        mqtt_client.on_message = on_message
+        mqtt_client.on_subscribe = on_subscribe
 
-    mqtt_client.loop_start()
+        try:
+            mqtt_client.connect(MQTT_BROKER, 1883)
+        except Exception as e:
+            print(f"Gagal terhubung ke broker MQTT: {e}")
+            sys.exit(1)
+
+        mqtt_client.loop_start()
+        print(f"MQTT Topic: {MQTT_TOPIC_BASE}/+")
 
-    print("=== Line Dashboard Multi-Node ===")
-    print(f"Allowed Nodes: {ALLOWED_NODES}")
-    print(f"MQTT Topics: {[f'{MQTT_TOPIC_BASE}/{node}' for node in ALLOWED_NODES]}")
     print("Dashboard akan berjalan di http://127.0.0.1:8050")
 
     app.run(debug=True, use_reloader=False)
@@ -0,0 +1,148 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+# --- KONFIGURASI LOGGING ---
+# Level bisa diubah tanpa edit kode, misal: set MONITORING_LOG_LEVEL=DEBUG
+LOG_LEVEL = os.environ.get("MONITORING_LOG_LEVEL", "INFO").upper()
+RATE_LIMIT_INTERVAL = 5.0  # Detik; maksimal satu log yang sama per node per interval
+RATE_LIMIT_MAX_KEYS = 1024  # Batas kombinasi (logger, node_id, pesan) yang dilacak
+ROOT_LOGGER = "monitoring"
+
+_listener = None
+_setup_lock = threading.Lock()
+
+
+class NodeRateLimitFilter(logging.Filter):
+    """
+    Batasi log per node: record dengan node_id dan format pesan yang sama
+    hanya diteruskan sekali per RATE_LIMIT_INTERVAL. Jumlah record yang
+    ditahan ikut dicatat di record berikutnya sebagai field 'suppressed'.
+
+    State yang sudah lewat interval (tanpa record tertahan) dibuang berkala,
+    dan jumlahnya dibatasi max_keys (yang paling lama tidak diteruskan
+    dibuang lebih dulu), jadi node_id dari luar tidak bisa membuat state
+    tumbuh tanpa batas.
+    """
+
+    def __init__(self, interval=RATE_LIMIT_INTERVAL, max_keys=RATE_LIMIT_MAX_KEYS):
+        super().__init__()
+        self.interval = interval
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        # {(logger, node_id, msg): [last_emit, suppressed]}, urut last_emit (LRU)
+        self._state = OrderedDict()
+        self._next_sweep = time.monotonic() + interval
+
+    def filter(self, record):
+        node_id = getattr(record, "node_id", None)
+        if node_id is None:
+            return True
+
+        key = (record.name, node_id, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            if now >= self._next_sweep:
+                self._sweep(now)
+            state = self._state.get(key)
+            if state is None:
+                self._state[key] = [now, 0]
+                if len(self._state) > self.max_keys:
+                    self._state.popitem(last=False)
+                return True
+            if now - state[0] < self.interval:
+                state[1] += 1
+                return False
+            record.suppressed = state[1]
+            state[0] = now
+            state[1] = 0
+            self._state.move_to_end(key)
+        return True
+
+    def _sweep(self, now):
+        # Entri yang masih menyimpan jumlah 'suppressed' dibiarkan sampai
+        # record berikutnya melaporkannya (tetap dibatasi max_keys)
+        expired = [
+            key
+            for key, (last_emit, suppressed) in self._state.items()
+            if now - last_emit >= self.interval and not suppressed
+        ]
+        for key in expired:
+            del self._state[key]
+        self._next_sweep = now + self.interval
+
+
+class StructuredFormatter(logging.Formatter):
+    """Format 'waktu level logger pesan key=value ...' untuk field tambahan."""
+
+    FIELDS = ("node_id", "topic", "suppressed")
+
+    def format(self, record):
+        line = super().format(record)
+        extras = [
+            f"{field}={getattr(record, field)}"
+            for field in self.FIELDS
+            if getattr(record, field, None)
+        ]
+        if extras:
+            line = f"{line} {' '.join(extras)}"
+        return line
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler yang tidak memformat pesan di thread pemanggil.
+
+    Formatting (msg % args) dan I/O konsol terjadi di thread listener, jadi
+    thread MQTT hanya membayar biaya memasukkan record ke antrean.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+def setup_logging(level=LOG_LEVEL):
+    """
+    Pasang handler non-blocking pada logger 'monitoring' (sekali saja).
+
+    Record masuk ke antrean lalu ditulis ke stderr oleh QueueListener di
+    thread terpisah. Listener dihentikan (dan antrean dikosongkan) saat exit.
+    """
+    global _listener
+
+    with _setup_lock:
+        logger = logging.getLogger(ROOT_LOGGER)
+        if _listener is not None:
+            return logger
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = _DeferredQueueHandler(log_queue)
+        queue_handler.addFilter(NodeRateLimitFilter())
+
+        console = logging.StreamHandler()
+        console.setFormatter(
+            StructuredFormatter(
+                "%(asctime)s %(levelname)-7s %(name)s: %(message)s", "%H:%M:%S"
+            )
+        )
+
+        _listener = logging.handlers.QueueListener(
+            log_queue, console, respect_handler_level=True
+        )
+        _listener.start()
+        atexit.register(_listener.stop)
+
+        logger.addHandler(queue_handler)
+        logger.setLevel(level)
+        logger.propagate = False
+        return logger
+
+
+def get_logger(name):
+    """Logger anak dari 'monitoring', misal get_logger('line_dashboard')."""
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
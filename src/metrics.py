@@ -0,0 +1,362 @@
+"""
+Metrik proses (counter dan histogram) dalam format teks Prometheus.
+
+Sengaja tanpa dependensi prometheus_client: yang dibutuhkan hanya counter
+dan histogram berlabel, plus route /metrics di server Flask milik Dash.
+Hot path (on_message) tidak mengambil lock: counter dipecah per thread dan
+histogram menampung nilai mentah lalu memasukkannya ke bucket per batch,
+sehingga thread MQTT, writer SQLite, dan callback Dash tidak saling menunggu.
+
+    serve_metrics(app.server)   # GET /metrics
+"""
+
+import functools
+import math
+import threading
+import time
+from threading import get_ident
+
+import numpy as np
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+FOLD_SIZE = 512  # Observasi yang ditampung sebelum dimasukkan ke bucket
+# Batas bucket (detik): dari mikrodetik (decode, lock) sampai detik (render)
+DEFAULT_BUCKETS = (
+    0.00001,
+    0.000025,
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    pairs.extend(f'{n}="{v}"' for n, v in extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """Child untuk kombinasi label ini (di-cache; simpan untuk hot path)."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} butuh label {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _bind_default(self, *methods):
+        # Metrik tanpa label: method child dipasang langsung di metrik, jadi
+        # hot path tidak melewati labels()
+        if not self.labelnames:
+            child = self.labels()
+            for method in methods:
+                setattr(self, method, getattr(child, method))
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        for values, child in sorted(self._children.items()):
+            lines.extend(child.render(self.name, self.labelnames, values))
+        return lines
+
+
+class _CounterChild:
+    """
+    Nilai dipecah per thread: setiap shard hanya ditulis oleh satu thread,
+    jadi inc() tidak butuh lock dan tidak ada increment yang hilang.
+    """
+
+    __slots__ = ("_shards",)
+
+    def __init__(self):
+        self._shards = {}  # {thread ident: [nilai]}
+
+    def inc(self, amount=1):
+        try:
+            self._shards[get_ident()][0] += amount
+        except KeyError:
+            self._shards[get_ident()] = [amount]
+
+    @property
+    def value(self):
+        return sum(shard[0] for shard in list(self._shards.values()))
+
+    def render(self, name, labelnames, values):
+        return [f"{name}{_labels(labelnames, values)} {_number(self.value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+    _new_child = _CounterChild
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._bind_default("inc")
+
+    def inc(self, amount=1):
+        raise ValueError(f"{self.name} butuh label {self.labelnames}")
+
+
+class _HistogramChild:
+    """
+    observe() hanya menambahkan nilai ke list (atomic di CPython); nilai
+    dimasukkan ke bucket per FOLD_SIZE sekaligus dengan numpy, atau saat
+    /metrics dibaca.
+    """
+
+    __slots__ = ("_lock", "_buckets", "_counts", "_sum", "_pending", "_zero_sources")
+
+    def __init__(self, buckets):
+        self._lock = threading.Lock()
+        self._buckets = np.asarray(buckets, dtype=float)
+        self._counts = np.zeros(len(buckets) + 1, dtype=np.int64)
+        self._sum = 0.0
+        self._pending = []
+        self._zero_sources = []  # Objek dengan atribut zero_count (TimedLock)
+
+    def observe(self, value):
+        pending = self._pending
+        pending.append(value)
+        if len(pending) >= FOLD_SIZE:
+            self._fold()
+
+    def add_zero_source(self, source):
+        """Sertakan source.zero_count sebagai observasi bernilai 0."""
+        self._zero_sources.append(source)
+
+    def _snapshot(self):
+        self._fold()
+        with self._lock:
+            counts, total = self._counts.copy(), self._sum
+        counts[0] += sum(source.zero_count for source in self._zero_sources)
+        return counts, total
+
+    def _fold(self):
+        with self._lock:
+            pending = self._pending
+            size = len(pending)
+            if not size:
+                return
+            # Nilai yang ditambahkan thread lain selama fold tetap tertinggal
+            values = np.array(pending[:size], dtype=float)
+            del pending[:size]
+            # side="left": nilai tepat di batas masuk bucket itu (le)
+            self._counts += np.bincount(
+                np.searchsorted(self._buckets, values, side="left"),
+                minlength=len(self._counts),
+            )
+            self._sum += float(values.sum())
+
+    @property
+    def count(self):
+        return int(self._snapshot()[0].sum())
+
+    @property
+    def sum(self):
+        return self._snapshot()[1]
+
+    def time(self):
+        """Decorator: catat durasi setiap panggilan fungsi."""
+
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(time.perf_counter() - start)
+
+            return wrapper
+
+        return decorator
+
+    def render(self, name, labelnames, values):
+        counts, total = self._snapshot()
+        cumulative = np.cumsum(counts).tolist()
+        lines = []
+        for bound, count in zip(self._buckets.tolist() + [math.inf], cumulative):
+            le = (("le", _number(bound)),)
+            lines.append(f"{name}_bucket{_labels(labelnames, values, le)} {count}")
+        labels = _labels(labelnames, values)
+        lines.append(f"{name}_sum{labels} {_number(total)}")
+        lines.append(f"{name}_count{labels} {cumulative[-1]}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+        self._bind_default("observe", "time")
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        raise ValueError(f"{self.name} butuh label {self.labelnames}")
+
+    def time(self):
+        raise ValueError(f"{self.name} butuh label {self.labelnames}")
+
+
+class TimedLock:
+    """
+    Lock yang mencatat lama menunggu acquire ke sebuah histogram child.
+
+    Acquire tanpa antre (kasus umum) hanya menaikkan zero_count selagi lock
+    dipegang; histogram membacanya sebagai observasi bernilai 0. Hanya
+    acquire yang benar-benar menunggu yang diukur dengan perf_counter.
+    """
+
+    def __init__(self, histogram, lock=None):
+        self._histogram = histogram
+        self._lock = lock or threading.Lock()
+        self.zero_count = 0  # Hanya diubah oleh pemegang lock
+        histogram.add_zero_source(self)
+
+    def acquire(self, blocking=True, timeout=-1):
+        if self._lock.acquire(False):
+            self.zero_count += 1
+            return True
+        if not blocking:
+            return False
+        start = time.perf_counter()
+        acquired = self._lock.acquire(True, timeout)
+        self._histogram.observe(time.perf_counter() - start)
+        return acquired
+
+    def release(self):
+        self._lock.release()
+
+    def locked(self):
+        return self._lock.locked()
+
+    __enter__ = acquire
+
+    def __exit__(self, *exc):
+        self._lock.release()
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            existing = self._metrics.setdefault(metric.name, metric)
+        if existing is not metric:
+            raise ValueError(f"Metrik {metric.name} sudah terdaftar")
+        return metric
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name, documentation, labelnames=()):
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+# --- METRIK BERSAMA (dashboard dan ingest_service) ---
+# Label node_id hanya untuk node di registry; node asing digabung ke
+# UNREGISTERED_NODE agar jumlah seri tidak tumbuh tanpa batas.
+UNREGISTERED_NODE = "unregistered"
+
+MESSAGES_RECEIVED = counter(
+    "monitoring_messages_received_total", "Pesan MQTT diterima.", ("node_id",)
+)
+MESSAGES_REJECTED = counter(
+    "monitoring_messages_rejected_total",
+    "Pesan MQTT ditolak (node tidak diizinkan, payload invalid, data tidak lengkap).",
+    ("node_id", "reason"),
+)
+MESSAGES_PARSED = counter(
+    "monitoring_messages_parsed_total",
+    "Pesan MQTT yang berhasil di-decode.",
+    ("node_id",),
+)
+ROWS_PERSISTED = counter(
+    "monitoring_rows_persisted_total",
+    "Pembacaan yang sudah di-commit ke SQLite.",
+    ("node_id",),
+)
+ON_MESSAGE_SECONDS = histogram(
+    "monitoring_on_message_seconds", "Durasi handler on_message."
+)
+SQLITE_WRITE_SECONDS = histogram(
+    "monitoring_sqlite_write_seconds",
+    "Durasi tulis satu batch SQLite (insert = executemany, commit).",
+    ("phase",),
+)
+HEATMAP_GENERATE_SECONDS = histogram(
+    "monitoring_heatmap_generate_seconds", "Durasi generate_heatmap_data."
+)
+CALLBACK_SECONDS = histogram(
+    "monitoring_callback_seconds", "Durasi callback Dash.", ("callback",)
+)
+LOCK_WAIT_SECONDS = histogram(
+    "monitoring_lock_wait_seconds", "Lama menunggu acquire lock.", ("lock",)
+)
+
+
+def serve_metrics(server, registry=REGISTRY, path="/metrics"):
+    """Pasang route GET /metrics (teks Prometheus) di server Flask."""
+    from flask import Response
+
+    def metrics_view():
+        return Response(registry.render(), content_type=CONTENT_TYPE)
+
+    server.add_url_rule(path, "metrics", metrics_view)
+    return server
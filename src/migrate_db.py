@@ -0,0 +1,132 @@
+"""
+Migrasi dan perawatan database sensor.
+
+Mengubah tabel skema lama (timestamp string, tanpa index) ke skema epoch
+integer dengan index (node_id, timestamp), opsional sekaligus memecahnya ke
+partisi per hari/bulan, lalu membuang atau mengarsipkan partisi lama.
+
+Contoh:
+    python src/migrate_db.py
+    python src/migrate_db.py --partition month
+    python src/migrate_db.py --db multi_node_climate.db --archive-before 202501
+    python src/migrate_db.py --columnar-before 20250101 --columnar-format arrow
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+
+from columnar_archive import FORMAT_EXTENSIONS, archive_closed_days, key_to_epoch
+from rollup import RollupStore
+from storage import CLIMATE_COLUMNS, MULTI_NODE_COLUMNS, ClimateStore, migrate_table
+
+# Database bawaan proyek dan tabel datanya
+KNOWN_DATABASES = {
+    "climate_data.db": ("climate", CLIMATE_COLUMNS),
+    "multi_node_climate.db": ("multi_node_climate", MULTI_NODE_COLUMNS),
+}
+
+
+def store_for(db_file, partition):
+    name = os.path.basename(db_file)
+    if name not in KNOWN_DATABASES:
+        raise SystemExit(f"Database tidak dikenal: {db_file}")
+    table, columns = KNOWN_DATABASES[name]
+    return ClimateStore(db_file, table, columns, partition)
+
+
+def process(db_file, args):
+    if not os.path.exists(db_file):
+        print(f"[{db_file}] tidak ditemukan, dilewati.")
+        return
+
+    store = store_for(db_file, args.partition)
+    conn = sqlite3.connect(db_file)
+    try:
+        copied = migrate_table(conn, store)
+        store.setup(conn)
+        print(f"[{db_file}] {copied} baris dimigrasikan ke '{store.table}'.")
+
+        rollups = RollupStore(store)
+        if copied:
+            # Baris yang disalin mendapat id baru, jadi watermark lama tidak berlaku
+            rollups.rebuild(conn)
+        else:
+            rollups.setup(conn)
+        compacted = rollups.compact(conn)
+        print(f"[{db_file}] {compacted} baris baru dimasukkan ke tabel rollup.")
+
+        if args.drop_before:
+            dropped = store.drop_partitions_before(conn, args.drop_before)
+            print(f"[{db_file}] partisi dihapus: {dropped or '-'}")
+
+        if args.archive_before:
+            os.makedirs(args.archive_dir, exist_ok=True)
+            for key in sorted(store.partitions(conn)):
+                if key[: len(args.archive_before)] >= args.archive_before[: len(key)]:
+                    continue
+                target = os.path.join(args.archive_dir, f"{store.table}_{key}.db")
+                store.archive_partition(conn, key, target)
+                print(f"[{db_file}] partisi {key} diarsipkan ke {target}")
+
+        if args.columnar_before:
+            archived = archive_closed_days(
+                conn,
+                store,
+                args.columnar_dir,
+                key_to_epoch(args.columnar_before),
+                args.columnar_format,
+            )
+            print(
+                f"[{db_file}] {archived} baris diarsip ke {args.columnar_format} "
+                f"di {args.columnar_dir}"
+            )
+
+        if args.vacuum:
+            conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Migrasi database sensor ke skema epoch + index (node_id, timestamp)."
+    )
+    parser.add_argument(
+        "--db",
+        action="append",
+        help="File database (bisa diulang). Default: kedua database bawaan.",
+    )
+    parser.add_argument(
+        "--partition",
+        choices=["day", "month"],
+        help="Pecah data ke tabel per hari/bulan.",
+    )
+    parser.add_argument(
+        "--drop-before", metavar="KUNCI", help="Hapus partisi sebelum kunci ini."
+    )
+    parser.add_argument(
+        "--archive-before",
+        metavar="KUNCI",
+        help="Pindahkan partisi sebelum kunci ini (misal 202501) ke file arsip.",
+    )
+    parser.add_argument("--archive-dir", default="archive")
+    parser.add_argument(
+        "--columnar-before",
+        metavar="KUNCI",
+        help="Pindahkan hari sebelum kunci ini (misal 20250101, UTC) ke arsip kolumnar.",
+    )
+    parser.add_argument("--columnar-dir", default="columnar")
+    parser.add_argument(
+        "--columnar-format", choices=sorted(FORMAT_EXTENSIONS), default="parquet"
+    )
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM setelah selesai.")
+    args = parser.parse_args(argv)
+
+    for db_file in args.db or list(KNOWN_DATABASES):
+        process(db_file, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
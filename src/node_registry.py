@@ -0,0 +1,297 @@
+"""
+Registry node yang diizinkan beserta metadatanya (posisi, radius, warna).
+
+Sumbernya tabel node_info di database multi-node, ditambah daftar node awal
+dari konfigurasi. Registry dibaca ulang berkala di thread latar (hot
+reload), jadi menambah atau menonaktifkan node tidak perlu restart
+dashboard. Pengecekan "node diizinkan?" adalah lookup dict O(1); setiap
+reload membangun dict baru lalu menukar referensinya, sehingga pembaca
+(thread MQTT, callback Dash) tidak pernah memakai lock.
+
+    python src/node_registry.py list
+    python src/node_registry.py add node_003 --pos 40 60 --color "#3357FF"
+    python src/node_registry.py disable node_002
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+import zlib
+from typing import NamedTuple, Optional
+
+from log_setup import get_logger
+from storage import connect_reader, connect_writer, setup_node_info
+
+logger = get_logger("node_registry")
+
+REGISTRY_DB = "multi_node_climate.db"  # Database yang menyimpan tabel node_info
+RELOAD_INTERVAL = 5.0  # Detik antar pembacaan ulang node_info
+DEFAULT_RADIUS = 15.0
+DISABLED_STATUS = "disabled"
+
+# Warna bawaan untuk node tanpa kolom color; dipilih stabil dari hash node_id
+DEFAULT_COLORS = {
+    "node_001": "#FF5733",
+    "node_002": "#33FF57",
+    "node_003": "#3357FF",
+    "node_004": "#FF33F5",
+}
+PALETTE = (
+    "#FF5733",
+    "#33FF57",
+    "#3357FF",
+    "#FF33F5",
+    "#FFC300",
+    "#33FFF5",
+    "#C70039",
+    "#9D4EDD",
+)
+
+
+def default_color(node_id):
+    color = DEFAULT_COLORS.get(node_id)
+    if color is None:
+        color = PALETTE[zlib.crc32(node_id.encode("utf-8")) % len(PALETTE)]
+    return color
+
+
+class NodeInfo(NamedTuple):
+    node_id: str
+    pos_x: Optional[float]
+    pos_y: Optional[float]
+    radius: float
+    color: str
+    description: Optional[str] = None
+
+
+class NodeRegistry:
+    """
+    {node_id: NodeInfo} untuk node yang diizinkan.
+
+    seed_nodes selalu diizinkan (kecuali dinonaktifkan di node_info), bahkan
+    sebelum database atau tabel node_info ada.
+    """
+
+    def __init__(
+        self,
+        db_file=REGISTRY_DB,
+        seed_nodes=(),
+        reload_interval=RELOAD_INTERVAL,
+        default_radius=DEFAULT_RADIUS,
+    ):
+        self.db_file = db_file
+        self.seed_nodes = tuple(seed_nodes)
+        self.reload_interval = reload_interval
+        self.default_radius = default_radius
+        self.version = 0  # Naik setiap isi registry berubah
+        self.reloads = 0
+        self._nodes = {}
+        self._node_ids = ()
+        self._stop = threading.Event()
+        self._thread = None
+        self.reload()
+
+    # --- PEMBACAAN (tanpa lock) ---
+
+    def __contains__(self, node_id):
+        return node_id in self._nodes
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def get(self, node_id):
+        return self._nodes.get(node_id)
+
+    @property
+    def node_ids(self):
+        """Tuple node_id terurut (urutan tetap untuk trace dan daftar status)."""
+        return self._node_ids
+
+    def color(self, node_id):
+        info = self._nodes.get(node_id)
+        return info.color if info is not None else default_color(node_id)
+
+    def radius(self, node_id):
+        info = self._nodes.get(node_id)
+        return info.radius if info is not None else self.default_radius
+
+    def fill_position(self, reading):
+        """
+        Reading dengan pos_x/pos_y dari node_info jika node tidak mengirimnya.
+
+        Dipakai oleh dashboard (MQTT langsung) dan service ingestion, supaya
+        node tanpa GPS/konfigurasi posisi disimpan sama di kedua jalur.
+        """
+        if reading.pos_x is not None and reading.pos_y is not None:
+            return reading
+        info = self._nodes.get(reading.node_id)
+        if info is None or info.pos_x is None or info.pos_y is None:
+            return reading
+        return reading._replace(pos_x=info.pos_x, pos_y=info.pos_y)
+
+    # --- RELOAD ---
+
+    def _seed_info(self, node_id):
+        return NodeInfo(
+            node_id, None, None, self.default_radius, default_color(node_id)
+        )
+
+    def _read_table(self):
+        """Baris node_info, atau [] jika database/tabel belum ada."""
+        if not os.path.exists(self.db_file):
+            return []
+        try:
+            conn = connect_reader(self.db_file)
+        except sqlite3.Error:
+            return []
+        try:
+            return conn.execute(
+                "SELECT node_id, pos_x, pos_y, radius, color, status, description "
+                "FROM node_info"
+            ).fetchall()
+        except sqlite3.OperationalError:
+            return []  # Tabel (atau kolom color) belum dibuat
+        finally:
+            conn.close()
+
+    def reload(self):
+        """Baca ulang node_info; return True jika isi registry berubah."""
+        nodes = {node_id: self._seed_info(node_id) for node_id in self.seed_nodes}
+        for row in self._read_table():
+            node_id, pos_x, pos_y, radius, color, status, description = row
+            if status == DISABLED_STATUS:
+                nodes.pop(node_id, None)
+                continue
+            nodes[node_id] = NodeInfo(
+                node_id,
+                pos_x,
+                pos_y,
+                self.default_radius if radius is None else radius,
+                color or default_color(node_id),
+                description,
+            )
+        self.reloads += 1
+        if nodes == self._nodes:
+            return False
+        # Tukar referensi sekaligus; pembaca melihat dict lama atau dict baru
+        self._node_ids = tuple(sorted(nodes))
+        self._nodes = nodes
+        self.version += 1
+        logger.info("Registry node dimuat: %d node", len(nodes))
+        return True
+
+    def start(self):
+        """Jalankan hot reload berkala di thread latar."""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="node-registry-reload", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+
+    def _run(self):
+        while not self._stop.wait(self.reload_interval):
+            try:
+                self.reload()
+            except Exception as e:
+                logger.error("Gagal memuat ulang registry node: %s", e)
+
+
+def register_node(
+    conn, node_id, pos_x, pos_y, radius=None, color=None, description=None
+):
+    """Tambah node ke node_info, atau perbarui metadatanya dan aktifkan lagi."""
+    setup_node_info(conn)
+    with conn:
+        conn.execute(
+            "INSERT OR IGNORE INTO node_info (node_id, pos_x, pos_y, radius) "
+            "VALUES (?, ?, ?, ?)",
+            (node_id, pos_x, pos_y, DEFAULT_RADIUS),
+        )
+        # Metadata yang tidak diberikan dibiarkan seperti sebelumnya
+        conn.execute(
+            """
+            UPDATE node_info SET
+                pos_x = ?,
+                pos_y = ?,
+                radius = COALESCE(?, radius),
+                color = COALESCE(?, color),
+                description = COALESCE(?, description),
+                status = 'active'
+            WHERE node_id = ?
+            """,
+            (pos_x, pos_y, radius, color, description, node_id),
+        )
+
+
+def set_status(conn, node_id, status):
+    with conn:
+        if status == DISABLED_STATUS:
+            # Node dari seed_nodes belum tentu punya baris; posisi diisi nanti
+            conn.execute(
+                "INSERT OR IGNORE INTO node_info (node_id, pos_x, pos_y) "
+                "VALUES (?, 0, 0)",
+                (node_id,),
+            )
+        return conn.execute(
+            "UPDATE node_info SET status = ? WHERE node_id = ?", (status, node_id)
+        ).rowcount
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Kelola registry node (node_info).")
+    parser.add_argument("--db", default=REGISTRY_DB)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="Tampilkan node yang terdaftar.")
+    add = commands.add_parser("add", help="Tambah/perbarui node.")
+    add.add_argument("node_id")
+    add.add_argument("--pos", nargs=2, type=float, required=True, metavar=("X", "Y"))
+    add.add_argument("--radius", type=float)
+    add.add_argument("--color")
+    add.add_argument("--description")
+    for name, help_text in (
+        ("disable", "Nonaktifkan node (pesannya diabaikan)."),
+        ("enable", "Aktifkan lagi node."),
+    ):
+        commands.add_parser(name, help=help_text).add_argument("node_id")
+    args = parser.parse_args(argv)
+
+    conn = connect_writer(args.db)
+    try:
+        setup_node_info(conn)
+        if args.command == "list":
+            for row in conn.execute(
+                "SELECT node_id, pos_x, pos_y, radius, color, status, last_seen "
+                "FROM node_info ORDER BY node_id"
+            ):
+                print(" | ".join("-" if v is None else str(v) for v in row))
+        elif args.command == "add":
+            register_node(
+                conn,
+                args.node_id,
+                *args.pos,
+                radius=args.radius,
+                color=args.color,
+                description=args.description,
+            )
+            print(f"Node {args.node_id} terdaftar.")
+        else:
+            status = DISABLED_STATUS if args.command == "disable" else "active"
+            if not set_status(conn, args.node_id, status):
+                print(f"Node {args.node_id} tidak ada di node_info.")
+                return 1
+            print(f"Node {args.node_id}: {status}.")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
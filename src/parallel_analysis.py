@@ -0,0 +1,265 @@
+"""
+Analisis per node secara paralel dengan ProcessPoolExecutor.
+
+Deret setiap node independen, jadi pekerjaan dipecah per node_id dan
+(opsional) per potongan waktu. Setiap worker membuka koneksi SQLite read-only
+sendiri, menjalankan NodeAnalyzer dari stream_analysis, lalu mengembalikan
+akumulatornya. Proses utama menggabungkan akumulator per node sesuai urutan
+waktu, sehingga hasilnya sama dengan analyze_stream satu proses.
+
+Potongan waktu yang bukan potongan pertama mengisi jendela moving average
+dengan window-1 nilai terakhir sebelum awal potongannya. Dengan columnar_dir,
+hari yang sudah diarsip ikut dianalisis (lihat iter_node_chunks).
+"""
+
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple, Optional
+
+from columnar_archive import archive_ranges, archive_tail
+from storage import ClimateStore, connect_reader
+from stream_analysis import (
+    CHUNK_ROWS,
+    MOVING_AVG_WINDOW,
+    NodeAnalyzer,
+    TrendAccumulator,
+    iter_node_chunks,
+    summarize,
+)
+
+SMOOTHED_HEADER = ("node_id", "timestamp", "temperature", "smoothed_temperature")
+
+
+class SegmentTask(NamedTuple):
+    db_file: str
+    store_spec: tuple  # (table, columns, partition) untuk ClimateStore di worker
+    node_id: str
+    segment: int
+    start: Optional[int]
+    end: Optional[int]
+    window: int
+    chunk_rows: int
+    part_file: Optional[str]  # File CSV moving average potongan ini (opsional)
+    columnar_dir: Optional[str] = None  # Folder arsip kolumnar yang ikut dibaca
+
+
+class SegmentResult(NamedTuple):
+    node_id: str
+    segment: int
+    temperature: TrendAccumulator
+    humidity: TrendAccumulator
+    part_file: Optional[str]
+
+
+def node_ranges(conn, store, columnar_dir=None):
+    """
+    {node_id: (timestamp_pertama, timestamp_terakhir)} lewat index, ditambah
+    rentang hari arsip kolumnar jika columnar_dir diberikan.
+    """
+    ranges = archive_ranges(columnar_dir, store.table) if columnar_dir else {}
+    for table in store.data_tables(conn):
+        for node_id, first, last in conn.execute(
+            f"SELECT node_id, MIN(timestamp), MAX(timestamp) FROM {table} "
+            "GROUP BY node_id"
+        ):
+            if node_id in ranges:
+                first = min(first, ranges[node_id][0])
+                last = max(last, ranges[node_id][1])
+            ranges[node_id] = (first, last)
+    return dict(sorted(ranges.items()))
+
+
+def _preceding_values(conn, store, node_id, before, count, columnar_dir=None):
+    """count nilai suhu terakhir node sebelum epoch `before`, urut naik."""
+    sql, params = store.select_sql(
+        conn,
+        columns=("timestamp", "temperature"),
+        node_id=node_id,
+        end=before,
+        order_by="timestamp DESC",
+    )
+    rows = conn.execute(f"{sql} LIMIT ?", params + [count]).fetchall()
+    values = [temperature for _, temperature in reversed(rows)]
+    if columnar_dir and len(values) < count:
+        # Sisanya dari arsip (hari yang sudah ditutup mendahului data SQLite)
+        values = (
+            archive_tail(
+                columnar_dir,
+                store.table,
+                node_id,
+                "temperature",
+                before,
+                count - len(values),
+            )
+            + values
+        )
+    return values
+
+
+def analyze_segment(task):
+    """Worker: analisis satu node (atau satu potongan waktunya)."""
+    store = ClimateStore(task.db_file, *task.store_spec)
+    analyzer = NodeAnalyzer(task.node_id, task.window)
+    conn = connect_reader(task.db_file)
+    part = open(task.part_file, "w", newline="") if task.part_file else None
+    try:
+        if task.segment > 0 and task.window > 1:
+            analyzer.rolling.seed(
+                _preceding_values(
+                    conn,
+                    store,
+                    task.node_id,
+                    task.start,
+                    task.window - 1,
+                    task.columnar_dir,
+                )
+            )
+        writer = csv.writer(part) if part else None
+        for _, timestamps, temperature, humidity in iter_node_chunks(
+            conn,
+            store,
+            task.node_id,
+            task.start,
+            task.end,
+            task.chunk_rows,
+            task.columnar_dir,
+        ):
+            smoothed = analyzer.update(timestamps, temperature, humidity)
+            if writer:
+                writer.writerows(
+                    zip(
+                        [task.node_id] * len(timestamps),
+                        timestamps.astype(int).tolist(),
+                        temperature.tolist(),
+                        smoothed.tolist(),
+                    )
+                )
+    finally:
+        conn.close()
+        if part:
+            part.close()
+    return SegmentResult(
+        task.node_id,
+        task.segment,
+        analyzer.temperature,
+        analyzer.humidity,
+        task.part_file,
+    )
+
+
+def build_tasks(
+    conn,
+    db_file,
+    store,
+    segments,
+    window,
+    chunk_rows,
+    output_dir,
+    node_ids=None,
+    columnar_dir=None,
+):
+    """Pecah pekerjaan per node, dan per `segments` potongan waktu yang sama panjang."""
+    spec = (store.table, store.columns, store.partition)
+    tasks = []
+    for node_id, (first, last) in node_ranges(conn, store, columnar_dir).items():
+        if node_ids is not None and node_id not in node_ids:
+            continue
+        span = last + 1 - first
+        count = max(1, min(segments, span))
+        bounds = [first + span * i // count for i in range(count)] + [last + 1]
+        for segment in range(count):
+            part_file = None
+            if output_dir:
+                part_file = os.path.join(output_dir, f".{node_id}.{segment:04d}.part")
+            tasks.append(
+                SegmentTask(
+                    db_file,
+                    spec,
+                    node_id,
+                    segment,
+                    bounds[segment],
+                    bounds[segment + 1],
+                    window,
+                    chunk_rows,
+                    part_file,
+                    columnar_dir,
+                )
+            )
+    return tasks
+
+
+def merge_results(results, output_dir=None):
+    """
+    Gabungkan hasil potongan per node (urut segmen). Return {node_id: NodeSummary}.
+
+    Jika output_dir diberikan, file potongan digabung menjadi
+    smoothed_<node_id>.csv lalu dihapus.
+    """
+    by_node = {}
+    for result in sorted(results, key=lambda r: (r.node_id, r.segment)):
+        by_node.setdefault(result.node_id, []).append(result)
+
+    summaries = {}
+    for node_id, parts in by_node.items():
+        temperature, humidity = TrendAccumulator(), TrendAccumulator()
+        for part in parts:
+            temperature.merge(part.temperature)
+            humidity.merge(part.humidity)
+        if temperature.n:
+            summaries[node_id] = summarize(node_id, temperature, humidity)
+
+        if output_dir:
+            target = os.path.join(output_dir, f"smoothed_{node_id}.csv")
+            with open(target, "w", newline="") as out:
+                csv.writer(out).writerow(SMOOTHED_HEADER)
+                for part in parts:
+                    with open(part.part_file, newline="") as f:
+                        for block in iter(lambda: f.read(1 << 20), ""):
+                            out.write(block)
+                    os.remove(part.part_file)
+    return summaries
+
+
+def analyze_parallel(
+    db_file,
+    store,
+    workers=None,
+    segments=1,
+    window=MOVING_AVG_WINDOW,
+    chunk_rows=CHUNK_ROWS,
+    output_dir=None,
+    node_ids=None,
+    columnar_dir=None,
+):
+    """
+    Analisis semua node dengan `workers` proses. Return {node_id: NodeSummary}.
+
+    segments > 1 memecah deret setiap node menjadi beberapa potongan waktu,
+    berguna jika jumlah node lebih sedikit dari jumlah core.
+    """
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    conn = connect_reader(db_file)
+    try:
+        tasks = build_tasks(
+            conn,
+            db_file,
+            store,
+            segments,
+            window,
+            chunk_rows,
+            output_dir,
+            node_ids,
+            columnar_dir,
+        )
+    finally:
+        conn.close()
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        results = [analyze_segment(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(analyze_segment, tasks))
+    return merge_results(results, output_dir)
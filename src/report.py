@@ -0,0 +1,323 @@
+"""
+Laporan analisis headless (tanpa jendela plot) untuk server dan cron.
+
+Setiap node dianalisis dan dirender di proses worker sendiri: data dibaca
+dalam chunk (stream_analysis), setiap deret langsung di-downsample per chunk
+lalu sekali lagi di akhir, sehingga Matplotlib hanya menggambar beberapa ribu
+titik per node. PNG/SVG dirender dengan canvas Agg (tanpa pyplot/GUI), HTML
+dengan Plotly. Ringkasan statistik ditulis ke summary.csv dan summary.json.
+"""
+
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from downsample import DEFAULT_POINTS, METHODS, minmax_decimate
+from parallel_analysis import node_ranges
+from storage import ClimateStore, connect_reader
+from stream_analysis import (
+    CHUNK_ROWS,
+    MOVING_AVG_WINDOW,
+    NodeAnalyzer,
+    NodeSummary,
+    iter_node_chunks,
+)
+
+FORMATS = ("png", "svg", "html")
+SERIES = ("temperature", "humidity", "smoothed_temperature")
+
+
+class ReportTask(NamedTuple):
+    db_file: str
+    store_spec: tuple  # (table, columns, partition) untuk ClimateStore di worker
+    node_id: str
+    output_dir: str
+    fmt: str
+    window: int
+    points: int
+    method: str
+    render: bool  # False jika node hanya digambar di figure facet
+    columnar_dir: Optional[str] = None  # Folder arsip kolumnar yang ikut dibaca
+
+
+class NodeReport(NamedTuple):
+    summary: NodeSummary
+    series: dict  # {nama_deret: (x_epoch, y)} setelah downsampling
+    figure_file: Optional[str]
+
+
+def _reduce(pieces, points, method):
+    x = np.concatenate([p[0] for p in pieces])
+    y = np.concatenate([p[1] for p in pieces])
+    keep = ~np.isnan(y)
+    return METHODS[method](x[keep], y[keep], points)
+
+
+def _prereduce(x, y, points):
+    """Reduksi murah per chunk (min/max tervektorisasi) sebelum reduksi akhir."""
+    keep = ~np.isnan(y)
+    return minmax_decimate(x[keep], y[keep], 2 * points)
+
+
+def collect_node(
+    conn,
+    store,
+    node_id,
+    window,
+    points,
+    method,
+    chunk_rows=CHUNK_ROWS,
+    columnar_dir=None,
+):
+    """Analisis satu node secara streaming + deret hasil downsampling."""
+    analyzer = NodeAnalyzer(node_id, window)
+    pieces = {name: [] for name in SERIES}
+    for _, timestamps, temperature, humidity in iter_node_chunks(
+        conn, store, node_id, chunk_rows=chunk_rows, columnar_dir=columnar_dir
+    ):
+        smoothed = analyzer.update(timestamps, temperature, humidity)
+        for name, values in zip(SERIES, (temperature, humidity, smoothed)):
+            pieces[name].append(_prereduce(timestamps, values, points))
+    series = {
+        name: _reduce(parts, points, method) for name, parts in pieces.items() if parts
+    }
+    return analyzer.summary(), series
+
+
+def _local_times(epochs):
+    return [datetime.fromtimestamp(ts) for ts in epochs]
+
+
+def _trend(summary):
+    x = np.array([summary.first_timestamp, summary.last_timestamp], dtype=float)
+    return x, summary.intercept + summary.slope * (x - x[0])
+
+
+def _draw_node(ax_raw, ax_trend, node_id, summary, series):
+    x, y = series["temperature"]
+    ax_raw.plot(_local_times(x), y, label="Suhu", color="red", alpha=0.7)
+    x, y = series["humidity"]
+    ax_raw.plot(_local_times(x), y, label="Kelembaban", color="blue", alpha=0.7)
+    ax_raw.set_title(f"[{node_id}] Data Sensor")
+    ax_raw.set_ylabel("Nilai")
+    ax_raw.legend(loc="upper right")
+    ax_raw.grid(True)
+
+    x, y = series["temperature"]
+    ax_trend.plot(
+        _local_times(x), y, label="Suhu", color="gray", linestyle=":", alpha=0.5
+    )
+    if "smoothed_temperature" in series:
+        x, y = series["smoothed_temperature"]
+        ax_trend.plot(
+            _local_times(x),
+            y,
+            label="Suhu Mulus (Moving Avg)",
+            color="green",
+            linewidth=2,
+        )
+    x, y = _trend(summary)
+    ax_trend.plot(
+        _local_times(x),
+        y,
+        label="Garis Tren",
+        color="orange",
+        linestyle="--",
+        linewidth=2,
+    )
+    ax_trend.set_title(f"[{node_id}] Tren Suhu (slope {summary.slope:.6f} °C/detik)")
+    ax_trend.set_ylabel("Suhu (°C)")
+    ax_trend.legend(loc="upper right")
+    ax_trend.grid(True)
+
+
+def render_matplotlib(reports, path, title):
+    """Satu baris (data + tren) per node, disimpan lewat canvas Agg."""
+    fig = Figure(figsize=(15, 5 * len(reports)))
+    FigureCanvasAgg(fig)
+    axes = fig.subplots(nrows=len(reports), ncols=2, squeeze=False)
+    for (ax_raw, ax_trend), (node_id, report) in zip(axes, reports.items()):
+        _draw_node(ax_raw, ax_trend, node_id, report.summary, report.series)
+    fig.suptitle(title, fontsize=16)
+    fig.tight_layout(rect=[0, 0.03, 1, 0.97])
+    fig.savefig(path)
+    return path
+
+
+def render_html(reports, path, title):
+    """Versi interaktif (Plotly) dengan susunan yang sama."""
+    from plotly.subplots import make_subplots
+    import plotly.graph_objects as go
+
+    fig = make_subplots(
+        rows=len(reports),
+        cols=2,
+        subplot_titles=[
+            f"[{node_id}] {label}"
+            for node_id in reports
+            for label in ("Data Sensor", "Tren Suhu")
+        ],
+    )
+    for row, (node_id, report) in enumerate(reports.items(), start=1):
+        for name, col, color in (
+            ("temperature", 1, "red"),
+            ("humidity", 1, "blue"),
+            ("temperature", 2, "gray"),
+            ("smoothed_temperature", 2, "green"),
+        ):
+            if name in report.series:
+                x, y = report.series[name]
+                fig.add_trace(
+                    go.Scattergl(
+                        x=_local_times(x),
+                        y=y,
+                        name=f"{node_id} {name}",
+                        line=dict(color=color),
+                    ),
+                    row=row,
+                    col=col,
+                )
+        x, y = _trend(report.summary)
+        fig.add_trace(
+            go.Scatter(
+                x=_local_times(x),
+                y=y,
+                name=f"{node_id} tren",
+                line=dict(color="orange", dash="dash"),
+            ),
+            row=row,
+            col=2,
+        )
+    fig.update_layout(title=title, height=400 * len(reports), template="plotly_white")
+    fig.write_html(path, include_plotlyjs="cdn")
+    return path
+
+
+def render(reports, path, fmt, title):
+    if fmt == "html":
+        return render_html(reports, path, title)
+    return render_matplotlib(reports, path, title)
+
+
+def report_node(task):
+    """Worker: analisis + downsampling + (opsional) render figure satu node."""
+    store = ClimateStore(task.db_file, *task.store_spec)
+    conn = connect_reader(task.db_file)
+    try:
+        summary, series = collect_node(
+            conn,
+            store,
+            task.node_id,
+            task.window,
+            task.points,
+            task.method,
+            columnar_dir=task.columnar_dir,
+        )
+    finally:
+        conn.close()
+    figure_file = None
+    if task.render and summary.rows:
+        path = os.path.join(task.output_dir, f"{task.node_id}.{task.fmt}")
+        report = NodeReport(summary, series, None)
+        figure_file = render(
+            {task.node_id: report}, path, task.fmt, f"Analisis {task.node_id}"
+        )
+    return NodeReport(summary, series, figure_file)
+
+
+def write_summary(summaries, output_dir):
+    """summary.csv dan summary.json dari {node_id: NodeSummary}."""
+    csv_path = os.path.join(output_dir, "summary.csv")
+    with open(csv_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(NodeSummary._fields)
+        writer.writerows(summaries.values())
+    json_path = os.path.join(output_dir, "summary.json")
+    with open(json_path, "w") as f:
+        json.dump(
+            {
+                "generated_at": datetime.now().isoformat(timespec="seconds"),
+                "nodes": [
+                    # NaN (misal std dari satu baris) bukan JSON yang valid
+                    {k: None if v != v else v for k, v in s._asdict().items()}
+                    for s in summaries.values()
+                ],
+            },
+            f,
+            indent=2,
+        )
+    return csv_path, json_path
+
+
+def generate_report(
+    db_file,
+    store,
+    output_dir,
+    fmt="png",
+    facet=False,
+    workers=None,
+    window=MOVING_AVG_WINDOW,
+    points=DEFAULT_POINTS,
+    method="lttb",
+    columnar_dir=None,
+):
+    """
+    Tulis figure per node (atau satu figure facet) + ringkasan ke output_dir.
+    columnar_dir ikut membaca hari yang sudah diarsip.
+
+    Return (summaries, daftar file figure).
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Format laporan tidak dikenal: {fmt!r}")
+    os.makedirs(output_dir, exist_ok=True)
+    conn = connect_reader(db_file)
+    try:
+        node_ids = list(node_ranges(conn, store, columnar_dir))
+    finally:
+        conn.close()
+
+    spec = (store.table, store.columns, store.partition)
+    tasks = [
+        ReportTask(
+            db_file,
+            spec,
+            node_id,
+            output_dir,
+            fmt,
+            window,
+            points,
+            method,
+            not facet,
+            columnar_dir,
+        )
+        for node_id in node_ids
+    ]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) <= 1:
+        results = [report_node(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(report_node, tasks))
+
+    reports = {
+        task.node_id: result
+        for task, result in zip(tasks, results)
+        if result.summary.rows
+    }
+    files = [r.figure_file for r in reports.values() if r.figure_file]
+    if facet and reports:
+        path = os.path.join(output_dir, f"semua_node.{fmt}")
+        files.append(
+            render(reports, path, fmt, "Analisis Data Historis Suhu & Kelembaban")
+        )
+
+    summaries = {node_id: report.summary for node_id, report in reports.items()}
+    write_summary(summaries, output_dir)
+    return summaries, files
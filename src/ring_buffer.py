@@ -0,0 +1,96 @@
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Ring buffer kolumnar berkapasitas tetap berbasis array NumPy.
+
+    Setiap nilai ditulis dua kali (di indeks i dan i + capacity), sehingga
+    isi buffer dalam urutan kronologis selalu berupa satu potongan kontigu
+    dan view() bisa mengembalikan slice tanpa menyalin data. Append tetap
+    O(1) dan memori tetap 2 x capacity per kolom.
+    """
+
+    def __init__(self, capacity, dtypes):
+        if capacity < 1:
+            raise ValueError("capacity harus >= 1")
+        self.capacity = capacity
+        self.names = tuple(dtypes)
+        self._arrays = tuple(
+            np.zeros(2 * capacity, dtype=dtype) for dtype in dtypes.values()
+        )
+        self._next = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def append(self, *values):
+        """Tambah satu baris (urutan nilai sesuai urutan kolom)."""
+        i = self._next
+        mirror = i + self.capacity
+        for array, value in zip(self._arrays, values):
+            array[i] = value
+            array[mirror] = value
+        self._next = (i + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+
+    def view(self, name):
+        """
+        Slice kolom tanpa salinan, urut dari yang terlama.
+
+        View ikut berubah saat buffer ditulis lagi; gunakan di bawah lock
+        yang sama dengan penulis, atau pakai snapshot().
+        """
+        start = (self._next - self._size) % self.capacity
+        array = self._arrays[self.names.index(name)]
+        return array[start : start + self._size]
+
+    def snapshot(self):
+        """Salinan semua kolom {nama: array} yang aman dipakai di luar lock."""
+        return {name: self.view(name).copy() for name in self.names}
+
+    def last(self):
+        """Baris terbaru sebagai dict, atau None jika buffer kosong."""
+        if not self._size:
+            return None
+        i = (self._next - 1) % self.capacity
+        return {name: array[i] for name, array in zip(self.names, self._arrays)}
+
+
+class NodeBuffers:
+    """Satu RingBuffer per node, dengan ukuran jendela yang bisa diatur per node."""
+
+    def __init__(self, dtypes, default_window, windows=None):
+        self.dtypes = dict(dtypes)
+        self.default_window = default_window
+        self.windows = dict(windows or {})
+        self._buffers = {}
+
+    def __contains__(self, node_id):
+        return node_id in self._buffers
+
+    def __len__(self):
+        return len(self._buffers)
+
+    def window(self, node_id):
+        return self.windows.get(node_id, self.default_window)
+
+    def append(self, node_id, *values):
+        buffer = self._buffers.get(node_id)
+        if buffer is None:
+            buffer = RingBuffer(self.window(node_id), self.dtypes)
+            self._buffers[node_id] = buffer
+        buffer.append(*values)
+
+    def get(self, node_id):
+        return self._buffers.get(node_id)
+
+    def snapshot(self):
+        """{node_id: {kolom: array}} untuk semua node yang punya data."""
+        return {
+            node_id: buffer.snapshot()
+            for node_id, buffer in self._buffers.items()
+            if len(buffer)
+        }
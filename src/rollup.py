@@ -0,0 +1,276 @@
+"""
+Tabel rollup per node (1 menit, 1 jam, 1 hari) untuk data sensor.
+
+Setiap bucket menyimpan count, sum, min, max dan sum of squares per kolom
+nilai, sehingga rata-rata dan standar deviasi rentang panjang bisa dihitung
+tanpa membaca baris mentah. Rollup diisi oleh compactor: baris mentah baru
+(id > watermark per tabel data) di-GROUP BY lalu digabung ke bucket yang ada
+dengan UPSERT. Karena penggabungannya aditif, data yang datang terlambat
+tetap masuk ke bucket yang benar.
+"""
+
+import threading
+import time
+
+from log_setup import get_logger
+from storage import connect_writer, table_sequences
+
+logger = get_logger("rollup")
+
+# Label resolusi -> lebar bucket dalam detik, dari yang paling halus
+RESOLUTIONS = (("1m", 60), ("1h", 3600), ("1d", 86400))
+RAW_INTERVAL = 5  # Perkiraan jarak antar pembacaan mentah per node (detik)
+MAX_POINTS = 5000  # Titik maksimal per node sebelum pindah ke resolusi lebih kasar
+COMPACT_INTERVAL = 30.0  # Detik antar jalannya compactor di dashboard
+STATS = ("count", "sum", "min", "max", "sumsq")
+
+
+def choose_resolution(
+    start, end, max_points=MAX_POINTS, raw_interval=RAW_INTERVAL, raw_points=None
+):
+    """
+    Resolusi paling halus yang menghasilkan <= max_points titik per node.
+
+    Return None jika data mentah masih cukup kecil untuk dibaca langsung.
+    raw_points (jumlah baris mentah per node, jika diketahui) menggantikan
+    perkiraan span / raw_interval.
+    """
+    span = max(0, end - start)
+    if raw_points is None:
+        raw_points = span / raw_interval
+    if raw_points <= max_points:
+        return None
+    for label, seconds in RESOLUTIONS:
+        if span / seconds <= max_points:
+            return label
+    return RESOLUTIONS[-1][0]
+
+
+class RollupStore:
+    """Tabel {table}_rollup_1m/_1h/_1d untuk satu ClimateStore."""
+
+    def __init__(self, store, value_columns=("temperature", "humidity")):
+        self.store = store
+        self.value_columns = tuple(value_columns)
+        self.state_table = f"{store.table}_rollup_state"
+
+    def table_for(self, resolution):
+        return f"{self.store.table}_rollup_{resolution}"
+
+    @property
+    def stat_columns(self):
+        return tuple(f"{col}_{stat}" for col in self.value_columns for stat in STATS)
+
+    # --- SKEMA ---
+
+    def setup(self, conn):
+        stat_decls = "".join(
+            f",\n                {name} {'INTEGER' if name.endswith('_count') else 'REAL'}"
+            for name in self.stat_columns
+        )
+        for label, _ in RESOLUTIONS:
+            conn.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS {self.table_for(label)} (
+                    node_id TEXT NOT NULL,
+                    bucket INTEGER NOT NULL{stat_decls},
+                    PRIMARY KEY (node_id, bucket)
+                ) WITHOUT ROWID"""
+            )
+        conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {self.state_table} (
+                source_table TEXT PRIMARY KEY,
+                last_id INTEGER NOT NULL
+            )"""
+        )
+        conn.commit()
+
+    def rebuild(self, conn):
+        """Kosongkan rollup dan watermark; compact() berikutnya mengisi ulang."""
+        self.setup(conn)
+        with conn:
+            for label, _ in RESOLUTIONS:
+                conn.execute(f"DELETE FROM {self.table_for(label)}")
+            conn.execute(f"DELETE FROM {self.state_table}")
+
+    # --- COMPACTION ---
+
+    def _upsert_sql(self, resolution, seconds, source):
+        aggregates = []
+        for col in self.value_columns:
+            aggregates += [
+                f"COUNT({col})",
+                f"TOTAL({col})",
+                f"MIN({col})",
+                f"MAX({col})",
+                f"TOTAL({col} * {col})",
+            ]
+        updates = []
+        for col in self.value_columns:
+            for stat in ("count", "sum", "sumsq"):
+                name = f"{col}_{stat}"
+                updates.append(f"{name} = {name} + excluded.{name}")
+            # min()/max() skalar SQLite bernilai NULL jika salah satu argumen NULL
+            for stat, fn in (("min", "MIN"), ("max", "MAX")):
+                name = f"{col}_{stat}"
+                updates.append(
+                    f"{name} = COALESCE({fn}({name}, excluded.{name}), "
+                    f"{name}, excluded.{name})"
+                )
+        return (
+            f"INSERT INTO {self.table_for(resolution)} "
+            f"(node_id, bucket, {', '.join(self.stat_columns)}) "
+            f"SELECT node_id, (timestamp / {seconds}) * {seconds} AS bucket, "
+            f"{', '.join(aggregates)} FROM {source} "
+            f"WHERE id > ? AND id <= ? GROUP BY node_id, bucket "
+            f"ON CONFLICT (node_id, bucket) DO UPDATE SET {', '.join(updates)}"
+        )
+
+    def compact(self, conn):
+        """
+        Gabungkan baris mentah baru ke semua resolusi. Return jumlah baris.
+
+        Setiap tabel data diproses dalam satu transaksi bersama watermark-nya,
+        jadi compact() yang terputus tidak pernah menghitung baris dua kali.
+        """
+        watermarks = dict(conn.execute(f"SELECT * FROM {self.state_table}"))
+        sources = self.store.data_tables(conn)
+        # Tabel data memakai AUTOINCREMENT; seq di bawah watermark berarti
+        # tabel di-drop lalu dibuat ulang (misal partisi yang diarsip)
+        sequences = table_sequences(conn)
+        stale = [
+            source
+            for source, last_id in watermarks.items()
+            if source not in sources or sequences.get(source, last_id) < last_id
+        ]
+        if stale:
+            with conn:
+                conn.executemany(
+                    f"DELETE FROM {self.state_table} WHERE source_table = ?",
+                    [(source,) for source in stale],
+                )
+            for source in stale:
+                del watermarks[source]
+
+        processed = 0
+        for source in sources:
+            last_id = watermarks.get(source, 0)
+            (max_id,) = conn.execute(f"SELECT MAX(id) FROM {source}").fetchone()
+            if max_id is None or max_id <= last_id:
+                continue
+            with conn:
+                for label, seconds in RESOLUTIONS:
+                    conn.execute(
+                        self._upsert_sql(label, seconds, source), (last_id, max_id)
+                    )
+                (rows,) = conn.execute(
+                    f"SELECT COUNT(*) FROM {source} WHERE id > ? AND id <= ?",
+                    (last_id, max_id),
+                ).fetchone()
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {self.state_table} VALUES (?, ?)",
+                    (source, max_id),
+                )
+            processed += rows
+        return processed
+
+    # --- PEMBACAAN ---
+
+    def summary(self, conn):
+        """
+        (awal, akhir, baris_per_node) dari rollup harian, atau None jika kosong.
+
+        Tabel 1d sangat kecil, jadi ini murah untuk memilih resolusi baca;
+        awal/akhir dibulatkan ke batas hari.
+        """
+        day = RESOLUTIONS[-1][1]
+        first, last, rows, nodes = conn.execute(
+            f"SELECT MIN(bucket), MAX(bucket), SUM({self.value_columns[0]}_count), "
+            f"COUNT(DISTINCT node_id) FROM {self.table_for('1d')}"
+        ).fetchone()
+        if first is None:
+            return None
+        return first, last + day, rows / nodes
+
+    def select_sql(
+        self,
+        resolution,
+        columns=None,
+        node_id=None,
+        start=None,
+        end=None,
+        order_by="node_id, bucket",
+        stats=STATS + ("mean",),
+    ):
+        """
+        (sql, params) untuk membaca rollup pada resolusi tertentu.
+
+        stats memilih kolom {col}_{stat} yang dibaca; selain statistik yang
+        tersimpan tersedia juga "mean" (sum / count).
+        start/end (epoch) memilih bucket yang beririsan dengan rentang.
+        """
+        columns = columns or self.value_columns
+        seconds = dict(RESOLUTIONS)[resolution]
+        select = ["node_id", "bucket"]
+        for col in columns:
+            for stat in stats:
+                if stat == "mean":
+                    select.append(f"{col}_sum / NULLIF({col}_count, 0) AS {col}_mean")
+                else:
+                    select.append(f"{col}_{stat}")
+
+        where, params = [], []
+        if node_id is not None:
+            where.append("node_id = ?")
+            params.append(node_id)
+        if start is not None:
+            where.append("bucket > ?")
+            params.append(int(start) - seconds)
+        if end is not None:
+            where.append("bucket < ?")
+            params.append(int(end))
+        clause = f" WHERE {' AND '.join(where)}" if where else ""
+
+        sql = f"SELECT {', '.join(select)} FROM {self.table_for(resolution)}{clause}"
+        if order_by:
+            sql = f"{sql} ORDER BY {order_by}"
+        return sql, params
+
+
+class RollupCompactor:
+    """Thread latar yang menjalankan RollupStore.compact() secara berkala."""
+
+    def __init__(self, db_file, rollups, interval=COMPACT_INTERVAL):
+        self.db_file = db_file
+        self.rollups = rollups
+        self.interval = interval
+        self.rows_compacted = 0
+        self.last_compact_ms = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="rollup-compactor", daemon=True
+        )
+        self._thread.start()
+
+    def close(self, timeout=10.0):
+        """Hentikan thread (setelah satu compaction terakhir)."""
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def _run(self):
+        conn = connect_writer(self.db_file)
+        try:
+            self.rollups.setup(conn)
+            while True:
+                stopping = self._stop.wait(self.interval)
+                start = time.perf_counter()
+                try:
+                    self.rows_compacted += self.rollups.compact(conn)
+                except Exception as e:
+                    logger.error("Compaction rollup gagal: %s", e)
+                self.last_compact_ms = (time.perf_counter() - start) * 1000.0
+                if stopping:
+                    break
+        finally:
+            conn.close()
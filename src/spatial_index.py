@@ -0,0 +1,79 @@
+import math
+import threading
+
+import numpy as np
+
+
+class UniformGridIndex:
+    """
+    Index spasial berbentuk grid seragam (bucket) untuk posisi node.
+
+    Ukuran bucket disamakan dengan NODE_RADIUS, sehingga node yang bisa
+    berkontribusi ke sebuah area selalu ada di bucket yang bersinggungan
+    dengan area tersebut yang diperluas sejauh radius.
+    """
+
+    def __init__(self, node_x, node_y, cell_size):
+        self.cell_size = float(cell_size)
+        self.node_x = np.asarray(node_x, dtype=float)
+        self.node_y = np.asarray(node_y, dtype=float)
+
+        buckets = {}
+        cells_x = np.floor(self.node_x / self.cell_size).astype(int)
+        cells_y = np.floor(self.node_y / self.cell_size).astype(int)
+        for idx, key in enumerate(zip(cells_x.tolist(), cells_y.tolist())):
+            buckets.setdefault(key, []).append(idx)
+        self._buckets = {
+            key: np.asarray(indices, dtype=np.intp) for key, indices in buckets.items()
+        }
+
+    def __len__(self):
+        return len(self.node_x)
+
+    def query_box(self, x0, y0, x1, y1, margin=0.0):
+        """Indeks node (terurut) di bucket yang bersinggungan dengan kotak + margin."""
+        cs = self.cell_size
+        cx0 = math.floor((x0 - margin) / cs)
+        cx1 = math.floor((x1 + margin) / cs)
+        cy0 = math.floor((y0 - margin) / cs)
+        cy1 = math.floor((y1 + margin) / cs)
+
+        found = []
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self._buckets):
+            # Kotak lebih besar dari jumlah bucket terisi: periksa bucket saja
+            for (cx, cy), indices in self._buckets.items():
+                if cx0 <= cx <= cx1 and cy0 <= cy <= cy1:
+                    found.append(indices)
+        else:
+            for cx in range(cx0, cx1 + 1):
+                for cy in range(cy0, cy1 + 1):
+                    indices = self._buckets.get((cx, cy))
+                    if indices is not None:
+                        found.append(indices)
+
+        if not found:
+            return np.empty(0, dtype=np.intp)
+        return np.sort(np.concatenate(found))
+
+
+class SpatialIndexCache:
+    """Menyimpan index terakhir; dibangun ulang hanya jika posisi node berubah."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._key = None
+        self._index = None
+        self.rebuilds = 0
+
+    def get(self, node_x, node_y, cell_size):
+        key = (
+            float(cell_size),
+            np.asarray(node_x, dtype=float).tobytes(),
+            np.asarray(node_y, dtype=float).tobytes(),
+        )
+        with self._lock:
+            if key != self._key:
+                self._index = UniformGridIndex(node_x, node_y, cell_size)
+                self._key = key
+                self.rebuilds += 1
+            return self._index
@@ -0,0 +1,487 @@
+"""
+Lapisan penyimpanan SQLite untuk data sensor.
+
+Skema baru menyimpan timestamp sebagai epoch integer (detik, UTC) dengan
+index gabungan (node_id, timestamp), sehingga query "data node X dalam
+rentang waktu" tidak lagi full table scan. Data bisa dipecah ke tabel per
+hari atau per bulan (misal climate_20251007) agar partisi lama bisa di-drop
+atau dipindah ke file database arsip dengan murah.
+
+Koneksi memakai WAL: satu koneksi writer (thread BatchWriter) dan pool kecil
+koneksi read-only untuk callback Dash dan analisis.py, sehingga pembaca
+tidak saling menunggu dengan writer MQTT.
+"""
+
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from log_setup import get_logger
+
+logger = get_logger("storage")
+
+# --- PRAGMA KONEKSI ---
+CACHE_SIZE_KB = 64 * 1024  # Page cache per koneksi (64 MB)
+MMAP_SIZE = 256 * 1024 * 1024  # Baca file lewat memory map (256 MB)
+BUSY_TIMEOUT_MS = 5000  # Tunggu lock sebelum error "database is locked"
+READER_POOL_SIZE = 4
+
+# Skema partisi yang didukung: None (satu tabel), "day", atau "month"
+PARTITION_FORMATS = {"day": "%Y%m%d", "month": "%Y%m"}
+
+# Kolom nilai per tabel (di luar id, node_id, timestamp, created_at)
+CLIMATE_COLUMNS = (
+    ("temperature", "REAL NOT NULL"),
+    ("humidity", "REAL NOT NULL"),
+)
+MULTI_NODE_COLUMNS = CLIMATE_COLUMNS + (
+    ("pos_x", "REAL NOT NULL"),
+    ("pos_y", "REAL NOT NULL"),
+)
+
+
+def _apply_pragmas(conn):
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KB}")
+    conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+
+
+def connect_writer(db_file):
+    """
+    Koneksi tulis dengan WAL dan synchronous=NORMAL.
+
+    Di mode WAL, NORMAL hanya melakukan fsync saat checkpoint (bukan setiap
+    commit); data tetap konsisten jika aplikasi crash, hanya transaksi terakhir
+    yang bisa hilang jika listrik padam.
+    """
+    conn = sqlite3.connect(db_file)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    _apply_pragmas(conn)
+    return conn
+
+
+def connect_reader(db_file):
+    """Koneksi read-only (mode=ro) yang boleh dipakai lintas thread."""
+    uri = f"file:{os.path.abspath(db_file)}?mode=ro"
+    conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+    conn.execute("PRAGMA query_only = ON")
+    _apply_pragmas(conn)
+    return conn
+
+
+class ReaderPool:
+    """
+    Pool kecil koneksi read-only.
+
+    Koneksi dibuat saat pertama dibutuhkan (maksimal size); jika semua sedang
+    dipakai, pemanggil menunggu koneksi dikembalikan.
+    """
+
+    def __init__(self, db_file, size=READER_POOL_SIZE):
+        self.db_file = db_file
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        conn = self._acquire(timeout)
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def _acquire(self, timeout):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                try:
+                    return connect_reader(self.db_file)
+                except sqlite3.Error:
+                    self._created -= 1
+                    raise
+        return self._idle.get(timeout=timeout)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+class ClimateStore:
+    """
+    Tabel data sensor (climate / multi_node_climate) beserta partisinya.
+
+    Semua tanggal partisi dihitung dalam UTC dari timestamp epoch baris.
+    """
+
+    def __init__(self, db_file, table, columns, partition=None):
+        if partition is not None and partition not in PARTITION_FORMATS:
+            raise ValueError(f"Skema partisi tidak dikenal: {partition!r}")
+        self.db_file = db_file
+        self.table = table
+        self.columns = tuple(columns)
+        self.partition = partition
+        self._partition_re = re.compile(rf"^{re.escape(table)}_(\d{{6}}|\d{{8}})$")
+        self._known_tables = set()
+        self._lock = threading.Lock()
+
+    # --- SKEMA ---
+
+    @property
+    def column_names(self):
+        return ("node_id", "timestamp") + tuple(name for name, _ in self.columns)
+
+    def _create_table(self, conn, table):
+        value_columns = "".join(
+            f",\n                {name} {decl}" for name, decl in self.columns
+        )
+        # AUTOINCREMENT: id tidak pernah dipakai ulang setelah baris terbaru
+        # dihapus (arsip), karena watermark rollup mengandalkan id yang naik.
+        # created_at (waktu simpan, UTC) diisi SQLite seperti skema lama.
+        conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                node_id TEXT NOT NULL,
+                timestamp INTEGER NOT NULL{value_columns},
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )"""
+        )
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{table}_node_ts "
+            f"ON {table} (node_id, timestamp)"
+        )
+        self._known_tables.add(table)
+
+    def setup(self, conn):
+        """Buat tabel (atau migrasikan skema lama) pada koneksi yang diberikan."""
+        if is_legacy_table(conn, self.table):
+            rows = migrate_table(conn, self)
+            logger.info(
+                "Tabel lama '%s' dimigrasikan ke skema epoch (%d baris)",
+                self.table,
+                rows,
+            )
+        if self.partition is None:
+            self._create_table(conn, self.table)
+        for table in self.data_tables(conn):
+            if upgrade_table(conn, self, table):
+                logger.info("Tabel '%s' diubah ke id AUTOINCREMENT + created_at", table)
+        conn.commit()
+
+    # --- PENULISAN ---
+
+    def partition_key(self, epoch):
+        """Kunci partisi (misal '20251007') untuk epoch, atau None tanpa partisi."""
+        if self.partition is None:
+            return None
+        return time.strftime(PARTITION_FORMATS[self.partition], time.gmtime(epoch))
+
+    def table_for(self, epoch):
+        key = self.partition_key(epoch)
+        return self.table if key is None else f"{self.table}_{key}"
+
+    def insert_sql(self, epoch):
+        """
+        Statement INSERT untuk partisi yang sesuai dengan epoch.
+
+        Tabel partisi baru dibuat (lewat koneksi singkat) saat pertama kali
+        dibutuhkan, jadi DDL hanya terjadi sekali per hari/bulan.
+        """
+        table = self.table_for(epoch)
+        if table not in self._known_tables:
+            with self._lock:
+                if table not in self._known_tables:
+                    conn = connect_writer(self.db_file)
+                    try:
+                        with conn:
+                            self._create_table(conn, table)
+                    finally:
+                        conn.close()
+        names = self.column_names
+        placeholders = ", ".join("?" for _ in names)
+        return f"INSERT INTO {table} ({', '.join(names)}) VALUES ({placeholders})"
+
+    # --- PEMBACAAN ---
+
+    def data_tables(self, conn):
+        """Tabel dasar (jika ada) dan semua tabel partisi, urut menurut waktu."""
+        names = [
+            row[0]
+            for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE ?",
+                (f"{self.table}%",),
+            )
+        ]
+        tables = [self.table] if self.table in names else []
+        tables += sorted(name for name in names if self._partition_re.match(name))
+        return tables
+
+    def partitions(self, conn):
+        """{kunci_partisi: nama_tabel} untuk semua partisi yang ada."""
+        result = {}
+        for table in self.data_tables(conn):
+            match = self._partition_re.match(table)
+            if match:
+                result[match.group(1)] = table
+        return result
+
+    def select_sql(
+        self,
+        conn,
+        columns=None,
+        node_id=None,
+        start=None,
+        end=None,
+        order_by="node_id, timestamp",
+    ):
+        """
+        (sql, params) untuk membaca data lintas partisi.
+
+        start/end adalah epoch (inklusif/eksklusif). Partisi yang pasti di luar
+        rentang dilewati, dan setiap sub-query memakai index (node_id, timestamp).
+        """
+        columns = columns or self.column_names
+        where, params = [], []
+        if node_id is not None:
+            where.append("node_id = ?")
+            params.append(node_id)
+        if start is not None:
+            where.append("timestamp >= ?")
+            params.append(int(start))
+        if end is not None:
+            where.append("timestamp < ?")
+            params.append(int(end))
+        clause = f" WHERE {' AND '.join(where)}" if where else ""
+
+        start_key = self.partition_key(start) if start is not None else None
+        end_key = self.partition_key(end) if end is not None else None
+        selects, all_params = [], []
+        for table in self.data_tables(conn):
+            match = self._partition_re.match(table)
+            if match:
+                key = match.group(1)
+                if start_key and key[: len(start_key)] < start_key[: len(key)]:
+                    continue
+                if end_key and key[: len(end_key)] > end_key[: len(key)]:
+                    continue
+            selects.append(f"SELECT {', '.join(columns)} FROM {table}{clause}")
+            all_params.extend(params)
+
+        if not selects:
+            # Belum ada data sama sekali: query kosong dengan kolom yang sama
+            selects = [
+                "SELECT " + ", ".join(f"NULL AS {c}" for c in columns) + " WHERE 0"
+            ]
+            all_params = []
+        sql = " UNION ALL ".join(selects)
+        if order_by:
+            sql = f"{sql} ORDER BY {order_by}"
+        return sql, all_params
+
+    # --- PERAWATAN PARTISI ---
+
+    def drop_partitions_before(self, conn, key):
+        """Hapus partisi dengan kunci < key (misal '202501'). Return daftar tabel."""
+        dropped = []
+        for part_key, table in self.partitions(conn).items():
+            if part_key[: len(key)] < key[: len(part_key)]:
+                conn.execute(f"DROP TABLE {table}")
+                self._known_tables.discard(table)
+                dropped.append(table)
+        conn.commit()
+        return dropped
+
+    def archive_partition(self, conn, key, archive_file):
+        """
+        Pindahkan satu partisi ke file database terpisah (ATTACH + copy + DROP).
+
+        File arsip bisa di-attach lagi untuk dibaca, atau disimpan/dihapus
+        tanpa menyentuh database utama.
+        """
+        table = self.partitions(conn).get(key)
+        if table is None:
+            raise KeyError(f"Partisi {key} tidak ditemukan di {self.table}")
+
+        conn.commit()
+        conn.execute("ATTACH DATABASE ? AS archive", (os.fspath(archive_file),))
+        try:
+            with conn:
+                conn.execute(f"DROP TABLE IF EXISTS archive.{table}")
+                conn.execute(
+                    f"CREATE TABLE archive.{table} AS SELECT * FROM main.{table}"
+                )
+                conn.execute(
+                    f"CREATE INDEX archive.idx_{table}_node_ts "
+                    f"ON {table} (node_id, timestamp)"
+                )
+                conn.execute(f"DROP TABLE main.{table}")
+        finally:
+            conn.execute("DETACH DATABASE archive")
+        self._known_tables.discard(table)
+        return table
+
+
+# Tabel informasi node (konfigurasi dan status), dipakai database multi-node
+# dan sebagai sumber registry node (node_registry.py)
+NODE_INFO_SQL = """
+    CREATE TABLE IF NOT EXISTS node_info (
+        node_id TEXT PRIMARY KEY,
+        pos_x REAL NOT NULL,
+        pos_y REAL NOT NULL,
+        radius REAL DEFAULT 15.0,
+        status TEXT DEFAULT 'active',
+        last_seen DATETIME,
+        description TEXT,
+        color TEXT
+    )
+"""
+# Hanya posisi dan last_seen yang diperbarui; radius/warna/status dari registry
+# tetap (INSERT OR REPLACE akan menghapus baris lama beserta metadatanya)
+UPSERT_NODE_INFO_SQL = """
+    INSERT INTO node_info (node_id, pos_x, pos_y, last_seen)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(node_id) DO UPDATE SET
+        pos_x = excluded.pos_x,
+        pos_y = excluded.pos_y,
+        last_seen = excluded.last_seen
+"""
+
+
+def setup_node_info(conn):
+    """Buat tabel node_info; tabel lama diberi kolom color jika belum ada."""
+    conn.execute(NODE_INFO_SQL)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(node_info)")}
+    if "color" not in columns:
+        conn.execute("ALTER TABLE node_info ADD COLUMN color TEXT")
+    conn.commit()
+
+
+def _table_columns(conn, table):
+    """{nama_kolom: tipe} tabel (kosong jika tabel tidak ada)."""
+    return {row[1]: row[2] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def is_legacy_table(conn, table):
+    """True jika tabel ada dan kolom timestamp-nya masih string DATETIME."""
+    columns = _table_columns(conn, table)
+    return "timestamp" in columns and columns["timestamp"].upper() != "INTEGER"
+
+
+def migrate_table(conn, store):
+    """
+    Salin tabel dasar store ke skema baru dan/atau ke partisinya.
+
+    Tabel skema lama (timestamp string waktu lokal) dikonversi di SQL:
+    strftime('%s', ts, 'utc') membaca string sebagai waktu lokal lalu
+    mengubahnya ke epoch UTC. Tabel skema baru hanya dipecah ke partisi jika
+    store memakai partisi. created_at lama ikut disalin. Return jumlah baris
+    yang disalin.
+    """
+    table = store.table
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone()
+    legacy = is_legacy_table(conn, table)
+    if not exists or (not legacy and store.partition is None):
+        return 0
+
+    source = f"{table}_old"
+    value_names = [name for name, _ in store.columns]
+    epoch_expr = (
+        "CAST(strftime('%s', timestamp, 'utc') AS INTEGER)" if legacy else "timestamp"
+    )
+    # Tanpa created_at lama: NULL, bukan waktu migrasi
+    created_at = "created_at" if "created_at" in _table_columns(conn, table) else "NULL"
+    select_columns = ", ".join(["node_id", epoch_expr] + value_names + [created_at])
+    insert_columns = ", ".join(store.column_names + ("created_at",))
+
+    with conn:
+        conn.execute("BEGIN")
+        conn.execute(f"ALTER TABLE {table} RENAME TO {source}")
+        conn.execute(f"DROP INDEX IF EXISTS idx_{table}_node_ts")
+        store._known_tables.discard(table)
+
+        if store.partition is None:
+            targets = [(table, "1")]
+        else:
+            fmt = PARTITION_FORMATS[store.partition]
+            key_expr = f"strftime('{fmt}', {epoch_expr}, 'unixepoch')"
+            keys = conn.execute(f"SELECT DISTINCT {key_expr} FROM {source}").fetchall()
+            targets = [(f"{table}_{key}", f"{key_expr} = '{key}'") for (key,) in keys]
+
+        copied = 0
+        for target, condition in targets:
+            store._create_table(conn, target)
+            cursor = conn.execute(
+                f"INSERT INTO {target} ({insert_columns}) "
+                f"SELECT {select_columns} FROM {source} WHERE {condition} ORDER BY id"
+            )
+            copied += cursor.rowcount
+        conn.execute(f"DROP TABLE {source}")
+    return copied
+
+
+def table_sequences(conn):
+    """{tabel: id terbesar yang pernah dibagikan} untuk tabel AUTOINCREMENT."""
+    tables = [
+        name
+        for name, sql in conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'table'"
+        )
+        if sql and "AUTOINCREMENT" in sql.upper()
+    ]
+    if not tables:
+        return {}
+    # Baris sqlite_sequence baru ada setelah insert pertama
+    sequences = dict(conn.execute("SELECT name, seq FROM sqlite_sequence"))
+    return {table: sequences.get(table, 0) for table in tables}
+
+
+def upgrade_table(conn, store, table):
+    """
+    Buat ulang tabel data (id tanpa AUTOINCREMENT, atau tanpa created_at)
+    dengan id dan created_at yang sama.
+
+    sqlite_sequence otomatis diisi id terbesar, jadi baris berikutnya tetap
+    melanjutkan urutan lama. Return True jika tabel diubah.
+    """
+    (sql,) = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone()
+    existing = _table_columns(conn, table)
+    if "AUTOINCREMENT" in sql.upper() and "created_at" in existing:
+        return False
+
+    source = f"{table}_old"
+    names = ("id",) + store.column_names
+    # Tanpa created_at lama: NULL, bukan waktu tabel dibuat ulang
+    created_at = "created_at" if "created_at" in existing else "NULL"
+    insert_columns = ", ".join(names + ("created_at",))
+    select_columns = ", ".join(names + (created_at,))
+    with conn:
+        conn.execute("BEGIN")
+        conn.execute(f"ALTER TABLE {table} RENAME TO {source}")
+        conn.execute(f"DROP INDEX IF EXISTS idx_{table}_node_ts")
+        store._known_tables.discard(table)
+        store._create_table(conn, table)
+        conn.execute(
+            f"INSERT INTO {table} ({insert_columns}) "
+            f"SELECT {select_columns} FROM {source}"
+        )
+        conn.execute(f"DROP TABLE {source}")
+    return True
@@ -0,0 +1,314 @@
+"""
+Analisis per node secara streaming, dengan memori konstan.
+
+Data dibaca dalam chunk berurutan (node_id, timestamp) lewat cursor.fetchmany,
+jadi tidak pernah ada lebih dari satu chunk di memori. State yang perlu
+melewati batas chunk dibawa secara eksplisit:
+
+- RollingMean menyimpan window-1 nilai terakhir, sehingga hasilnya sama dengan
+  pandas rolling(window).mean() pada seluruh deret node.
+- TrendAccumulator menyimpan rata-rata dan co-moment (x, y), digabung per chunk
+  dengan rumus Chan dkk. Hasil slope/intercept sama dengan np.polyfit(x, y, 1)
+  dan akumulator dari beberapa bagian data bisa digabung (merge).
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+
+from columnar_archive import archive_ranges, iter_archive
+
+CHUNK_ROWS = 50_000  # Baris per fetchmany
+ARCHIVE_COLUMNS = ("timestamp", "temperature", "humidity")
+MOVING_AVG_WINDOW = 12
+
+
+class RollingMean:
+    """Rata-rata bergerak yang bisa diberi data sepotong demi sepotong."""
+
+    def __init__(self, window):
+        self.window = window
+        self._tail = np.empty(0)
+
+    def seed(self, values):
+        """Isi jendela dengan nilai sebelum data pertama (misal akhir segmen lain)."""
+        values = np.asarray(values, dtype=float)
+        self._tail = (
+            values[len(values) - (self.window - 1) :] if self.window > 1 else values[:0]
+        )
+
+    def update(self, values):
+        """Rata-rata bergerak untuk values (NaN sampai jendela pertama penuh)."""
+        values = np.asarray(values, dtype=float)
+        w = self.window
+        buf = np.concatenate((self._tail, values))
+        full = np.full(len(buf), np.nan)
+        if len(buf) >= w:
+            csum = np.concatenate(([0.0], np.cumsum(buf)))
+            full[w - 1 :] = (csum[w:] - csum[:-w]) / w
+        self._tail = buf[len(buf) - (w - 1) :] if w > 1 else buf[:0]
+        return full[len(buf) - len(values) :]
+
+
+class TrendAccumulator:
+    """Akumulator regresi linear y = slope * x + intercept (online, bisa di-merge)."""
+
+    def __init__(self):
+        self.n = 0
+        self.first_x = None
+        self.last_x = None
+        self.mean_x = 0.0
+        self.mean_y = 0.0
+        self.c_xx = 0.0  # sum((x - mean_x)^2)
+        self.c_xy = 0.0  # sum((x - mean_x) * (y - mean_y))
+        self.c_yy = 0.0  # sum((y - mean_y)^2)
+        self.min_y = np.inf
+        self.max_y = -np.inf
+
+    def update(self, x, y):
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        if len(x) == 0:
+            return
+        chunk = TrendAccumulator()
+        chunk.n = len(x)
+        chunk.first_x = x[0]
+        chunk.last_x = x[-1]
+        chunk.mean_x = x.mean()
+        chunk.mean_y = y.mean()
+        dx = x - chunk.mean_x
+        dy = y - chunk.mean_y
+        chunk.c_xx = float(dx @ dx)
+        chunk.c_xy = float(dx @ dy)
+        chunk.c_yy = float(dy @ dy)
+        chunk.min_y = y.min()
+        chunk.max_y = y.max()
+        self.merge(chunk)
+
+    def merge(self, other):
+        """Gabungkan akumulator lain (data setelah data milik self)."""
+        if other.n == 0:
+            return self
+        if self.n == 0:
+            self.__dict__.update(other.__dict__)
+            return self
+        n = self.n + other.n
+        delta_x = other.mean_x - self.mean_x
+        delta_y = other.mean_y - self.mean_y
+        factor = self.n * other.n / n
+        self.c_xx += other.c_xx + delta_x * delta_x * factor
+        self.c_xy += other.c_xy + delta_x * delta_y * factor
+        self.c_yy += other.c_yy + delta_y * delta_y * factor
+        self.mean_x += delta_x * other.n / n
+        self.mean_y += delta_y * other.n / n
+        self.n = n
+        self.last_x = other.last_x
+        self.min_y = min(self.min_y, other.min_y)
+        self.max_y = max(self.max_y, other.max_y)
+        return self
+
+    @property
+    def slope(self):
+        return self.c_xy / self.c_xx if self.c_xx > 0 else 0.0
+
+    def intercept(self, origin=None):
+        """Intercept dengan x diukur dari origin (default: x pertama)."""
+        origin = self.first_x if origin is None else origin
+        return self.mean_y - self.slope * (self.mean_x - origin)
+
+    @property
+    def std_y(self):
+        """Standar deviasi sampel (ddof=1), sama seperti pandas .std()."""
+        return float(np.sqrt(self.c_yy / (self.n - 1))) if self.n > 1 else np.nan
+
+
+class NodeSummary(NamedTuple):
+    node_id: str
+    rows: int
+    first_timestamp: int
+    last_timestamp: int
+    temperature_mean: float
+    temperature_std: float
+    temperature_min: float
+    temperature_max: float
+    humidity_mean: float
+    slope: float  # °C per detik
+    intercept: float  # °C pada first_timestamp
+
+
+class NodeAnalyzer:
+    """State analisis satu node: moving average suhu + tren + ringkasan."""
+
+    def __init__(self, node_id, window=MOVING_AVG_WINDOW):
+        self.node_id = node_id
+        self.rolling = RollingMean(window)
+        self.temperature = TrendAccumulator()
+        self.humidity = TrendAccumulator()
+
+    def update(self, timestamps, temperature, humidity):
+        """Proses satu potong data; return moving average suhu potong ini."""
+        self.temperature.update(timestamps, temperature)
+        self.humidity.update(timestamps, humidity)
+        return self.rolling.update(temperature)
+
+    def summary(self):
+        return summarize(self.node_id, self.temperature, self.humidity)
+
+
+def summarize(node_id, temperature, humidity):
+    """NodeSummary dari akumulator suhu dan kelembaban satu node."""
+    return NodeSummary(
+        node_id,
+        temperature.n,
+        int(temperature.first_x),
+        int(temperature.last_x),
+        float(temperature.mean_y),
+        temperature.std_y,
+        float(temperature.min_y),
+        float(temperature.max_y),
+        float(humidity.mean_y),
+        float(temperature.slope),
+        float(temperature.intercept()),
+    )
+
+
+def iter_node_chunks(
+    conn,
+    store,
+    node_id=None,
+    start=None,
+    end=None,
+    chunk_rows=CHUNK_ROWS,
+    columnar_dir=None,
+):
+    """
+    Yield (node_id, timestamps, temperature, humidity) per potongan data.
+
+    Urutan (node_id, timestamp) dilayani index, dan setiap potongan hanya
+    berisi satu node; potongan dipecah di batas node. Jika columnar_dir
+    diberikan, hari yang sudah diarsip (migrate_db.py --columnar-dir) dibaca
+    per file dan dikirim sebelum data SQLite node yang sama, karena arsip
+    hanya berisi hari yang sudah ditutup.
+    """
+    chunks = _iter_sqlite_chunks(conn, store, node_id, start, end, chunk_rows)
+    if columnar_dir is None:
+        yield from chunks
+        return
+
+    archived = sorted(archive_ranges(columnar_dir, store.table))
+    if node_id is not None:
+        archived = [node for node in archived if node == node_id]
+    for chunk in chunks:
+        # Node diurutkan sama seperti ORDER BY node_id di SQLite
+        while archived and archived[0] <= chunk[0]:
+            yield from _iter_archive_chunks(
+                columnar_dir, store, archived.pop(0), start, end, chunk_rows
+            )
+        yield chunk
+    for node in archived:
+        yield from _iter_archive_chunks(
+            columnar_dir, store, node, start, end, chunk_rows
+        )
+
+
+def _iter_sqlite_chunks(conn, store, node_id, start, end, chunk_rows):
+    sql, params = store.select_sql(
+        conn,
+        columns=("node_id", "timestamp", "temperature", "humidity"),
+        node_id=node_id,
+        start=start,
+        end=end,
+        order_by="node_id, timestamp",
+    )
+    cursor = conn.execute(sql, params)
+    while True:
+        rows = cursor.fetchmany(chunk_rows)
+        if not rows:
+            break
+        nodes, *columns = zip(*rows)
+        timestamps, temperature, humidity = np.array(columns, dtype=float)
+        # Indeks awal setiap node di dalam potongan ini
+        nodes = np.array(nodes, dtype=object)
+        breaks = np.flatnonzero(nodes[1:] != nodes[:-1]) + 1
+        bounds = [0, *breaks.tolist(), len(nodes)]
+        for begin, stop in zip(bounds[:-1], bounds[1:]):
+            yield (
+                nodes[begin],
+                timestamps[begin:stop],
+                temperature[begin:stop],
+                humidity[begin:stop],
+            )
+
+
+def _iter_archive_chunks(columnar_dir, store, node_id, start, end, chunk_rows):
+    for _, part in iter_archive(
+        columnar_dir, store.table, ARCHIVE_COLUMNS, [node_id], start, end
+    ):
+        columns = [part[name].to_numpy().astype(float) for name in ARCHIVE_COLUMNS]
+        for begin in range(0, part.num_rows, chunk_rows):
+            yield (node_id, *(column[begin : begin + chunk_rows] for column in columns))
+
+
+def analyze_stream(
+    conn,
+    store,
+    window=MOVING_AVG_WINDOW,
+    chunk_rows=CHUNK_ROWS,
+    node_id=None,
+    start=None,
+    end=None,
+    on_chunk=None,
+    columnar_dir=None,
+):
+    """
+    Analisis semua node secara streaming. Return {node_id: NodeSummary}.
+
+    on_chunk(node_id, timestamps, temperature, smoothed) dipanggil untuk setiap
+    potongan, misalnya untuk menulis hasil moving average ke file tanpa
+    menyimpan seluruh deret di memori. columnar_dir ikut membaca hari yang
+    sudah diarsip (lihat iter_node_chunks).
+    """
+    summaries = {}
+    analyzer = None
+    for node, timestamps, temperature, humidity in iter_node_chunks(
+        conn, store, node_id, start, end, chunk_rows, columnar_dir
+    ):
+        if analyzer is None or analyzer.node_id != node:
+            if analyzer is not None:
+                summaries[analyzer.node_id] = analyzer.summary()
+            analyzer = NodeAnalyzer(node, window)
+        smoothed = analyzer.update(timestamps, temperature, humidity)
+        if on_chunk is not None:
+            on_chunk(node, timestamps, temperature, smoothed)
+    if analyzer is not None:
+        summaries[analyzer.node_id] = analyzer.summary()
+    return summaries
+
+
+def analyze_frame(df, window=MOVING_AVG_WINDOW):
+    """
+    Analisis in-memory (pandas) per node, sebagai pembanding analyze_stream.
+
+    df berisi kolom node_id, timestamp (epoch), temperature, humidity.
+    Return ({node_id: NodeSummary}, {node_id: moving average suhu}).
+    """
+    summaries, smoothed = {}, {}
+    for node, group in df.sort_values(["node_id", "timestamp"]).groupby("node_id"):
+        x = group["timestamp"].to_numpy(dtype=float)
+        y = group["temperature"]
+        slope, intercept = np.polyfit(x - x[0], y.to_numpy(), 1)
+        smoothed[node] = y.rolling(window=window).mean().to_numpy()
+        summaries[node] = NodeSummary(
+            node,
+            len(group),
+            int(x[0]),
+            int(x[-1]),
+            float(y.mean()),
+            float(y.std()),
+            float(y.min()),
+            float(y.max()),
+            float(group["humidity"].mean()),
+            float(slope),
+            float(intercept),
+        )
+    return summaries, smoothed